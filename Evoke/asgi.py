@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Evoke.settings')
 
 application = get_asgi_application()
+
+# Fill the connection pools (DATABASE_POOL=1) before the first requests arrive
+from apps.core.db_pool import open_pools  # noqa: E402
+
+open_pools()
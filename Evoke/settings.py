@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
@@ -81,6 +82,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.core.db_routing.ReplicaPinMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -117,14 +119,101 @@ WSGI_APPLICATION = 'Evoke.wsgi.application'
 # }
 
 
-DATABASES = {
-    "default": dj_database_url.parse(
-        os.getenv("DATABASE_URL"),
-        conn_max_age=600,  # 10 minutes
-        ssl_require=True
+# DATABASE_POOL=1 keeps a psycopg 3 connection pool per worker process instead of
+# one persistent connection per thread, so async views and bursts reuse warm
+# connections. Size it so MAX_SIZE x worker processes stays under Postgres'
+# max_connections. Checkouts wait up to TIMEOUT seconds for a free connection.
+DATABASE_POOL = os.getenv('DATABASE_POOL') == '1'
+DATABASE_POOL_OPTIONS = {
+    'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 10)),
+    'max_idle': float(os.getenv('DATABASE_POOL_MAX_IDLE', 300)),
+    'max_lifetime': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', 1800)),
+}
+# DATABASE_SQLITE_WAL=1 lets SQLite readers run alongside a writer, for local benchmarking
+DATABASE_SQLITE_WAL = os.getenv('DATABASE_SQLITE_WAL') == '1'
+
+
+def database_config(url):
+    is_sqlite = (url or '').startswith('sqlite')
+    pooled = DATABASE_POOL and (url or '').startswith('postgres')
+    config = dj_database_url.parse(
+        url,
+        # Pooled connections go back to the pool when a request finishes
+        conn_max_age=0 if pooled else 600,  # 10 minutes
+        # Checked before reuse: by the pool on checkout, otherwise at the start of each request
+        conn_health_checks=True,
+        # Local SQLite files (e.g. sqlite:///db.sqlite3) have no SSL
+        ssl_require=not is_sqlite,
     )
+    if pooled:
+        config.setdefault('OPTIONS', {})['pool'] = dict(DATABASE_POOL_OPTIONS)
+    elif is_sqlite and DATABASE_SQLITE_WAL:
+        config.setdefault('OPTIONS', {}).update({
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        })
+    return config
+
+
+DATABASES = {
+    "default": database_config(os.getenv("DATABASE_URL")),
+}
+
+# Optional read replica for the read-heavy public views (leaderboard, gallery,
+# schedule); see apps/core/db_routing.py. Tests mirror it onto default.
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = {
+        **database_config(os.getenv("DATABASE_REPLICA_URL")),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ['apps.core.db_routing.ReplicaRouter']
+DATABASE_REPLICA = {
+    'PIN_SECONDS': int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 10)),
+}
+
+# Cache
+# Version keys used for invalidation (leaderboards, QR registry, ...) live here, so
+# multi-worker deployments should point this at a shared backend (redis, memcached,
+# or django.core.cache.backends.db.DatabaseCache).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'evoke-default'),
+    }
 }
 
+# Rate limiting (token buckets, see apps/core/ratelimit.py)
+# BURST is the bucket size, RATE the refill in requests per second. BACKEND
+# 'memory' keeps buckets per process; 'cache' shares them through CACHES.
+# IP_BURST/IP_RATE size the per-address bucket, which a whole campus behind one
+# NAT (or every client, without RATE_LIMIT_TRUST_X_FORWARDED_FOR) shares.
+RATE_LIMITS = {
+    'qr_scan': {
+        'BURST': 10,
+        'RATE': 0.5,
+        'IP_BURST': int(os.getenv('RATE_LIMIT_SCAN_IP_BURST', 500)),
+        'IP_RATE': float(os.getenv('RATE_LIMIT_SCAN_IP_RATE', 50)),
+        'BACKEND': os.getenv('RATE_LIMIT_BACKEND', 'memory'),
+    },
+    'qr_scan_batch': {
+        'BURST': 3,
+        'RATE': 0.1,
+        'IP_BURST': int(os.getenv('RATE_LIMIT_SCAN_BATCH_IP_BURST', 150)),
+        'IP_RATE': float(os.getenv('RATE_LIMIT_SCAN_BATCH_IP_RATE', 10)),
+        'BACKEND': os.getenv('RATE_LIMIT_BACKEND', 'memory'),
+    },
+}
+# Anonymous page cache for the home page, schedule and leaderboard (see apps/core/page_cache.py)
+PAGE_CACHE = {
+    'TIMEOUT': int(os.getenv('PAGE_CACHE_TIMEOUT', 300)),
+}
+# Only enable behind a proxy that sets X-Forwarded-For itself
+RATE_LIMIT_TRUST_X_FORWARDED_FOR = os.getenv('RATE_LIMIT_TRUST_X_FORWARDED_FOR') == '1'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -168,6 +257,9 @@ STATICFILES_DIRS = [BASE_DIR / "static"]  # dev static files
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Rendered QR tiles, reused across sheet generations. Defaults to the temp dir, the
+# only writable place on serverless deploys; sheets render in memory if it isn't writable.
+QR_SHEET_CACHE_DIR = os.getenv('QR_SHEET_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'evoke-qr-cache'))
 
 
 # Default primary key field type
@@ -183,4 +275,35 @@ AUTHENTICATION_BACKENDS = [
 
 
 CSRF_COOKIE_SECURE = False
-SESSION_COOKIE_SECURE = False
\ No newline at end of file
+SESSION_COOKIE_SECURE = False
+
+# Notification retention
+# TTLs are in days. Read notifications are dropped after READ_TTL_DAYS,
+# everything else after the TTL for its type (or DEFAULT_TTL_DAYS). Archives go to the
+# temp dir unless NOTIFICATION_ARCHIVE_DIR points somewhere durable and writable.
+NOTIFICATION_RETENTION = {
+    'READ_TTL_DAYS': 7,
+    'DEFAULT_TTL_DAYS': 30,
+    'TTL_DAYS': {
+        'daily_reminder': 2,
+        'treasure_hunt': 7,
+        'score': 14,
+        'media': 30,
+        'general': 30,
+    },
+    'BATCH_SIZE': 1000,
+    'ARCHIVE_DIR': os.getenv(
+        'NOTIFICATION_ARCHIVE_DIR', os.path.join(tempfile.gettempdir(), 'evoke-notification-archive')
+    ),
+}
+
+# Roster imports uploaded from the admin dashboard (see apps/core/roster_jobs.py).
+# Jobs are run by `manage.py process_roster_imports --loop` where a worker process
+# is available; otherwise each progress poll imports for up to POLL_SLICE_SECONDS.
+ROSTER_IMPORT = {
+    'CHUNK_SIZE': 500,
+    'LEASE_SECONDS': 60,
+    'SLICE_SECONDS': 20,
+    'POLL_SLICE_SECONDS': int(os.getenv('ROSTER_IMPORT_POLL_SLICE_SECONDS', '5')),
+    'MAX_UPLOAD_BYTES': 10 * 1024 * 1024,
+}
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Evoke.settings')
 
 application = get_wsgi_application()
+
+# Fill the connection pools (DATABASE_POOL=1) before the first requests arrive
+from apps.core.db_pool import open_pools  # noqa: E402
+
+open_pools()
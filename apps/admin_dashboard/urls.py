@@ -11,5 +11,12 @@ urlpatterns = [
     path('images/<int:pk>/reject/', views.reject_image, name='reject_image'),
     path('events/create/', views.EventCreateView.as_view(), name='event_create'),
     path('notifications/send/', views.send_notification, name='send_notification'),  # New URL
+    path('notifications/stats/', views.notification_stats, name='notification_stats'),
+    path('cache/fragments/', views.fragment_cache_stats, name='fragment_cache_stats'),
+    path('db/pool/', views.db_pool_stats, name='db_pool_stats'),
+    path('treasure-hunt/analytics/', views.TreasureAnalyticsView.as_view(), name='treasure_analytics'),
+    path('randomization/cohort/', views.randomize_cohort_view, name='randomize_cohort'),
+    path('roster/import/', views.roster_import, name='roster_import'),
+    path('roster/import/<int:pk>/', views.roster_import_progress, name='roster_import_progress'),
 
 ]
\ No newline at end of file
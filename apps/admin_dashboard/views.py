@@ -2,17 +2,26 @@ from functools import wraps
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models.functions import Coalesce
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_POST
 from django.views.generic import TemplateView, ListView, CreateView, DetailView
 from django.db.models import Sum, Count
 from django.contrib import messages
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from apps.core.db_pool import pool_stats
+from apps.core.fragment_cache import fragment_stats
+from apps.core.cohort import randomize_cohort, read_matric_numbers, students_for_matric_numbers, unassigned_students
+from apps.core.models import RosterImportJob
+from apps.core.roster_jobs import get_job_settings, job_progress, process_job, stage_import
 from apps.houses.models import House
 from apps.events.models import Event, Score
 from apps.gallery.models import Image
 from apps.notifications.models import Notification
+from apps.notifications.retention import notification_table_stats
+from apps.treasure_hunt.rollup import location_report
 from .forms import ScoreForm, EventForm
 from ..core.models import Student
 
@@ -49,6 +58,24 @@ class AdminDashboardView(TemplateView):
 
         return context
 
+class TreasureAnalyticsView(TemplateView):
+    """Per-location treasure hunt stats, read straight from the scan rollups"""
+    template_name = 'admin/treasure_analytics.html'
+
+    @method_decorator(login_required)
+    @method_decorator(admin_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        locations = location_report()
+        context['locations'] = locations
+        context['total_scans'] = sum(location['total_scans'] for location in locations)
+        context['found_count'] = sum(1 for location in locations if location['first_finder'])
+        return context
+
+
 class ScoreEntryView(CreateView):
     model = Score
     form_class = ScoreForm
@@ -177,3 +204,96 @@ def send_notification(request):
     })
 
 
+@login_required
+@admin_required
+def notification_stats(request):
+    """Notification table metrics for keeping an eye on retention"""
+    return JsonResponse(notification_table_stats())
+
+
+@login_required
+@admin_required
+def fragment_cache_stats(request):
+    """Hit rates of the versioned template fragments, for tuning what gets cached"""
+    return JsonResponse({'fragments': fragment_stats()})
+
+
+@login_required
+@admin_required
+def db_pool_stats(request):
+    """Connection pool size and checkout waits in the worker that serves this request"""
+    return JsonResponse({'databases': pool_stats()})
+
+
+@login_required
+@admin_required
+@require_POST
+def randomize_cohort_view(request):
+    """
+    Assign houses to a cohort in one pass: an uploaded CSV of matric numbers
+    ('file'), or every unassigned student matching 'level' / 'department'.
+    """
+    missing = []
+    upload = request.FILES.get('file')
+    if upload:
+        try:
+            students, missing = students_for_matric_numbers(read_matric_numbers(upload.read()))
+        except (UnicodeDecodeError, ValueError) as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    else:
+        students = list(unassigned_students(request.POST.get('level'), request.POST.get('department')))
+
+    try:
+        report = randomize_cohort(students, dry_run=request.POST.get('dry_run') in ('1', 'true', 'on'))
+    except House.DoesNotExist as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    report['not_found'] = missing
+    return JsonResponse({'success': True, 'report': report})
+
+
+@login_required
+@admin_required
+def roster_import(request):
+    """Upload a roster CSV; it is staged as a job and imported in the background"""
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        wants_json = request.headers.get('Accept', '').startswith('application/json')
+        try:
+            if not upload:
+                raise ValueError("Choose a CSV file to upload.")
+            job = stage_import(
+                upload, request.user,
+                update_existing=bool(request.POST.get('update_existing')),
+                skip_duplicates=bool(request.POST.get('skip_duplicates')),
+                dry_run=bool(request.POST.get('dry_run')),
+            )
+        except ValueError as e:
+            if wants_json:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+            messages.error(request, str(e))
+            return redirect('admin_dashboard:roster_import')
+
+        if wants_json:
+            return JsonResponse({'success': True, 'job': job_progress(job)}, status=202)
+        messages.success(request, f"{job.file_name} staged: {job.total_rows} rows queued for import.")
+        return redirect(f"{reverse('admin_dashboard:roster_import')}?job={job.pk}")
+
+    return render(request, 'admin/roster_import.html', {
+        'jobs': RosterImportJob.objects.defer('content')[:10],
+        'selected_job': request.GET.get('job', ''),
+    })
+
+
+@login_required
+@admin_required
+def roster_import_progress(request, pk):
+    """
+    Progress of an import job for polling. If no worker holds the job, the poll
+    itself imports a short slice, so jobs finish even without a worker process.
+    """
+    job = get_object_or_404(RosterImportJob.objects.defer('content'), pk=pk)
+    slice_seconds = get_job_settings()['POLL_SLICE_SECONDS']
+    if slice_seconds and job.status in ('pending', 'running'):
+        job = process_job(job.pk, slice_seconds) or job
+    return JsonResponse(job_progress(job))
@@ -0,0 +1,69 @@
+# apps/core/allocation.py
+import random
+
+from django.db.models import Count, F
+
+from apps.houses.models import House, HouseCounter
+
+# Each retry means another registration took the slot we were aiming for
+MAX_ATTEMPTS = 50
+
+
+def ensure_counters(houses):
+    """Create counters for houses added since the last recount"""
+    missing = [house.pk for house in houses if not hasattr(house, 'counter')]
+    if not missing:
+        return False
+    counts = dict(
+        House.objects.filter(pk__in=missing).annotate(total=Count('students')).values_list('pk', 'total')
+    )
+    HouseCounter.objects.bulk_create(
+        [HouseCounter(house_id=pk, members=counts[pk]) for pk in missing], ignore_conflicts=True
+    )
+    return True
+
+
+def allocate_house():
+    """
+    Reserve a place in one of the emptiest houses and return that house.
+
+    Reads the per-house counters, then claims a seat with a conditional
+    increment that only succeeds if the house still has the minimum count.
+    Counts only ever go up here, so a successful claim always lands on a
+    smallest house and concurrent registrations stay within one of each other.
+    One read of the counters and one conditional update per attempt,
+    however many students there are.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        houses = list(House.objects.select_related('counter').order_by('pk'))
+        if not houses:
+            raise House.DoesNotExist("There are no houses to assign students to.")
+        if ensure_counters(houses):
+            continue
+
+        lowest = min(house.counter.members for house in houses)
+        candidates = [house for house in houses if house.counter.members == lowest]
+        random.shuffle(candidates)
+
+        for house in candidates:
+            claimed = HouseCounter.objects.filter(house=house, members=lowest).update(members=F('members') + 1)
+            if claimed:
+                house.counter.members += 1
+                return house
+
+    raise RuntimeError("Could not allocate a house, too much contention. Try again.")
+
+
+def release_house(house_id):
+    """Give a seat back, e.g. when a student allocated to the house is removed"""
+    HouseCounter.objects.filter(house_id=house_id, members__gt=0).update(members=F('members') - 1)
+
+
+def recount_house_members():
+    """Reset every counter from the students table (after imports or manual moves)"""
+    houses = list(House.objects.annotate(total=Count('students')))
+    HouseCounter.objects.bulk_create(
+        [HouseCounter(house_id=house.pk, members=house.total) for house in houses],
+        update_conflicts=True, unique_fields=['house'], update_fields=['members'],
+    )
+    return {house.name: house.total for house in houses}
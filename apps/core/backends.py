@@ -52,7 +52,7 @@ class StrictStudentBackend(ModelBackend):
 
     def get_user(self, user_id):
         try:
-            return Student.objects.get(pk=user_id)
+            return load_user(user_id)
         except Student.DoesNotExist:
             return None
 
@@ -60,6 +60,7 @@ class StrictStudentBackend(ModelBackend):
 # apps/core/backends.py
 from django.contrib.auth.backends import BaseBackend
 from .models import Student
+from .user_cache import load_user
 
 
 class HouseAuthenticationBackend(BaseBackend):
@@ -88,7 +89,5 @@ class HouseAuthenticationBackend(BaseBackend):
             return None
 
     def get_user(self, user_id):
-        try:
-            return Student.objects.get(pk=user_id)
-        except Student.DoesNotExist:
-            return None
+        # Cached snapshot with the house preloaded: no queries on most requests
+        return load_user(user_id)
@@ -0,0 +1,170 @@
+# apps/core/cohort.py
+import csv
+import io
+import random
+import time
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.houses.models import House, HouseCounter
+from .allocation import ensure_counters, recount_house_members
+from .models import Student, normalize_key
+from .user_cache import forget_users
+
+UPDATE_BATCH = 500
+MATRIC_LOOKUP_BATCH = 500
+
+
+def unassigned_students(level=None, department=None):
+    """Students still waiting for a house, optionally narrowed to one level or department"""
+    students = Student.objects.filter(role='student', randomization_complete=False)
+    if level:
+        students = students.filter(level=level)
+    if department:
+        students = students.filter(department_key=normalize_key(department))
+    return students
+
+
+def read_matric_numbers(csv_file):
+    """Matric numbers from a CSV with a matric_number column (header matched case-insensitively)"""
+    if isinstance(csv_file, bytes):
+        csv_file = csv_file.decode('utf-8-sig')
+    if isinstance(csv_file, str):
+        csv_file = io.StringIO(csv_file)
+
+    reader = csv.DictReader(csv_file)
+    column = next((name for name in reader.fieldnames or [] if name.strip().lower() == 'matric_number'), None)
+    if column is None:
+        raise ValueError("The CSV needs a matric_number column.")
+    return [row[column].strip().upper() for row in reader if (row.get(column) or '').strip()]
+
+
+def students_for_matric_numbers(matric_numbers):
+    """(students not yet randomized, matric numbers with no student), checked in chunks"""
+    wanted = list(dict.fromkeys(matric_numbers))
+    found = {}
+    for start in range(0, len(wanted), MATRIC_LOOKUP_BATCH):
+        for student in Student.objects.filter(matric_number__in=wanted[start:start + MATRIC_LOOKUP_BATCH]):
+            found[student.matric_number] = student
+    missing = [number for number in wanted if number not in found]
+    pending = [student for student in found.values() if not student.randomization_complete]
+    return pending, missing
+
+
+def plan_assignment(students, house_counts):
+    """
+    Map each student to a house, balanced within every (department, level)
+    stratum and overall.
+
+    Each stratum is dealt out evenly: every house gets the same share and the
+    remainder goes to the houses that are currently smallest overall. Within a
+    stratum houses differ by at most one, and an overall spread of one or less
+    stays that way.
+    """
+    counts = dict(house_counts)
+    strata = defaultdict(list)
+    for student in students:
+        strata[(student.department_key, student.level or '')].append(student)
+
+    plan = {}
+    # Big strata first so the remainders of small ones even things out at the end
+    for key in sorted(strata, key=lambda k: (-len(strata[k]), k)):
+        members = strata[key]
+        random.shuffle(members)
+        house_ids = list(counts)
+        random.shuffle(house_ids)
+        house_ids.sort(key=counts.get)
+
+        share, remainder = divmod(len(members), len(house_ids))
+        seats = []
+        for position, house_id in enumerate(house_ids):
+            taken = share + (1 if position < remainder else 0)
+            seats.extend([house_id] * taken)
+            counts[house_id] += taken
+        for student, house_id in zip(members, seats):
+            plan[student.pk] = house_id
+    return plan
+
+
+def randomize_cohort(students, dry_run=False):
+    """
+    Assign houses to a whole cohort in one pass and one transaction.
+    Returns a report dict: per-house totals, the spread per stratum, DB timings and
+    how many students were skipped because they got a house some other way meanwhile.
+    """
+    students = [student for student in students if not student.randomization_complete]
+    report = {'students': len(students), 'skipped': 0, 'dry_run': dry_run, 'houses': {}, 'strata': []}
+    if not students:
+        return report
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        houses = list(House.objects.select_related('counter').order_by('pk'))
+        if not houses:
+            raise House.DoesNotExist("There are no houses to assign students to.")
+        if ensure_counters(houses):
+            houses = list(House.objects.select_related('counter').order_by('pk'))
+        # Hold the counters so web registrations wait for the cohort rather than race it
+        counters = HouseCounter.objects.select_for_update().filter(house__in=houses)
+        house_counts = dict(counters.values_list('house_id', 'members'))
+
+        # Students were picked before the lock; drop any who registered through the web since
+        pending = set()
+        pks = [student.pk for student in students]
+        for start in range(0, len(pks), UPDATE_BATCH):
+            pending.update(Student.objects.filter(
+                pk__in=pks[start:start + UPDATE_BATCH], randomization_complete=False
+            ).values_list('pk', flat=True))
+        report['skipped'] = len(students) - len(pending)
+        students = [student for student in students if student.pk in pending]
+        report['students'] = len(students)
+
+        plan = plan_assignment(students, house_counts)
+
+        now = timezone.now()
+        by_house = defaultdict(list)
+        for student in students:
+            student.house_id = plan[student.pk]
+            student.randomized_at = now
+            student.randomization_complete = True
+            by_house[student.house_id].append(student.pk)
+
+        if not dry_run:
+            # Only the house differs between rows, so one plain UPDATE per house and chunk
+            # (bulk_update's per-row CASE expressions cost seconds at this size)
+            for house_id, pks in by_house.items():
+                for start in range(0, len(pks), UPDATE_BATCH):
+                    # The guard keeps a student assigned meanwhile in the house they already have
+                    Student.objects.filter(
+                        pk__in=pks[start:start + UPDATE_BATCH], randomization_complete=False
+                    ).update(house_id=house_id, randomized_at=now, randomization_complete=True)
+            recount_house_members()
+            transaction.on_commit(lambda: forget_users([student.pk for student in students]))
+        else:
+            transaction.set_rollback(True)
+
+    report['db_seconds'] = round(time.perf_counter() - started, 4)
+
+    names = {house.pk: house.name for house in houses}
+    assigned = Counter(plan.values())
+    report['houses'] = {
+        names[house_id]: {'before': house_counts[house_id], 'assigned': assigned[house_id],
+                          'after': house_counts[house_id] + assigned[house_id]}
+        for house_id in names
+    }
+
+    per_stratum = defaultdict(Counter)
+    labels = {}
+    for student in students:
+        key = (student.department_key, student.level or '')
+        per_stratum[key][plan[student.pk]] += 1
+        labels.setdefault(key, student.department or '')
+    for key, spread in sorted(per_stratum.items()):
+        sizes = [spread[house_id] for house_id in names]
+        report['strata'].append({
+            'department': labels[key], 'level': key[1], 'students': sum(sizes),
+            'per_house': dict(zip(names.values(), sizes)), 'spread': max(sizes) - min(sizes),
+        })
+    return report
@@ -0,0 +1,59 @@
+# apps/core/db_pool.py
+from django.db import connections
+
+
+def _pool(alias):
+    # Only the PostgreSQL backend has a pool, and only with OPTIONS['pool'] set
+    return getattr(connections[alias], 'pool', None)
+
+
+def open_pools():
+    """
+    Start filling each pool up to its min_size in the background, so the first
+    requests after a worker boots don't each pay for a new connection.
+    """
+    for alias in connections:
+        pool = _pool(alias)
+        if pool is not None:
+            pool.open(wait=False)
+
+
+def _summary(raw):
+    checkouts = raw.get('requests_num', 0)
+    opened = raw.get('connections_num', 0)
+    return {
+        'pooled': True,
+        'min_size': raw.get('pool_min'),
+        'max_size': raw.get('pool_max'),
+        'size': raw.get('pool_size'),
+        'available': raw.get('pool_available'),
+        'waiting': raw.get('requests_waiting', 0),
+        'checkouts': checkouts,
+        # Checkouts that found no idle connection and had to wait for one
+        'queued': raw.get('requests_queued', 0),
+        'avg_wait_ms': round(raw.get('requests_wait_ms', 0) / checkouts, 1) if checkouts else 0.0,
+        'timeouts': raw.get('requests_errors', 0),
+        'connections_opened': opened,
+        'avg_connect_ms': round(raw.get('connections_ms', 0) / opened, 1) if opened else 0.0,
+        'connection_errors': raw.get('connections_errors', 0),
+        # Connections that failed the health check on checkout or came back broken
+        'connections_lost': raw.get('connections_lost', 0) + raw.get('returns_bad', 0),
+    }
+
+
+def pool_stats(reset=False):
+    """Size, checkout waits and health of each database alias's pool since the last reset"""
+    stats = {}
+    for alias in connections:
+        pool = _pool(alias)
+        if pool is None:
+            settings_dict = connections[alias].settings_dict
+            stats[alias] = {
+                'pooled': False,
+                'vendor': connections[alias].vendor,
+                'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+                'health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+            }
+            continue
+        stats[alias] = _summary(pool.pop_stats() if reset else pool.get_stats())
+    return stats
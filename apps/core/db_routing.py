@@ -0,0 +1,135 @@
+# apps/core/db_routing.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+DEFAULT_SETTINGS = {
+    'ALIAS': 'replica',
+    # How long a client reads from the primary after it writes, to cover replication lag
+    'PIN_SECONDS': 10,
+    'PIN_COOKIE': 'db_pin',
+}
+
+# Set for the duration of a @use_replica view. A ContextVar rather than a thread
+# local so it follows async views into the threads sync_to_async runs the ORM in.
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+# Set inside use_primary(); wins over the replica however the two are nested
+_primary_required = ContextVar('primary_required', default=False)
+
+
+def get_replica_settings():
+    config = dict(DEFAULT_SETTINGS)
+    config.update(getattr(settings, 'DATABASE_REPLICA', {}))
+    return config
+
+
+def replica_alias():
+    """The replica's alias, or None when no replica is configured"""
+    alias = get_replica_settings()['ALIAS']
+    return alias if alias in settings.DATABASES else None
+
+
+def is_pinned(request):
+    """Whether this client wrote recently and must keep reading its own writes from the primary"""
+    try:
+        pinned_until = float(request.COOKIES.get(get_replica_settings()['PIN_COOKIE'], 0))
+    except ValueError:
+        return False
+    return pinned_until > time.time()
+
+
+def pin_to_primary(response):
+    config = get_replica_settings()
+    response.set_cookie(
+        config['PIN_COOKIE'], str(time.time() + config['PIN_SECONDS']),
+        max_age=config['PIN_SECONDS'], httponly=True, samesite='Lax',
+    )
+    return response
+
+
+def _wants_replica(request):
+    return request.method in SAFE_METHODS and not is_pinned(request)
+
+
+def use_replica(view):
+    """
+    Run a read-only view's queries against the replica. Unsafe methods and
+    clients that wrote in the last PIN_SECONDS stay on the primary.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _reading_from_replica.set(_wants_replica(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _reading_from_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _reading_from_replica.set(_wants_replica(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _reading_from_replica.reset(token)
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary, even inside a @use_replica view. Anything stored under a
+    version key (page cache, fragments, the schedule) must be built here: a lagging
+    replica would otherwise file old rows under the new version until it changes again.
+    Works as a decorator too.
+    """
+    token = _primary_required.set(True)
+    try:
+        yield
+    finally:
+        _primary_required.reset(token)
+
+
+class ReplicaRouter:
+    """Reads inside @use_replica views go to the replica; everything else uses the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica.get() and not _primary_required.get():
+            alias = replica_alias()
+            if alias:
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an instance loaded from the replica still writes to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == get_replica_settings()['ALIAS']:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Pins a client to the primary for PIN_SECONDS after any request that may have written"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 500 and replica_alias():
+            pin_to_primary(response)
+        return response
@@ -0,0 +1,104 @@
+# apps/core/exports.py
+import csv
+
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+
+from apps.events.models import Score
+from apps.gallery.models import Image
+from apps.treasure_hunt.models import QRScan
+from .models import Student
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the formatted line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def student_rows():
+    students = Student.objects.filter(
+        role='student', randomization_complete=True
+    ).order_by('house__name', 'matric_number').values_list(
+        'matric_number', 'name', 'level', 'department', 'house__name', 'randomized_at'
+    )
+    for matric_number, name, level, department, house, randomized_at in students.iterator(chunk_size=CHUNK_SIZE):
+        yield [matric_number, name, level, department, house or 'Not Assigned', _datetime(randomized_at)]
+
+
+def score_rows():
+    scores = Score.objects.order_by('event__day', 'event__time', 'house__name').values_list(
+        'event__title', 'event__day', 'event__type', 'house__name', 'points', 'created_at'
+    )
+    for title, day, event_type, house, points, created_at in scores.iterator(chunk_size=CHUNK_SIZE):
+        yield [title, day.isoformat(), event_type, house, points, _datetime(created_at)]
+
+
+def scan_rows():
+    scans = QRScan.objects.order_by('scanned_at', 'id').values_list(
+        'student__matric_number', 'student__name', 'student__house__name',
+        'qr_code__location_name', 'qr_code__code', 'qr_code__points', 'scanned_at'
+    )
+    for matric_number, name, house, location, code, points, scanned_at in scans.iterator(chunk_size=CHUNK_SIZE):
+        yield [matric_number, name, house or '', location, code, points, _datetime(scanned_at)]
+
+
+def gallery_rows():
+    storage = Image._meta.get_field('file').storage
+    images = Image.objects.annotate(like_total=Count('likes')).order_by('timestamp', 'id').values_list(
+        'id', 'uploader__matric_number', 'uploader__name', 'house__name', 'approved',
+        'description', 'tags', 'like_total', 'timestamp', 'file'
+    )
+    for (pk, matric_number, uploader, house, approved, description, tags,
+         likes, timestamp, file_name) in images.iterator(chunk_size=CHUNK_SIZE):
+        yield [pk, matric_number, uploader, house or '', 'yes' if approved else 'no', description, tags,
+               likes, _datetime(timestamp), storage.url(file_name) if file_name else '']
+
+
+# name -> (download file name, header row, row generator)
+EXPORTS = {
+    'students': (
+        'student_house_assignments.csv',
+        ['Matric Number', 'Name', 'Level', 'Department', 'House', 'Randomized At'],
+        student_rows,
+    ),
+    'scores': (
+        'house_scores.csv',
+        ['Event', 'Day', 'Type', 'House', 'Points', 'Recorded At'],
+        score_rows,
+    ),
+    'scans': (
+        'treasure_hunt_scans.csv',
+        ['Matric Number', 'Name', 'House', 'Location', 'Code', 'Points', 'Scanned At'],
+        scan_rows,
+    ),
+    'gallery': (
+        'gallery_images.csv',
+        ['ID', 'Uploader Matric Number', 'Uploader', 'House', 'Approved', 'Description', 'Tags', 'Likes',
+         'Uploaded At', 'URL'],
+        gallery_rows,
+    ),
+}
+
+
+def stream_csv(header, rows):
+    """Yield CSV lines one at a time; nothing is held beyond the current database chunk"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_export_response(name):
+    """Streaming download for one of EXPORTS. Raises KeyError for unknown names."""
+    filename, header, rows = EXPORTS[name]
+    response = StreamingHttpResponse(stream_csv(header, rows()), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -2,7 +2,7 @@ from django import forms
 from django.contrib.auth import authenticate
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
-from .models import Student
+from .models import Student, normalize_key
 from ..houses.models import House
 
 
@@ -45,9 +45,9 @@ class StudentLoginForm(forms.Form):
             # Try to find student by matric number first
             student = Student.objects.get(matric_number=matric_number)
         except Student.DoesNotExist:
-            # If not found by matric number, try by name (case-insensitive)
+            # If not found by matric number, try by name (case-insensitive, via the indexed name_key)
             try:
-                student = Student.objects.get(name__iexact=matric_number)
+                student = Student.objects.get(name_key=normalize_key(matric_number))
             except Student.DoesNotExist:
                 raise forms.ValidationError(
                     "No student found with this matric number or name. "
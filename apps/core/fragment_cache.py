@@ -0,0 +1,116 @@
+# apps/core/fragment_cache.py
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_routing import use_primary
+
+# Models whose saves and deletes bump a version counter (see signals.py).
+# A fragment lists the ones it renders from and is reused until one of them changes.
+VERSIONED_MODELS = [
+    'events.event',
+    'events.score',
+    'houses.house',
+    'gallery.image',
+    'gallery.dailyhighlight',
+]
+
+VERSION_KEY = 'core:model_version:{}'
+STATS_KEY = 'core:fragment_stats:{}:{}'
+STATS_NAMES_KEY = 'core:fragment_stats:names'
+
+DEFAULT_SETTINGS = {
+    # Only bounds how long superseded versions linger; fragments go stale by version, not by age
+    'TIMEOUT': 60 * 60 * 24,
+    'STATS': True,
+}
+
+
+def get_fragment_cache_settings():
+    config = dict(DEFAULT_SETTINGS)
+    config.update(getattr(settings, 'FRAGMENT_CACHE', {}))
+    return config
+
+
+def model_versions(labels):
+    """Current version of each model label, read in one cache round trip"""
+    keys = [VERSION_KEY.format(label) for label in labels]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            # Start from the clock so a reset key never collides with versions still in the cache
+            cache.add(key, int(time.time() * 1000), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_model_version(label):
+    """Expire every fragment rendered from this model"""
+    try:
+        cache.incr(VERSION_KEY.format(label))
+    except ValueError:
+        model_versions([label])
+
+
+def fragment_key(name, labels, vary_on=()):
+    versions = '.'.join(str(version) for version in model_versions(labels))
+    vary = hashlib.md5(':'.join(str(value) for value in vary_on).encode()).hexdigest()
+    return f'core:fragment:{name}:{versions}:{vary}'
+
+
+def _count(name, outcome):
+    key = STATS_KEY.format(name, outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+    names = cache.get(STATS_NAMES_KEY) or []
+    if name not in names:
+        cache.set(STATS_NAMES_KEY, sorted(names + [name]), None)
+
+
+def cached_fragment(name, labels, vary_on, render):
+    """The cached output for this fragment and version, rendering and storing it on a miss"""
+    config = get_fragment_cache_settings()
+    key = fragment_key(name, labels, vary_on)
+    content = cache.get(key)
+    if content is None:
+        # Filed under the current versions, so built from the primary rather than a lagging replica
+        with use_primary():
+            content = render()
+        cache.set(key, content, config['TIMEOUT'])
+        outcome = 'misses'
+    else:
+        outcome = 'hits'
+    if config['STATS']:
+        _count(name, outcome)
+    return content
+
+
+def fragment_stats():
+    """Hits, misses and hit rate per fragment name since the last reset"""
+    names = cache.get(STATS_NAMES_KEY) or []
+    counts = cache.get_many([STATS_KEY.format(name, outcome) for name in names for outcome in ('hits', 'misses')])
+    stats = {}
+    for name in names:
+        hits = counts.get(STATS_KEY.format(name, 'hits'), 0)
+        misses = counts.get(STATS_KEY.format(name, 'misses'), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(100 * hits / total, 1) if total else 0.0,
+        }
+    return stats
+
+
+def reset_fragment_stats():
+    names = cache.get(STATS_NAMES_KEY) or []
+    cache.delete_many([STATS_KEY.format(name, outcome) for name in names for outcome in ('hits', 'misses')])
+    cache.delete(STATS_NAMES_KEY)
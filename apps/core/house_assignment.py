@@ -1,9 +1,10 @@
 # apps/core/house_assignment.py
-import random
 import uuid
+from django.db import transaction
 from django.db.models import Count
 from django.utils import timezone
-from .models import Student
+from .allocation import allocate_house, release_house
+from .models import Student, normalize_key
 from apps.houses.models import House
 
 
@@ -86,21 +87,48 @@ class HouseRandomizer:
         if student.house and student.randomization_complete:
             return student.house
 
-        house_counts = House.objects.annotate(
-            student_count=Count('students')
-        ).order_by('student_count')
-
-        min_count = house_counts.first().student_count
-        smallest_houses = [h for h in house_counts if h.student_count == min_count]
-        chosen_house = random.choice(smallest_houses)
+        # Balanced even under concurrent registrations, see apps/core/allocation.py.
+        # One transaction, so a failed save hands the claimed seat back.
+        with transaction.atomic():
+            chosen_house = allocate_house()
 
-        student.house = chosen_house
-        student.randomized_at = timezone.now()
-        student.randomization_complete = True
-        student.save()
+            student.house = chosen_house
+            student.randomized_at = timezone.now()
+            student.randomization_complete = True
+            student.save()
 
         return chosen_house
 
+    @classmethod
+    def register_student(cls, name, level, department, matric_number):
+        """
+        Create (or refresh) the student and place them in a house with a single write.
+        Returns (student, house).
+        """
+        with transaction.atomic():
+            student = Student.objects.select_for_update().filter(matric_number=matric_number).first()
+
+            if student is None:
+                student = Student(matric_number=matric_number, role='student')
+                # HouseAuthenticationBackend never checks passwords, so skip the PBKDF2 hash
+                student.set_unusable_password()
+            elif student.house_id:
+                # Re-randomizing: hand back the seat in the old house first, so the
+                # allocator sees the real counts and the old house can be picked again
+                release_house(student.house_id)
+
+            house = allocate_house()
+
+            student.name = name
+            student.level = level
+            student.department = department
+            student.house = house
+            student.randomized_at = timezone.now()
+            student.randomization_complete = True
+            student.save()
+
+        return student, house
+
     @classmethod
     def get_house_stats(cls):
         """Get statistics for all houses"""
@@ -133,23 +161,15 @@ class HouseRandomizer:
                 )
                 return student
 
-            student = Student.objects.get(
-                name__iexact=name.strip(),
+            students = Student.objects.filter(
+                name_key=normalize_key(name),
                 level=level,
-                department__iexact=department,
+                department_key=normalize_key(department),
                 randomization_complete=True
             )
-            return student
+            return students.first()
         except Student.DoesNotExist:
             pass
-        except Student.MultipleObjectsReturned:
-            students = Student.objects.filter(
-                name__iexact=name.strip(),
-                level=level,
-                department__iexact=department,
-                randomization_complete=True
-            )
-            return students.first() if students.exists() else None
 
         return None
 
@@ -0,0 +1,73 @@
+# apps/core/management/commands/benchmark_randomization.py
+import secrets
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.allocation import recount_house_members
+from apps.core.house_assignment import HouseRandomizer
+from apps.core.models import Student
+from apps.houses.models import House
+
+
+class Command(BaseCommand):
+    help = 'Benchmark house randomization throughput for one worker, old flow against the single-write flow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200, help='Registrations per round')
+
+    def handle(self, *args, **options):
+        count = options['students']
+        self.stdout.write(f"{count} registrations per round, single worker\n")
+        self.stdout.write(f"{'flow':<14}{'elapsed':>10}{'regs/s':>10}{'queries/reg':>13}")
+
+        for label, register in (('before', self.register_legacy), ('after', self.register_single_write)):
+            # Everything is created and rolled back inside one transaction
+            with transaction.atomic():
+                result = self.run_round(register, count)
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{label:<14}{result['elapsed']:>9.2f}s{result['throughput']:>10.1f}{result['queries']:>13.1f}"
+            )
+
+    def register_legacy(self, name, level, department, matric_number):
+        """The flow HouseRandomizationView.post used to run"""
+        student, created = Student.objects.get_or_create(
+            matric_number=matric_number,
+            defaults={'name': name, 'level': level, 'department': department,
+                      'role': 'student', 'randomization_complete': False}
+        )
+        if created:
+            student.set_password(matric_number)
+            student.save()
+        with transaction.atomic():
+            house = HouseRandomizer.assign_house(student)
+            student.house = house
+            student.randomization_complete = True
+            student.save()
+        return student, house
+
+    def register_single_write(self, name, level, department, matric_number):
+        return HouseRandomizer.register_student(name, level, department, matric_number)
+
+    def run_round(self, register, count):
+        if not House.objects.exists():
+            for i in range(5):
+                House.objects.create(name=f"Benchmark House {i}")
+        recount_house_members()
+
+        prefix = f"BENCH{secrets.token_hex(3).upper()}"
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for i in range(count):
+                register(f"Benchmark Student {i}", "100", "Computer Science", f"{prefix}{i:05d}")
+            elapsed = time.perf_counter() - started
+
+        return {
+            'elapsed': elapsed,
+            'throughput': count / elapsed if elapsed else 0,
+            'queries': len(queries) / count if count else 0,
+        }
@@ -0,0 +1,34 @@
+# apps/core/management/commands/db_pool_stats.py
+from django.core.management.base import BaseCommand
+
+from apps.core.db_pool import pool_stats
+
+
+class Command(BaseCommand):
+    help = "Show connection pool size, checkout waits and health checks for this process's databases"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after printing them')
+
+    def handle(self, *args, **options):
+        for alias, stats in pool_stats(reset=options['reset']).items():
+            if not stats['pooled']:
+                self.stdout.write(
+                    f"{alias}: not pooled ({stats['vendor']}, CONN_MAX_AGE={stats['conn_max_age']}, "
+                    f"health checks {'on' if stats['health_checks'] else 'off'})"
+                )
+                continue
+            self.stdout.write(
+                f"{alias}: {stats['size']}/{stats['max_size']} connections (min {stats['min_size']}), "
+                f"{stats['available']} idle, {stats['waiting']} waiting"
+            )
+            self.stdout.write(
+                f"  {stats['checkouts']} checkouts, {stats['queued']} queued, "
+                f"avg wait {stats['avg_wait_ms']}ms, {stats['timeouts']} timed out"
+            )
+            self.stdout.write(
+                f"  {stats['connections_opened']} opened (avg {stats['avg_connect_ms']}ms), "
+                f"{stats['connection_errors']} failed, {stats['connections_lost']} lost"
+            )
+        if options['reset']:
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -0,0 +1,23 @@
+# apps/core/management/commands/fragment_cache_stats.py
+from django.core.management.base import BaseCommand
+
+from apps.core.fragment_cache import fragment_stats, reset_fragment_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit rates for the versioned template fragment cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = fragment_stats()
+        if not stats:
+            self.stdout.write("No fragments rendered since the counters were last reset")
+        for name, counts in stats.items():
+            self.stdout.write(
+                f"{name}: {counts['hit_rate']}% hits ({counts['hits']} hits, {counts['misses']} misses)"
+            )
+        if options['reset']:
+            reset_fragment_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -0,0 +1,34 @@
+# apps/core/management/commands/process_roster_imports.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.roster_jobs import job_progress, next_job_id, process_job
+
+
+class Command(BaseCommand):
+    help = 'Run staged roster imports uploaded from the admin dashboard, resuming any left unfinished'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs instead of exiting')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds between polls when idle (with --loop)')
+        parser.add_argument('--slice-seconds', type=float, default=None, help='Work per claim before re-queueing')
+
+    def handle(self, *args, **options):
+        while True:
+            job_id = next_job_id()
+            if job_id is None:
+                if not options['loop']:
+                    self.stdout.write("No roster imports waiting")
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            job = process_job(job_id, options['slice_seconds'])
+            if job is None:
+                continue
+            progress = job_progress(job)
+            self.stdout.write(
+                f"Job {job.pk} {job.file_name}: {progress['status']} {progress['processed_rows']}/{progress['total_rows']} "
+                f"rows, {progress['rows_per_second']} rows/s, {progress['errors']} errors"
+            )
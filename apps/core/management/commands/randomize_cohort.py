@@ -0,0 +1,50 @@
+# apps/core/management/commands/randomize_cohort.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.cohort import randomize_cohort, read_matric_numbers, students_for_matric_numbers, unassigned_students
+
+
+class Command(BaseCommand):
+    help = 'Assign houses to a whole cohort at once, balanced overall and by department and level'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', dest='csv_file', help='CSV with a matric_number column (default: every unassigned student)')
+        parser.add_argument('--level', help='Only students at this level')
+        parser.add_argument('--department', help='Only students in this department')
+        parser.add_argument('--dry-run', action='store_true', help='Plan and report without saving')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        missing = []
+        if options['csv_file']:
+            try:
+                with open(options['csv_file'], newline='', encoding='utf-8-sig') as csv_file:
+                    matric_numbers = read_matric_numbers(csv_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            students, missing = students_for_matric_numbers(matric_numbers)
+        else:
+            students = list(unassigned_students(options['level'], options['department']))
+
+        report = randomize_cohort(students, dry_run=options['dry_run'])
+        report['not_found'] = missing
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{report['students']} students, {report.get('db_seconds', 0):.3f}s in the database"
+                          f"{' (dry run, nothing saved)' if report['dry_run'] else ''}\n")
+        self.stdout.write(f"{'house':<40}{'before':>8}{'assigned':>10}{'after':>8}")
+        for name, row in report['houses'].items():
+            self.stdout.write(f"{name:<40}{row['before']:>8}{row['assigned']:>10}{row['after']:>8}")
+
+        uneven = [stratum for stratum in report['strata'] if stratum['spread'] > 1]
+        self.stdout.write(f"\n{len(report['strata'])} department/level groups, {len(uneven)} spread by more than one")
+        if report['skipped']:
+            self.stdout.write(self.style.WARNING(f"{report['skipped']} students already had a house and were skipped"))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{len(missing)} matric numbers not found: {', '.join(missing[:20])}"))
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,13 @@
+# apps/core/management/commands/recount_house_members.py
+from django.core.management.base import BaseCommand
+
+from apps.core.allocation import recount_house_members
+
+
+class Command(BaseCommand):
+    help = 'Reset the house allocator counters from the current house memberships'
+
+    def handle(self, *args, **options):
+        for name, members in recount_house_members().items():
+            self.stdout.write(f"{name}: {members}")
+        self.stdout.write(self.style.SUCCESS("House counters updated"))
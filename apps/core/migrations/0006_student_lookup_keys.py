@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+def fill_lookup_keys(apps, schema_editor):
+    Student = apps.get_model('core', 'Student')
+
+    def normalize(value):
+        return ' '.join((value or '').split()).casefold()
+
+    batch = []
+    for student in Student.objects.only('pk', 'name', 'department').iterator(chunk_size=1000):
+        student.name_key = normalize(student.name)[:100]
+        student.department_key = normalize(student.department)[:255]
+        batch.append(student)
+        if len(batch) >= 1000:
+            Student.objects.bulk_update(batch, ['name_key', 'department_key'])
+            batch = []
+    if batch:
+        Student.objects.bulk_update(batch, ['name_key', 'department_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0005_alter_student_matric_number_and_more'),
+        ('houses', '0004_house_whatsapp_link'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='department_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_lookup_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['name_key', 'level', 'department_key'], name='core_student_name_key_idx'),
+        ),
+    ]
@@ -4,6 +4,11 @@ from django.db import models
 import uuid
 
 
+def normalize_key(value):
+    """Lookup key for names and departments: trimmed, single-spaced and case-folded"""
+    return ' '.join((value or '').split()).casefold()
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, matric_number, **extra_fields):
         if not matric_number:
@@ -33,6 +38,9 @@ class Student(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=100)
     level = models.CharField(max_length=10, blank=True, null=True)
     department = models.CharField(max_length=255, blank=True, null=True)
+    # Normalized copies of name/department so case-insensitive lookups can use an index
+    name_key = models.CharField(max_length=100, blank=True, default='', editable=False)
+    department_key = models.CharField(max_length=255, blank=True, default='', editable=False)
     house = models.ForeignKey(
         'houses.House',
         on_delete=models.SET_NULL,
@@ -63,6 +71,7 @@ class Student(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['matric_number']),
             models.Index(fields=['house']),
             models.Index(fields=['randomization_complete']),
+            models.Index(fields=['name_key', 'level', 'department_key'], name='core_student_name_key_idx'),
         ]
 
     def clean(self):
@@ -77,13 +86,22 @@ class Student(AbstractBaseUser, PermissionsMixin):
         if self.role == 'admin' and self.house is not None:
             raise ValidationError("Admin users must not have a house.")
 
+    def refresh_keys(self):
+        self.name_key = normalize_key(self.name)[:100]
+        self.department_key = normalize_key(self.department)[:255]
+
     def save(self, *args, **kwargs):
         # Generate matric number if not provided
         if not self.matric_number:
             self.matric_number = f"GEN_{uuid.uuid4().hex[:12]}"
 
+        self.refresh_keys()
+
         # Skip validation if only updating last_login
         update_fields = kwargs.get('update_fields')
+        if update_fields and {'name', 'department'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'name_key', 'department_key'}
+
         if update_fields and set(update_fields) == {'last_login'}:
             super().save(*args, **kwargs)
         else:
@@ -91,4 +109,51 @@ class Student(AbstractBaseUser, PermissionsMixin):
             super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.name} ({self.matric_number}) - {self.role}"
\ No newline at end of file
+        return f"{self.name} ({self.matric_number}) - {self.role}"
+
+class RosterImportJob(models.Model):
+    """A staged roster CSV imported in resumable slices (see apps/core/roster_jobs.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    uploaded_by = models.ForeignKey(Student, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='roster_imports')
+    file_name = models.CharField(max_length=255)
+    # Kept in the database so any web or worker process can pick the job up
+    content = models.TextField()
+    update_existing = models.BooleanField(default=False)
+    skip_duplicates = models.BooleanField(default=False)
+    dry_run = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.PositiveIntegerField(default=0)
+    # Data rows already imported; a resumed run starts here
+    offset = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    error_log = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+
+    # Whoever holds an unexpired lease is working on the job
+    worker = models.CharField(max_length=64, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    active_seconds = models.FloatField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status}, {self.offset}/{self.total_rows})"
@@ -0,0 +1,122 @@
+# apps/core/page_cache.py
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .db_routing import use_primary
+
+PAGE_VERSION_KEY = 'core:page_version'
+
+DEFAULT_SETTINGS = {
+    'TIMEOUT': 60 * 5,          # how long a rendered page is served for one content version
+    'STALE_TIMEOUT': 60 * 60,   # how long the last copy can stand in while a new one renders
+    'LOCK_TIMEOUT': 10,         # a renderer that dies frees the page after this
+    'WAIT_SECONDS': 2,          # how long a request with no stale copy waits for the renderer
+}
+
+
+def get_page_cache_settings():
+    config = dict(DEFAULT_SETTINGS)
+    config.update(getattr(settings, 'PAGE_CACHE', {}))
+    return config
+
+
+def get_page_version():
+    version = cache.get(PAGE_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a reset key never collides with versions still in the cache
+        cache.add(PAGE_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(PAGE_VERSION_KEY)
+    return version
+
+
+def bump_page_version():
+    """Invalidate every cached public page (events, houses, approved images or scores changed)"""
+    try:
+        cache.incr(PAGE_VERSION_KEY)
+    except ValueError:
+        get_page_version()
+
+
+def _page_key(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def _freeze(response):
+    headers = {
+        name: value for name, value in response.items()
+        if name.lower() not in ('set-cookie', 'x-page-cache')
+    }
+    return (response.status_code, headers, response.content)
+
+
+def _thaw(payload, state):
+    status, headers, content = payload
+    response = HttpResponse(content, status=status)
+    for name, value in headers.items():
+        response[name] = value
+    response['X-Page-Cache'] = state
+    return response
+
+
+def _cacheable(request):
+    return request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+
+
+def cache_public_page(view):
+    """
+    Serve anonymous GETs of a public view from the cache, keyed on the full path and
+    the content version. Logged-in users always get a fresh render.
+
+    Only one request renders a missing page; the others are given the previous
+    copy (stale) or, if there is none yet, wait briefly for the renderer.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request):
+            return view(request, *args, **kwargs)
+
+        config = get_page_cache_settings()
+        page = _page_key(request)
+        key = f'core:page:{get_page_version()}:{page}'
+        stale_key = f'core:page:stale:{page}'
+        lock_key = f'core:page:lock:{key}'
+
+        payload = cache.get(key)
+        if payload is not None:
+            return _thaw(payload, 'hit')
+
+        if not cache.add(lock_key, 1, config['LOCK_TIMEOUT']):
+            stale = cache.get(stale_key)
+            if stale is not None:
+                return _thaw(stale, 'stale')
+            deadline = time.monotonic() + config['WAIT_SECONDS']
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                payload = cache.get(key)
+                if payload is not None:
+                    return _thaw(payload, 'hit')
+            # The renderer is taking too long; render this one ourselves
+            return view(request, *args, **kwargs)
+
+        try:
+            # The copy is filed under the current version, so it must not come from a lagging replica
+            with use_primary():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+            # Responses that set cookies (messages, CSRF) belong to one visitor
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                payload = _freeze(response)
+                cache.set(key, payload, config['TIMEOUT'])
+                cache.set(stale_key, payload, config['STALE_TIMEOUT'])
+                response['X-Page-Cache'] = 'miss'
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
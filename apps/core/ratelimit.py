@@ -0,0 +1,166 @@
+# apps/core/ratelimit.py
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+DEFAULT_LIMIT = {
+    'ENABLED': True,
+    'BURST': 10,          # bucket size: requests allowed back to back
+    'RATE': 1.0,          # tokens added per second
+    # The per-IP bucket; None means the same as BURST/RATE. Set it much higher wherever
+    # logged-in users share an address (campus NAT, a proxy without X-Forwarded-For).
+    'IP_BURST': None,
+    'IP_RATE': None,
+    'BACKEND': 'memory',  # 'memory' (per process) or 'cache' (shared through CACHES)
+    'CACHE_ALIAS': 'default',
+}
+
+
+class TokenBucket:
+    """Classic token bucket: `burst` tokens, refilled at `rate` tokens per second"""
+
+    def __init__(self, burst, rate):
+        self.burst = burst
+        self.rate = rate
+
+    def consume(self, state, now):
+        """
+        Take one token from `state` = (tokens, last_refill).
+        Returns (allowed, new_state, retry_after_seconds).
+        """
+        if state is None:
+            tokens, last = float(self.burst), now
+        else:
+            tokens, last = state
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+
+        if tokens >= 1:
+            return True, (tokens - 1, now), 0
+        retry_after = (1 - tokens) / self.rate if self.rate else 60
+        return False, (tokens, now), retry_after
+
+
+class MemoryBucketStore:
+    """Buckets in a dict guarded by a lock. Idle buckets are swept once the dict gets large."""
+
+    MAX_KEYS = 50000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._refill_seconds = 0
+
+    def hit(self, key, bucket, now):
+        with self._lock:
+            allowed, state, retry_after = bucket.consume(self._buckets.get(key), now)
+            self._buckets[key] = state
+            self._refill_seconds = max(self._refill_seconds, bucket.burst / bucket.rate if bucket.rate else 3600)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._sweep(now)
+            return allowed, retry_after
+
+    def _sweep(self, now):
+        # A bucket idle long enough to refill completely carries no state. IP and user
+        # buckets refill at different speeds, so wait for the slowest one seen.
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < self._refill_seconds}
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._refill_seconds = 0
+
+
+class CacheBucketStore:
+    """
+    Buckets kept in a Django cache so every worker shares them.
+    The read-modify-write isn't atomic, so a burst split across workers can
+    slip a few extra requests through; good enough for throttling.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def hit(self, key, bucket, now):
+        cache = caches[self.alias]
+        allowed, state, retry_after = bucket.consume(cache.get(key), now)
+        timeout = int(bucket.burst / bucket.rate) + 1 if bucket.rate else 3600
+        cache.set(key, state, timeout)
+        return allowed, retry_after
+
+    def clear(self):
+        pass
+
+
+_memory_store = MemoryBucketStore()
+
+
+def get_limit_config(scope):
+    config = dict(DEFAULT_LIMIT)
+    config.update(getattr(settings, 'RATE_LIMITS', {}).get(scope, {}))
+    return config
+
+
+def get_client_ip(request):
+    if getattr(settings, 'RATE_LIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_rate_limit(request, scope):
+    """
+    Spend one token from the caller's user bucket, if logged in, and then their IP bucket.
+    The IP bucket has its own (larger) limit so users behind one address don't starve each other.
+    Returns (allowed, retry_after_seconds).
+    """
+    config = get_limit_config(scope)
+    if not config['ENABLED']:
+        return True, 0
+
+    user_bucket = TokenBucket(config['BURST'], config['RATE'])
+    ip_bucket = TokenBucket(
+        config['BURST'] if config['IP_BURST'] is None else config['IP_BURST'],
+        config['RATE'] if config['IP_RATE'] is None else config['IP_RATE'],
+    )
+    store = CacheBucketStore(config['CACHE_ALIAS']) if config['BACKEND'] == 'cache' else _memory_store
+    now = time.monotonic() if store is _memory_store else time.time()
+
+    # The user's own bucket goes first, so requests it turns away never spend the
+    # shared IP bucket and one flooder can't lock out everyone behind the same NAT
+    buckets = []
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        buckets.append((f"ratelimit:{scope}:user:{user.pk}", user_bucket))
+    buckets.append((f"ratelimit:{scope}:ip:{get_client_ip(request)}", ip_bucket))
+
+    for key, bucket in buckets:
+        allowed, retry_after = store.hit(key, bucket, now)
+        if not allowed:
+            return False, retry_after
+    return True, 0
+
+
+def rate_limit(scope, methods=('POST',), message="Too many requests. Slow down and try again shortly."):
+    """View decorator that answers 429 once the caller's bucket for `scope` is empty"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                allowed, retry_after = check_rate_limit(request, scope)
+                if not allowed:
+                    response = JsonResponse({'success': False, 'message': message}, status=429)
+                    response['Retry-After'] = str(max(1, round(retry_after)))
+                    return response
+            return view_func(request, *args, **kwargs)
+        return _wrapped
+    return decorator
+
+
+def reset_rate_limits():
+    """Forget all in-process buckets (used by tests and benchmarks)"""
+    _memory_store.clear()
@@ -0,0 +1,238 @@
+# apps/core/roster.py
+import csv
+import re
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.houses.models import House
+from .allocation import recount_house_members
+from .models import Student
+from .user_cache import forget_users
+
+REQUIRED_COLUMNS = ['Name', 'Matric Number', 'Level', 'Department', 'House', 'Registered Date']
+DATE_FORMAT = '%m/%d/%Y, %I:%M:%S %p'
+CHUNK_SIZE = 1000
+
+# Columns an update overwrites. registered_date is left alone: bulk writes run it
+# through auto_now_add, which would stamp every updated student with the import time.
+UPDATE_FIELDS = ['name', 'level', 'department', 'name_key', 'department_key', 'house', 'randomization_complete']
+
+# Checked per row: one over-long value would otherwise fail the chunk's whole bulk insert on Postgres
+FIELD_LIMITS = {
+    field: Student._meta.get_field(field).max_length
+    for field in ('matric_number', 'name', 'level', 'department')
+}
+
+HOUSE_KEYWORDS = ['stark', 'baratheon', 'greyjoy', 'lannister', 'targaryen']
+
+
+class HouseResolver:
+    """
+    Maps the House column to a House with the same rules the importer always used
+    (exact name, then contained name, then family keyword), from one query.
+    """
+
+    def __init__(self):
+        self.houses = list(House.objects.all())
+        self._resolved = {}
+
+    @staticmethod
+    def clean(house_name):
+        return re.sub(r'^House\s+', '', house_name.strip(), flags=re.IGNORECASE).strip()
+
+    def _unique(self, predicate):
+        matches = [house for house in self.houses if predicate(house.name.lower())]
+        return matches[0] if len(matches) == 1 else None
+
+    def resolve(self, house_name):
+        if house_name not in self._resolved:
+            cleaned = self.clean(house_name).lower()
+            house = None
+            if cleaned:
+                house = self._unique(lambda name: name == cleaned) or self._unique(lambda name: cleaned in name)
+            if house is None:
+                for keyword in HOUSE_KEYWORDS:
+                    if keyword in cleaned:
+                        house = self._unique(lambda name: keyword in name)
+                        if house:
+                            break
+            self._resolved[house_name] = house
+        return self._resolved[house_name]
+
+
+def generate_matric_number(name, row_num):
+    """Stable placeholder matric number for rows without one"""
+    base_name = re.sub(r'[^a-zA-Z0-9]', '', name)[:10].upper()
+    return f"TEMP{row_num:04d}_{base_name}"
+
+
+def parse_registered_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, DATE_FORMAT))
+    except ValueError:
+        return timezone.now()
+
+
+class RosterImport:
+    """
+    Set-based student import: the CSV is read in chunks, each chunk is checked
+    against the database with one IN query and written with one bulk insert
+    and one bulk upsert inside its own transaction.
+
+    `log(level, message)` receives per-row messages ('info', 'warning', 'error').
+    `on_chunk(stats)` runs inside each chunk's transaction, after its writes,
+    so a caller can checkpoint progress atomically with the data.
+    """
+
+    def __init__(self, update_existing=False, skip_duplicates=False, dry_run=False,
+                 chunk_size=CHUNK_SIZE, log=None):
+        self.update_existing = update_existing
+        self.skip_duplicates = skip_duplicates
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.log = log or (lambda level, message: None)
+        self.houses = HouseResolver()
+        self.stats = {'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        # Matric numbers created earlier in this run (not in the database yet on a dry run)
+        self._created = set()
+
+    @staticmethod
+    def check_columns(fieldnames):
+        missing = [column for column in REQUIRED_COLUMNS if column not in (fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV must contain columns: {REQUIRED_COLUMNS} (missing {missing})")
+
+    def run(self, csv_file, start_row=0, on_chunk=None, should_stop=None):
+        """
+        Import every data row after the first `start_row` ones. Returns the stats dict.
+        `should_stop()` is checked between chunks; when it returns True the run ends
+        early with `finished` left False so the caller can resume from its checkpoint.
+        """
+        reader = csv.DictReader(csv_file)
+        self.check_columns(reader.fieldnames)
+        self.finished = False
+
+        chunk = []
+        for index, row in enumerate(reader):
+            if index < start_row:
+                continue
+            # +2: the header is line 1 and rows are numbered from the file's point of view
+            chunk.append((index + 2, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk, on_chunk)
+                chunk = []
+                if should_stop and should_stop():
+                    break
+        else:
+            if chunk:
+                self.import_chunk(chunk, on_chunk)
+            self.finished = True
+
+        if not self.dry_run and self.stats['created'] + self.stats['updated']:
+            recount_house_members()
+        return self.stats
+
+    def _error(self, row_num, message):
+        self.stats['errors'] += 1
+        self.log('error', f"Row {row_num}: {message}")
+
+    def _skip(self, row_num, message):
+        self.stats['skipped'] += 1
+        self.log('warning', f"Row {row_num}: {message}")
+
+    def parse(self, chunk):
+        """Validate rows and resolve houses without touching the students table"""
+        parsed = []
+        for row_num, row in chunk:
+            name = (row.get('Name') or '').strip()
+            house_name = (row.get('House') or '').strip()
+            if not name:
+                self._skip(row_num, "Missing name")
+                continue
+            if not house_name:
+                self._skip(row_num, "Missing house")
+                continue
+
+            house = self.houses.resolve(house_name)
+            if house is None:
+                self._error(row_num, f'House "{house_name}" not found')
+                continue
+
+            matric_number = (row.get('Matric Number') or '').strip() or generate_matric_number(name, row_num)
+            values = {
+                'matric_number': matric_number,
+                'name': name,
+                'level': (row.get('Level') or '').strip(),
+                'department': (row.get('Department') or '').strip(),
+            }
+            too_long = [field for field, limit in FIELD_LIMITS.items() if len(values[field]) > limit]
+            if too_long:
+                self._error(row_num, ', '.join(
+                    f"{field} is longer than {FIELD_LIMITS[field]} characters" for field in too_long
+                ))
+                continue
+
+            values['house'] = house
+            values['registered_date'] = parse_registered_date((row.get('Registered Date') or '').strip())
+            parsed.append((row_num, values))
+        return parsed
+
+    def import_chunk(self, chunk, on_chunk=None):
+        self.stats['rows'] += len(chunk)
+        parsed = self.parse(chunk)
+
+        matric_numbers = {values['matric_number'] for _, values in parsed}
+        existing = {
+            student.matric_number: student
+            for student in Student.objects.filter(matric_number__in=matric_numbers)
+        }
+
+        to_create = {}
+        to_update = {}
+        for row_num, values in parsed:
+            matric_number = values['matric_number']
+            already_there = matric_number in existing or matric_number in to_create or matric_number in self._created
+
+            if not already_there:
+                student = Student(role='student', randomization_complete=True, **values)
+                student.set_unusable_password()
+                student.refresh_keys()
+                to_create[matric_number] = student
+                self.log('info', f"Row {row_num}: Created - {values['name']} - {values['house'].name}")
+            elif self.update_existing:
+                student = existing.get(matric_number) or to_create.get(matric_number)
+                if student is None:
+                    # Created in an earlier chunk of a dry run; nothing to write
+                    self.stats['updated'] += 1
+                    continue
+                for field, value in values.items():
+                    setattr(student, field, value)
+                student.randomization_complete = True
+                student.refresh_keys()
+                if student.pk:
+                    to_update[matric_number] = student
+                self.stats['updated'] += 1
+                self.log('info', f"Row {row_num}: Updated - {values['name']} - {values['house'].name}")
+            elif self.skip_duplicates:
+                self._skip(row_num, f"Skipped duplicate - {values['name']}")
+            else:
+                self._error(row_num, f"Student with matric number {matric_number} already exists")
+
+        with transaction.atomic():
+            if not self.dry_run:
+                Student.objects.bulk_create(list(to_create.values()), batch_size=self.chunk_size)
+                # Upsert on matric_number: one statement per batch where bulk_update
+                # would build a CASE expression per row and field
+                Student.objects.bulk_create(
+                    list(to_update.values()), batch_size=self.chunk_size,
+                    update_conflicts=True, unique_fields=['matric_number'], update_fields=UPDATE_FIELDS,
+                )
+                updated_ids = [student.pk for student in to_update.values()]
+                transaction.on_commit(lambda: forget_users(updated_ids))
+
+            self.stats['created'] += len(to_create)
+            self._created.update(to_create)
+            if on_chunk:
+                on_chunk(self.stats)
@@ -0,0 +1,194 @@
+# apps/core/roster_jobs.py
+import csv
+import io
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import RosterImportJob
+from .roster import RosterImport
+
+DEFAULT_SETTINGS = {
+    'CHUNK_SIZE': 500,
+    'LEASE_SECONDS': 60,        # a worker that stops heartbeating loses the job after this
+    'SLICE_SECONDS': 20,        # work done per claim before handing the job back
+    'POLL_SLICE_SECONDS': 5,    # work done by a progress poll when no worker holds the job (0 = never)
+    'MAX_UPLOAD_BYTES': 10 * 1024 * 1024,
+    'MAX_LOGGED_ERRORS': 200,
+}
+
+
+class LeaseLost(Exception):
+    """Another worker took the job over (our lease expired mid-slice)"""
+
+
+def get_job_settings():
+    config = dict(DEFAULT_SETTINGS)
+    config.update(getattr(settings, 'ROSTER_IMPORT', {}))
+    return config
+
+
+def stage_import(upload, user=None, update_existing=False, skip_duplicates=False, dry_run=False):
+    """Validate an uploaded CSV and store it as a pending job. Raises ValueError for unusable files."""
+    config = get_job_settings()
+    if upload.size > config['MAX_UPLOAD_BYTES']:
+        raise ValueError(f"File is larger than {config['MAX_UPLOAD_BYTES'] // (1024 * 1024)} MB.")
+    try:
+        content = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError("File must be a UTF-8 encoded CSV.")
+
+    reader = csv.DictReader(io.StringIO(content, newline=''))
+    RosterImport.check_columns(reader.fieldnames)
+    total_rows = sum(1 for _ in reader)
+
+    return RosterImportJob.objects.create(
+        uploaded_by=user if user and user.is_authenticated else None,
+        file_name=upload.name[:255],
+        content=content,
+        total_rows=total_rows,
+        update_existing=update_existing,
+        skip_duplicates=skip_duplicates,
+        dry_run=dry_run,
+    )
+
+
+def claim_job(job_id, worker):
+    """Take the lease on a job unless a live worker already holds it. Returns the job or None."""
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=get_job_settings()['LEASE_SECONDS'])
+    claimed = RosterImportJob.objects.filter(
+        Q(lease_until__isnull=True) | Q(lease_until__lt=now),
+        pk=job_id, status__in=['pending', 'running'],
+    ).update(status='running', worker=worker, lease_until=lease_until)
+    if not claimed:
+        return None
+
+    job = RosterImportJob.objects.get(pk=job_id)
+    if job.started_at is None:
+        job.started_at = now
+        job.save(update_fields=['started_at'])
+    return job
+
+
+def next_job_id():
+    """Oldest job that is waiting or whose worker went away"""
+    return RosterImportJob.objects.filter(
+        Q(lease_until__isnull=True) | Q(lease_until__lt=timezone.now()),
+        status__in=['pending', 'running'],
+    ).order_by('created_at').values_list('pk', flat=True).first()
+
+
+def run_slice(job, worker, seconds=None):
+    """
+    Import from the job's checkpoint for up to `seconds`, then release the lease.
+
+    Every chunk commits together with the job's new offset and counters, so if
+    the process dies the next claim resumes exactly after the last committed chunk.
+    """
+    config = get_job_settings()
+    seconds = config['SLICE_SECONDS'] if seconds is None else seconds
+    started = time.monotonic()
+    start_offset = job.offset
+    pending_log = []
+    logged = len(job.error_log)
+
+    def log(level, message):
+        if level != 'info':
+            pending_log.append(message)
+
+    # Totals already written to the job row during this slice
+    saved_totals = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+
+    def checkpoint(stats):
+        nonlocal logged
+        new_entries = pending_log[:max(0, config['MAX_LOGGED_ERRORS'] - logged)]
+        pending_log.clear()
+        logged += len(new_entries)
+
+        saved = RosterImportJob.objects.filter(pk=job.pk, worker=worker).update(
+            offset=start_offset + stats['rows'],
+            created_count=F('created_count') + (stats['created'] - saved_totals['created']),
+            updated_count=F('updated_count') + (stats['updated'] - saved_totals['updated']),
+            skipped_count=F('skipped_count') + (stats['skipped'] - saved_totals['skipped']),
+            error_count=F('error_count') + (stats['errors'] - saved_totals['errors']),
+            lease_until=timezone.now() + timedelta(seconds=config['LEASE_SECONDS']),
+        )
+        if not saved:
+            # Raising rolls this chunk back; whoever holds the job now redoes it
+            raise LeaseLost()
+        if new_entries:
+            job.error_log = job.error_log + new_entries
+            RosterImportJob.objects.filter(pk=job.pk).update(error_log=job.error_log)
+        for key in saved_totals:
+            saved_totals[key] = stats[key]
+
+    importer = RosterImport(
+        update_existing=job.update_existing,
+        skip_duplicates=job.skip_duplicates,
+        dry_run=job.dry_run,
+        chunk_size=config['CHUNK_SIZE'],
+        log=log,
+    )
+
+    finished = False
+    failure = ''
+    try:
+        importer.run(
+            io.StringIO(job.content, newline=''), start_row=start_offset, on_chunk=checkpoint,
+            should_stop=lambda: time.monotonic() - started >= seconds,
+        )
+        finished = importer.finished
+    except LeaseLost:
+        return RosterImportJob.objects.get(pk=job.pk)
+    except Exception as e:
+        failure = str(e) or e.__class__.__name__
+
+    fields = {
+        'lease_until': None,
+        'worker': '',
+        'active_seconds': F('active_seconds') + (time.monotonic() - started),
+    }
+    if failure:
+        fields.update(status='failed', message=failure, finished_at=timezone.now())
+    elif finished:
+        fields.update(status='done', finished_at=timezone.now())
+    RosterImportJob.objects.filter(pk=job.pk, worker=worker).update(**fields)
+    return RosterImportJob.objects.get(pk=job.pk)
+
+
+def process_job(job_id, seconds=None):
+    """Claim and advance one job. Returns the refreshed job, or None if someone else has it."""
+    worker = uuid.uuid4().hex
+    job = claim_job(job_id, worker)
+    if job is None:
+        return None
+    return run_slice(job, worker, seconds)
+
+
+def job_progress(job):
+    rate = job.offset / job.active_seconds if job.active_seconds else 0
+    remaining = max(0, job.total_rows - job.offset)
+    return {
+        'id': job.pk,
+        'file_name': job.file_name,
+        'status': job.status,
+        'dry_run': job.dry_run,
+        'total_rows': job.total_rows,
+        'processed_rows': job.offset,
+        'percent': round(100 * job.offset / job.total_rows, 1) if job.total_rows else 100.0,
+        'rows_per_second': round(rate, 1),
+        'eta_seconds': round(remaining / rate) if rate and job.status in ('pending', 'running') else None,
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'skipped': job.skipped_count,
+        'errors': job.error_count,
+        'error_log': job.error_log[-20:],
+        'message': job.message,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
@@ -0,0 +1,74 @@
+# apps/core/signals.py
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.events.models import Event, Score
+from apps.gallery.models import Image
+from apps.houses.models import House
+from .allocation import release_house
+from .fragment_cache import VERSIONED_MODELS, bump_model_version
+from .models import Student
+from .page_cache import bump_page_version
+from .user_cache import forget_users
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def forget_cached_student(sender, instance, **kwargs):
+    # After commit, or a request in between could cache the old row for the full timeout
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_users([user_id]))
+
+
+@receiver(post_delete, sender=Student)
+def release_house_seat(sender, instance, **kwargs):
+    if instance.house_id:
+        release_house(instance.house_id)
+
+
+@receiver(post_save, sender=House)
+@receiver(pre_delete, sender=House)
+def forget_cached_members(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    # pre_delete: members are moved to no house with an update() that sends no signals
+    member_ids = list(instance.students.values_list('pk', flat=True))
+    transaction.on_commit(lambda: forget_users(member_ids))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=House)
+@receiver(post_delete, sender=House)
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def expire_public_pages(sender, instance, **kwargs):
+    # After commit: a render in between would otherwise cache the old page under the new version
+    transaction.on_commit(bump_page_version)
+
+
+@receiver(post_save, sender=Image)
+def expire_pages_for_image(sender, instance, created, **kwargs):
+    # A fresh upload waiting for approval isn't public yet; any other save may be
+    # an approval or a withdrawal
+    if instance.approved or not created:
+        transaction.on_commit(bump_page_version)
+
+
+@receiver(post_delete, sender=Image)
+def expire_pages_for_deleted_image(sender, instance, **kwargs):
+    if instance.approved:
+        transaction.on_commit(bump_page_version)
+
+
+def expire_model_fragments(sender, **kwargs):
+    # After commit: a render in between would otherwise cache the old rows under the new version
+    label = sender._meta.label_lower
+    transaction.on_commit(lambda: bump_model_version(label))
+
+
+for label in VERSIONED_MODELS:
+    post_save.connect(expire_model_fragments, sender=apps.get_model(label), dispatch_uid=f'fragments:save:{label}')
+    post_delete.connect(expire_model_fragments, sender=apps.get_model(label), dispatch_uid=f'fragments:delete:{label}')
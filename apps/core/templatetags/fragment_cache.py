@@ -0,0 +1,51 @@
+# apps/core/templatetags/fragment_cache.py
+from django import template
+
+from apps.core.fragment_cache import VERSIONED_MODELS, cached_fragment
+
+register = template.Library()
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, name, labels, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.labels = labels
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [variable.resolve(context) for variable in self.vary_on]
+        return cached_fragment(self.name, self.labels, vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def versioned_cache(parser, token):
+    """
+    Cache a block until one of the listed models changes, shared by everyone
+    who renders it with the same `on` values:
+
+        {% versioned_cache standings events.score houses.house on user.house_id %}
+            ...
+        {% endversioned_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' needs a fragment name and at least one model label")
+
+    tag_name, name, rest = bits[0], bits[1], bits[2:]
+    if 'on' in rest:
+        split = rest.index('on')
+        labels, vary_on = rest[:split], rest[split + 1:]
+    else:
+        labels, vary_on = rest, []
+
+    labels = [label.lower() for label in labels]
+    unknown = [label for label in labels if label not in VERSIONED_MODELS]
+    if not labels or unknown:
+        raise template.TemplateSyntaxError(
+            f"'{tag_name}' models must be listed in VERSIONED_MODELS (got {unknown or 'none'})"
+        )
+
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    return VersionedCacheNode(nodelist, name, labels, [parser.compile_filter(bit) for bit in vary_on])
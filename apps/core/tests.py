@@ -1,3 +1,707 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.events.models import Event, Score
+from apps.gallery.models import Image
+from apps.houses.models import House, HouseCounter
+from . import db_pool, db_routing, page_cache
+from .fragment_cache import cached_fragment, fragment_stats
+from .allocation import allocate_house, recount_house_members
+from .cohort import randomize_cohort, unassigned_students
+from .backends import HouseAuthenticationBackend
+from .forms import StudentLoginForm
+from .house_assignment import HouseRandomizer
+from .models import RosterImportJob, Student
+from .roster_jobs import claim_job, job_progress, process_job, run_slice
+from .user_cache import user_cache_key
+
+
+class StudentLookupKeyTests(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="House Stark of Winterfell")
+        self.student = Student.objects.create(
+            matric_number="BU24CSC1001", name="Arya  Stark", level="100",
+            department="Computer Science", house=self.house, randomization_complete=True,
+        )
+
+    def test_keys_follow_name_and_department(self):
+        self.assertEqual((self.student.name_key, self.student.department_key), ("arya stark", "computer science"))
+
+        self.student.name = "Arya Underfoot"
+        self.student.save(update_fields=['name'])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.name_key, "arya underfoot")
+
+    def test_login_by_name_ignores_case_and_spacing(self):
+        form = StudentLoginForm(data={'matric_number': "  arya STARK ", 'house': self.house.pk})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.get_user(), self.student)
+
+    def test_existing_assignment_uses_keys(self):
+        found = HouseRandomizer.check_existing_assignment("ARYA STARK", "100", "computer science")
+        self.assertEqual(found, self.student)
+        self.assertIsNone(HouseRandomizer.check_existing_assignment("Arya Stark", "200", "Computer Science"))
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="House Greyjoy of Pyke")
+        self.student = Student.objects.create(matric_number="BU24CSC2002", name="Theon", house=self.house)
+        self.backend = HouseAuthenticationBackend()
+
+    def test_repeat_loads_skip_the_database(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(self.student.pk).house.name, "House Greyjoy of Pyke")
+
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.student.pk)
+            self.assertEqual((user.pk, user.name, user.house.pk), (self.student.pk, "Theon", self.house.pk))
+            self.assertTrue(user.is_authenticated)
+
+    def test_saves_invalidate_the_snapshot(self):
+        self.backend.get_user(self.student.pk)
+
+        self.house.name = "House Greyjoy of the Iron Islands"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.house.save()
+        self.assertEqual(self.backend.get_user(self.student.pk).house.name, "House Greyjoy of the Iron Islands")
+
+        self.student.house = None
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+            # Dropped only once the save commits, so nothing in between recaches the old row
+            self.assertEqual(self.backend.get_user(self.student.pk).house, self.house)
+        self.assertIsNone(self.backend.get_user(self.student.pk).house)
+
+    def test_password_hash_is_not_cached(self):
+        self.student.set_password("kraken")
+        self.student.save()
+        self.backend.get_user(self.student.pk)
+
+        snapshot = cache.get(user_cache_key(self.student.pk))
+        self.assertNotIn(self.student.password, snapshot['student'])
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.student.pk)
+            self.assertEqual(user.get_session_auth_hash(), self.student.get_session_auth_hash())
+        # Anything that really needs the hash loads it
+        self.assertTrue(user.check_password("kraken"))
+
+    def test_authenticated_request_skips_user_queries(self):
+        self.client.force_login(self.student, backend='apps.core.backends.HouseAuthenticationBackend')
+        self.client.get('/')
+
+        with CaptureQueriesContext(connection) as queries:
+            request = self.client.get('/').wsgi_request
+            self.assertEqual(request.user.house, self.house)
+        self.assertFalse([q['sql'] for q in queries if 'FROM "core_student" WHERE "core_student"."id"' in q['sql']])
+
+
+class HouseAllocatorTests(TestCase):
+    def setUp(self):
+        self.houses = [House.objects.create(name=f"House {i}") for i in range(3)]
+
+    def test_fills_the_emptiest_house(self):
+        Student.objects.create(matric_number="BU1", name="A", house=self.houses[0])
+        Student.objects.create(matric_number="BU2", name="B", house=self.houses[1])
+        recount_house_members()
+
+        self.assertEqual(allocate_house(), self.houses[2])
+        self.assertEqual(HouseCounter.objects.get(house=self.houses[2]).members, 1)
+
+    def test_new_houses_get_counters(self):
+        HouseCounter.objects.all().delete()
+        allocate_house()
+        self.assertEqual(sorted(HouseCounter.objects.values_list('members', flat=True)), [0, 0, 1])
+
+    def test_failed_save_gives_the_seat_back(self):
+        recount_house_members()
+        student = Student.objects.create(matric_number="BU3", name="C")
+        with mock.patch.object(Student, 'save', side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                HouseRandomizer.assign_house(student)
+        self.assertEqual(list(HouseCounter.objects.values_list('members', flat=True)), [0, 0, 0])
+
+
+class RandomizationViewTests(TestCase):
+    def setUp(self):
+        self.houses = [House.objects.create(name=f"House {i}") for i in range(2)]
+
+    def post(self, matric_number):
+        return self.client.post(reverse('core:randomization'), {
+            'name': 'sansa stark', 'level': '200', 'department': 'Law', 'matric_number': matric_number,
+        })
+
+    def test_new_student_is_written_once_without_hashing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('bu24law0001')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "core_student"')]), 1)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "core_student"')])
+
+        student = Student.objects.get(matric_number='BU24LAW0001')
+        self.assertEqual((student.name, student.name_key), ('Sansa Stark', 'sansa stark'))
+        self.assertTrue(student.randomization_complete)
+        self.assertIn(student.house, self.houses)
+        self.assertFalse(student.has_usable_password())
+
+    def test_existing_unrandomized_student_is_updated_in_place(self):
+        Student.objects.create(matric_number='BU24LAW0002', name='S. Stark', house=self.houses[0])
+        recount_house_members()
+
+        self.post('BU24LAW0002')
+        student = Student.objects.get(matric_number='BU24LAW0002')
+        self.assertEqual((student.name, student.randomization_complete), ('Sansa Stark', True))
+        self.assertEqual(sum(HouseCounter.objects.values_list('members', flat=True)), 1)
+
+    def test_rerandomizing_keeps_houses_balanced(self):
+        Student.objects.create(matric_number='BU24LAW0003', name='S. Stark', house=self.houses[0])
+        Student.objects.create(matric_number='BU24LAW0004', name='A. Stark', house=self.houses[1])
+        recount_house_members()
+
+        for _ in range(10):
+            self.post('BU24LAW0003')
+            self.assertEqual(Student.objects.get(matric_number='BU24LAW0003').house, self.houses[0])
+        self.assertEqual(list(HouseCounter.objects.order_by('house').values_list('members', flat=True)), [1, 1])
+
+
+class CohortRandomizationTests(TestCase):
+    def setUp(self):
+        self.houses = [House.objects.create(name=f"House {i}") for i in range(5)]
+        departments = ["Law", "Medicine", "Computer Science", "Nursing"]
+        students = []
+        for i in range(2000):
+            student = Student(matric_number=f"CO{i:05d}", name=f"Student {i}",
+                              department=departments[i % 4], level=str(100 * (1 + i % 3)))
+            student.refresh_keys()
+            students.append(student)
+        Student.objects.bulk_create(students)
+
+    def test_cohort_is_balanced_overall_and_per_stratum(self):
+        report = randomize_cohort(unassigned_students())
+
+        self.assertEqual(report['students'], 2000)
+        self.assertEqual([row['after'] for row in report['houses'].values()], [400] * 5)
+        self.assertEqual(len(report['strata']), 12)
+        self.assertTrue(all(stratum['spread'] <= 1 for stratum in report['strata']))
+
+        self.assertFalse(Student.objects.filter(randomization_complete=False).exists())
+        self.assertEqual(list(HouseCounter.objects.values_list('members', flat=True)), [400] * 5)
+        for level in ('100', '200', '300'):
+            sizes = [house.students.filter(level=level, department='Law').count() for house in self.houses]
+            self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_students_assigned_meanwhile_keep_their_house(self):
+        students = list(unassigned_students(level='100'))
+        # One of them registers through the web after the cohort was selected
+        house = HouseRandomizer.assign_house(Student.objects.get(pk=students[0].pk))
+
+        report = randomize_cohort(students)
+        self.assertEqual((report['students'], report['skipped']), (666, 1))
+        self.assertEqual(Student.objects.get(pk=students[0].pk).house, house)
+        self.assertEqual(sum(HouseCounter.objects.values_list('members', flat=True)), 667)
+
+    def test_dry_run_saves_nothing(self):
+        report = randomize_cohort(unassigned_students(level='100'), dry_run=True)
+        self.assertEqual(report['students'], 667)
+        self.assertFalse(Student.objects.filter(randomization_complete=True).exists())
+
+    def test_endpoint_takes_a_csv_of_matric_numbers(self):
+        admin = Student.objects.create(matric_number="ADMIN1", name="Admin", role='admin', is_staff=True)
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile("cohort.csv", b"Matric_Number,name\nco00001,A\nCO00002,B\nNOPE,C\n")
+
+        response = self.client.post(reverse('admin_dashboard:randomize_cohort'), {'file': upload})
+        report = response.json()['report']
+        self.assertEqual((report['students'], report['not_found']), (2, ['NOPE']))
+        self.assertEqual(Student.objects.filter(randomization_complete=True, role='student').count(), 2)
+
+
+class ImportStudentsTests(TestCase):
+    HEADER = "Name,Matric Number,Level,Department,House,Registered Date\n"
+
+    def setUp(self):
+        self.lannister = House.objects.create(name="House Lannister of Casterly Rock")
+        self.greyjoy = House.objects.create(name="House Greyjoy of Pyke")
+
+    def import_csv(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write(self.HEADER + ''.join(rows))
+        self.addCleanup(os.remove, csv_file.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_students', csv_file.name, '--quiet', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_large_file_is_imported_in_chunks(self):
+        rows = [
+            f"Student {i},BU25CSC{i:05d},100,Computer Science,House {'Lannister' if i % 2 else 'Greyjoy'},"
+            f"\"11/18/2025, 10:26:52 PM\"\n"
+            for i in range(10000)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            out, err = self.import_csv(rows, '--chunk-size', '2000')
+
+        self.assertIn("Successful creations: 10000", out)
+        self.assertEqual(Student.objects.filter(house=self.lannister, randomization_complete=True).count(), 5000)
+        self.assertEqual(Student.objects.get(matric_number="BU25CSC00007").name_key, "student 7")
+        self.assertEqual(HouseCounter.objects.get(house=self.greyjoy).members, 5000)
+        # One existence check per chunk; inserts are batched (SQLite caps the rows per statement)
+        lookups = [q for q in queries if q['sql'].startswith('SELECT "core_student"')]
+        self.assertEqual(len(lookups), 5)
+        self.assertLess(len(queries), 250)
+
+    def test_duplicates_updates_and_bad_rows_are_counted(self):
+        Student.objects.create(matric_number="BU1", name="Old Name", house=self.greyjoy)
+        rows = [
+            'Tyrion,BU1,200,Law,House Lannister,"11/18/2025, 10:26:52 PM"\n',
+            'Jaime,BU2,200,Law,Lannister,bad date\n',
+            'Jaime Again,BU2,200,Law,Lannister,bad date\n',
+            'Nobody,BU3,200,Law,House Bolton,bad date\n',
+            ',BU4,200,Law,House Greyjoy,bad date\n',
+        ]
+
+        out, err = self.import_csv(rows, '--dry-run', '--update')
+        self.assertIn("Successful creations: 1", out)
+        self.assertIn("Successful updates: 2", out)
+        self.assertEqual(Student.objects.count(), 1)
+
+        out, err = self.import_csv(rows, '--update')
+        self.assertIn("Successful updates: 2", out)
+        self.assertIn("Errors: 1", out)
+        self.assertIn("Skipped: 1", out)
+        tyrion = Student.objects.get(matric_number="BU1")
+        self.assertEqual((tyrion.name, tyrion.house, tyrion.department_key), ("Tyrion", self.lannister, "law"))
+        self.assertEqual(Student.objects.get(matric_number="BU2").name, "Jaime Again")
+
+        out, err = self.import_csv(rows)
+        self.assertIn("Errors: 4", out)
+        self.assertIn("BU2 already exists", err)
+
+    def test_over_long_values_fail_only_their_row(self):
+        rows = [
+            f'{"Cersei" * 20},BU10,200,Law,House Lannister,bad date\n',
+            'Jaime,BU11,200 Level Honours,Law,House Lannister,bad date\n',
+            'Tommen,BU12,100,Law,House Lannister,bad date\n',
+        ]
+        out, err = self.import_csv(rows)
+        self.assertIn("Successful creations: 1", out)
+        self.assertIn("Errors: 2", out)
+        self.assertIn("Row 2: name is longer than 100 characters", err)
+        self.assertIn("Row 3: level is longer than 10 characters", err)
+        self.assertEqual(list(Student.objects.values_list('matric_number', flat=True)), ["BU12"])
+
+
+@override_settings(ROSTER_IMPORT={'CHUNK_SIZE': 100, 'POLL_SLICE_SECONDS': 0})
+class RosterImportJobTests(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="House Targaryen of Dragonstone")
+        self.admin = Student.objects.create(matric_number="ADMIN1", name="Admin", role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def upload(self, rows=450):
+        content = ImportStudentsTests.HEADER + ''.join(
+            f"Student {i},BU{i:05d},100,History,Targaryen,\n" for i in range(rows)
+        ) + "No House,BU99999,100,History,House Bolton,\n"
+        return self.client.post(
+            reverse('admin_dashboard:roster_import'),
+            {'file': SimpleUploadedFile("roster.csv", content.encode())},
+            HTTP_ACCEPT='application/json',
+        )
+
+    def test_upload_stages_without_importing(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['job']['total_rows'], 451)
+        self.assertEqual(Student.objects.filter(role='student').count(), 0)
+        self.assertContains(self.client.get(reverse('admin_dashboard:roster_import')), 'roster.csv')
+
+    def test_bad_header_is_rejected(self):
+        response = self.client.post(
+            reverse('admin_dashboard:roster_import'),
+            {'file': SimpleUploadedFile("roster.csv", b"name,matric\nA,B\n")}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RosterImportJob.objects.exists())
+
+    def test_crashed_worker_is_resumed_from_checkpoint(self):
+        job_id = self.upload().json()['job']['id']
+
+        # A worker that stops after two chunks and then dies holding the lease
+        job = claim_job(job_id, 'worker-a')
+        with mock.patch('apps.core.roster_jobs.time.monotonic', side_effect=[0] + [0, 100] * 10):
+            run_slice(job, 'worker-a', seconds=50)
+        RosterImportJob.objects.filter(pk=job_id).update(worker='worker-a', lease_until=timezone.now())
+        self.assertEqual(RosterImportJob.objects.get(pk=job_id).offset, 200)
+        self.assertEqual(Student.objects.filter(role='student').count(), 200)
+
+        job = process_job(job_id)
+        self.assertEqual(job.status, 'done')
+        progress = job_progress(job)
+        self.assertEqual((progress['processed_rows'], progress['created'], progress['errors']), (451, 450, 1))
+        self.assertEqual(Student.objects.filter(role='student').count(), 450)
+        self.assertIn('House Bolton', progress['error_log'][0])
+
+    def test_live_lease_blocks_a_second_worker(self):
+        job_id = self.upload().json()['job']['id']
+        self.assertIsNotNone(claim_job(job_id, 'worker-a'))
+        self.assertIsNone(process_job(job_id))
+
+    def test_polling_advances_the_job_without_a_worker(self):
+        job_id = self.upload().json()['job']['id']
+        with self.settings(ROSTER_IMPORT={'CHUNK_SIZE': 100, 'POLL_SLICE_SECONDS': 30}):
+            progress = self.client.get(reverse('admin_dashboard:roster_import_progress', args=[job_id])).json()
+        self.assertEqual((progress['status'], progress['processed_rows']), ('done', 451))
+
+
+class CSVExportTests(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="House Baratheon of Storm's End")
+        self.admin = Student.objects.create(matric_number="ADMIN1", name="Admin", role='admin', is_staff=True)
+        for i in range(3):
+            Student.objects.create(matric_number=f"BU{i}", name=f"Student, {i}", house=self.house,
+                                   randomization_complete=True, randomized_at=timezone.now())
+        self.client.force_login(self.admin)
+
+    def test_students_export_streams_rows(self):
+        response = self.client.get(reverse('core:export_students'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Matric Number,Name,Level,Department,House,Randomized At')
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith('BU0,"Student, 0",,,House Baratheon of Storm\'s End,'))
+
+    def test_every_export_streams_with_one_query(self):
+        for name in ('students', 'scores', 'scans', 'gallery'):
+            response = self.client.get(reverse('core:export_csv', args=[name]))
+            self.assertTrue(response.streaming)
+            with self.assertNumQueries(1):
+                content = b''.join(response.streaming_content)
+            self.assertTrue(content)
+
+    def test_non_admins_are_turned_away(self):
+        self.client.force_login(Student.objects.get(matric_number="BU0"))
+        response = self.client.get(reverse('core:export_csv', args=['scans']))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('core:export_csv', args=['secrets'])).status_code, 404)
+
+
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="House Stark of Winterfell")
+        self.event = Event.objects.create(
+            title="Opening Ceremony", description="", day=timezone.localdate(), time='10:00', type='major'
+        )
+
+    def test_anonymous_home_is_served_from_cache(self):
+        first = self.client.get(reverse('home'))
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('home'))
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+
+    def test_content_changes_expire_pages(self):
+        url = reverse('home')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(title="Trivia Night", description="", day=timezone.localdate(), time='18:00',
+                                 type='trivia')
+            # Pages only expire once the write commits
+            self.assertEqual(self.client.get(url)['X-Page-Cache'], 'hit')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, "Trivia Night")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.create(event=self.event, house=self.house, points=5)
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+
+    def test_pending_uploads_leave_pages_cached(self):
+        student = Student.objects.create(matric_number="ST1", name="Arya", house=self.house)
+        version = page_cache.get_page_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = Image.objects.create(file='gallery/a.jpg', uploader=student)
+        self.assertEqual(page_cache.get_page_version(), version)
+        image.approved = True
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        self.assertNotEqual(page_cache.get_page_version(), version)
+
+    def test_logged_in_users_render_fresh(self):
+        self.client.get(reverse('home'))
+        self.client.force_login(Student.objects.create(matric_number="ST2", name="Bran", house=self.house))
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_concurrent_miss_gets_stale_copy(self):
+        url = reverse('home')
+        self.client.get(url)
+        page_cache.bump_page_version()
+        # Another request is already rendering the new version
+        key = f"core:page:{page_cache.get_page_version()}:{page_cache._page_key(RequestFactory().get(url))}"
+        cache.add(f'core:page:lock:{key}', 1)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="House Tully of Riverrun", crest='house_crests/trout.png')
+        self.other = House.objects.create(name="House Arryn of the Eyrie", crest='house_crests/falcon.png')
+        self.event = Event.objects.create(
+            title="Archery", description="", day=timezone.localdate(), time='10:00', type='major'
+        )
+        Score.objects.create(event=self.event, house=self.house, points=12)
+        self.students = [
+            Student.objects.create(matric_number=f"RR{i}", name=f"Riverlander {i}", house=self.house) for i in range(2)
+        ]
+
+    def render(self, source, **context):
+        return Template('{% load fragment_cache %}' + source).render(Context(context))
+
+    def test_block_is_reused_until_its_model_changes(self):
+        source = '{% versioned_cache names houses.house %}{{ names }}{% endversioned_cache %}'
+        self.assertEqual(self.render(source, names='first'), 'first')
+        self.assertEqual(self.render(source, names='second'), 'first')
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(title="Joust", description="", day=timezone.localdate(), time='12:00', type='minor')
+        self.assertEqual(self.render(source, names='third'), 'first')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.house.save()
+            # Nothing expires until the write commits, so a render in between can't cache old rows as new
+            self.assertEqual(self.render(source, names='uncommitted'), 'first')
+        self.assertEqual(self.render(source, names='fourth'), 'fourth')
+
+    def test_vary_on_values_get_their_own_copy(self):
+        source = '{% versioned_cache greeting houses.house on house_id %}{{ name }}{% endversioned_cache %}'
+        self.assertEqual(self.render(source, house_id=1, name='one'), 'one')
+        self.assertEqual(self.render(source, house_id=2, name='two'), 'two')
+        self.assertEqual(self.render(source, house_id=1, name='three'), 'one')
+
+    def test_gallery_house_filter_is_cached_per_known_house(self):
+        self.client.force_login(self.students[0])
+        url = reverse('gallery:home')
+        for query in ({}, {'house': 'stark'}, {'house': '999'}, {'house': ''}):
+            self.assertEqual(self.client.get(url, query).context['house_filter_key'], 'all')
+        response = self.client.get(url, {'house': str(self.house.pk)})
+        self.assertEqual(response.context['house_filter_key'], self.house.pk)
+
+        # Unknown values share the "all" copy instead of each caching their own
+        stats = fragment_stats()['gallery_house_filter']
+        self.assertEqual((stats['hits'], stats['misses']), (3, 2))
+
+    def test_unknown_models_are_rejected(self):
+        with self.assertRaises(TemplateSyntaxError):
+            self.render('{% versioned_cache x core.student %}{% endversioned_cache %}')
+
+    def test_leaderboard_standings_are_shared_across_users(self):
+        url = reverse('events:leaderboard')
+        self.client.force_login(self.students[0])
+        self.client.get(url)
+        self.client.force_login(self.students[1])
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+        self.assertContains(response, "House Tully of Riverrun")
+        self.assertLess(len(warm), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.create(event=self.event, house=self.other, points=40)
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        self.assertGreater(len(cold), len(warm))
+
+        stats = fragment_stats()['leaderboard_standings']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['hit_rate'], 33.3)
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = db_routing.ReplicaRouter()
+        patcher = mock.patch.object(db_routing, 'replica_alias', return_value='replica')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        @db_routing.use_replica
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Event))
+        self.view = view
+
+    def test_reads_use_the_primary_outside_replica_views(self):
+        self.assertEqual(self.router.db_for_read(Event), 'default')
+
+    def test_replica_views_read_from_the_replica(self):
+        self.assertEqual(self.view(self.factory.get('/')).content, b'replica')
+        self.assertEqual(self.router.db_for_read(Event), 'default')
+
+    def test_writes_always_go_to_the_primary(self):
+        event = Event(title="Quiz", day=timezone.localdate(), time='10:00', type='trivia')
+        event._state.db = 'replica'
+        self.assertEqual(self.router.db_for_write(Event, instance=event), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'events'))
+
+    def test_unsafe_methods_stay_on_the_primary(self):
+        self.assertEqual(self.view(self.factory.post('/')).content, b'default')
+
+    def test_recent_writers_read_their_writes_from_the_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES['db_pin'] = str(time.time() + 5)
+        self.assertEqual(self.view(request).content, b'default')
+
+        request.COOKIES['db_pin'] = str(time.time() - 1)
+        self.assertEqual(self.view(request).content, b'replica')
+
+    def test_middleware_pins_clients_after_writes(self):
+        middleware = db_routing.ReplicaPinMiddleware(lambda request: HttpResponse())
+        self.assertIn('db_pin', middleware(self.factory.post('/')).cookies)
+        self.assertNotIn('db_pin', middleware(self.factory.get('/')).cookies)
+
+    def test_async_views_read_from_the_replica(self):
+        @db_routing.use_replica
+        async def view(request):
+            alias = await sync_to_async(self.router.db_for_read)(Event)
+            return HttpResponse(alias)
+        response = async_to_sync(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+
+    def test_cache_fills_read_from_the_primary(self):
+        router = self.router
+
+        @db_routing.use_replica
+        def view(request):
+            inside = db_routing.use_primary()(lambda: router.db_for_read(Event))()
+            fragment = cached_fragment('replica_test', ['events.event'], [], lambda: router.db_for_read(Event))
+            return HttpResponse(f'{inside} {fragment} {router.db_for_read(Event)}')
+
+        cache.clear()
+        self.assertEqual(view(self.factory.get('/')).content, b'default default replica')
+
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        response = page_cache.cache_public_page(view)(request)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertEqual(response.content, b'default default default')
+
+    def test_no_replica_configured_reads_from_the_primary(self):
+        with mock.patch.object(db_routing, 'replica_alias', return_value=None):
+            self.assertEqual(self.view(self.factory.get('/')).content, b'default')
+
+
+class DatabasePoolStatsTests(TestCase):
+    RAW = {
+        'pool_min': 2, 'pool_max': 10, 'pool_size': 4, 'pool_available': 1, 'requests_waiting': 0,
+        'requests_num': 40, 'requests_queued': 8, 'requests_wait_ms': 200, 'requests_errors': 1,
+        'connections_num': 4, 'connections_ms': 60, 'connections_errors': 0,
+        'connections_lost': 1, 'returns_bad': 1,
+    }
+
+    def test_unpooled_databases_are_reported(self):
+        stats = db_pool.pool_stats()['default']
+        self.assertFalse(stats['pooled'])
+        self.assertEqual(stats['vendor'], connection.vendor)
+
+    def test_pool_counters_are_summarised(self):
+        pool = mock.Mock(**{'get_stats.return_value': self.RAW, 'pop_stats.return_value': self.RAW})
+        with mock.patch.object(db_pool, '_pool', return_value=pool):
+            stats = db_pool.pool_stats()['default']
+            db_pool.pool_stats(reset=True)
+
+        self.assertEqual((stats['size'], stats['max_size'], stats['available']), (4, 10, 1))
+        self.assertEqual((stats['checkouts'], stats['queued'], stats['timeouts']), (40, 8, 1))
+        self.assertEqual(stats['avg_wait_ms'], 5.0)
+        self.assertEqual(stats['avg_connect_ms'], 15.0)
+        self.assertEqual(stats['connections_lost'], 2)
+        pool.pop_stats.assert_called_once_with()
+
+    def test_admin_endpoint_and_command(self):
+        self.client.force_login(Student.objects.create(matric_number="ADMIN1", name="Admin", role='admin', is_staff=True))
+        response = self.client.get(reverse('admin_dashboard:db_pool_stats'))
+        self.assertFalse(response.json()['databases']['default']['pooled'])
+
+        out = io.StringIO()
+        call_command('db_pool_stats', stdout=out)
+        self.assertIn('default: not pooled', out.getvalue())
+
+
+class LookupKeyMigrationTests(TransactionTestCase):
+    before = [('core', '0005_alter_student_matric_number_and_more')]
+    after = [('core', '0006_student_lookup_keys')]
+
+    def tearDown(self):
+        # Leave the schema fully migrated for the tests that follow
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_students_get_lookup_keys(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        OldStudent = executor.loader.project_state(self.before).apps.get_model('core', 'Student')
+        OldStudent.objects.create(matric_number="OLD1", name="  Jon   SNOW ", department="Night's  Watch")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        NewStudent = executor.loader.project_state(self.after).apps.get_model('core', 'Student')
+        student = NewStudent.objects.get(matric_number="OLD1")
+        self.assertEqual((student.name_key, student.department_key), ("jon snow", "night's watch"))
+
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    def test_parallel_registrations_stay_balanced(self):
+        houses = [House.objects.create(name=f"House {i}") for i in range(5)]
+        students = [Student.objects.create(matric_number=f"BU{i}", name=f"Student {i}") for i in range(48)]
+        barrier = threading.Barrier(len(students))
+        errors = []
+
+        def register(student):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        with transaction.atomic():
+                            HouseRandomizer.assign_house(student)
+                        break
+                    except OperationalError:
+                        # SQLite serialises writers with "database is locked"
+                        if attempt == 49:
+                            raise
+                        time.sleep(0.005 * (attempt + 1))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(student,)) for student in students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        sizes = [house.students.count() for house in houses]
+        self.assertEqual(sum(sizes), 48)
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+        self.assertEqual(sorted(HouseCounter.objects.values_list('members', flat=True)), sorted(sizes))
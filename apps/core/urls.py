@@ -10,6 +10,7 @@ urlpatterns = [
     path('randomization/', HouseRandomizationView.as_view(), name='randomization'),
     path('randomization/stats/', RandomizationStatsView.as_view(), name='randomization_stats'),
     path('randomization/export/', ExportStudentsCSVView.as_view(), name='export_students'),
+    path('exports/<slug:name>/', ExportCSVView.as_view(), name='export_csv'),
     path('houses/join/<str:house_code>/', join_house_whatsapp, name='join_whatsapp'),
 
 ]
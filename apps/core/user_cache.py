@@ -0,0 +1,59 @@
+# apps/core/user_cache.py
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.houses.models import House
+from .models import Student
+
+USER_CACHE_TIMEOUT = 60 * 30
+
+# The password hash stays out of the cache; sessions are checked against an HMAC of it instead
+STUDENT_FIELDS = [field.attname for field in Student._meta.concrete_fields if field.attname != 'password']
+HOUSE_FIELDS = [field.attname for field in House._meta.concrete_fields]
+
+
+def user_cache_key(user_id):
+    return f"core:user:v2:{user_id}"
+
+
+def _snapshot(student):
+    """Plain values for the student and their house, cheap to pickle into the cache"""
+    house = student.house
+    return {
+        'student': [getattr(student, name) for name in STUDENT_FIELDS],
+        'house': [getattr(house, name) for name in HOUSE_FIELDS] if house else None,
+        'session_hash': student.get_session_auth_hash(),
+    }
+
+
+def _restore(snapshot):
+    # password is left deferred: reading it loads it, and save() only writes the loaded fields
+    student = Student.from_db(DEFAULT_DB_ALIAS, STUDENT_FIELDS, snapshot['student'])
+    session_hash = snapshot['session_hash']
+    student.get_session_auth_hash = lambda: session_hash
+    house = House.from_db(DEFAULT_DB_ALIAS, HOUSE_FIELDS, snapshot['house']) if snapshot['house'] else None
+    # Prime the relation so request.user.house doesn't go back to the database
+    Student._meta.get_field('house').set_cached_value(student, house)
+    return student
+
+
+def load_user(user_id):
+    """
+    The student for a session, with their house attached.
+    Served from the cache after the first request; signals drop the entry when
+    the student or their house changes (see apps/core/signals.py).
+    """
+    key = user_cache_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        student = Student.objects.select_related('house').filter(pk=user_id).first()
+        if student is None:
+            return None
+        cache.set(key, _snapshot(student), USER_CACHE_TIMEOUT)
+        return student
+    return _restore(snapshot)
+
+
+def forget_users(user_ids):
+    """Drop cached snapshots. queryset.update() skips signals, so call this after bulk edits."""
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
@@ -1,4 +1,3 @@
-import csv
 from django.conf import settings
 from django.db.backends.utils import logger
 from django.shortcuts import redirect
@@ -20,7 +19,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
 from django.views.generic import CreateView, FormView
 from .forms import StudentLoginForm, StudentRegistrationForm, HouseRandomizationForm
+from .exports import EXPORTS, csv_export_response
 from .house_assignment import HouseRandomizer
+from .page_cache import cache_public_page
 from .models import Student
 
 
@@ -154,6 +155,7 @@ def safe_queryset(model, filter_kwargs=None, order_fields=None, limit=4):
     return qs[:limit]
 
 
+@method_decorator(cache_public_page, name='dispatch')
 class HomeView(TemplateView):
     template_name = "home.html"
 
@@ -235,42 +237,11 @@ class HouseRandomizationView(TemplateView):
         if not matric_number:
             matric_number = HouseRandomizer.generate_matric_number()
 
-        # Create or update student (without assigning house yet)
-        student, created = Student.objects.get_or_create(
-            matric_number=matric_number,
-            defaults={
-                'name': name,
-                'level': level,
-                'department': department,
-                'role': 'student',
-                'randomization_complete': False
-            }
-        )
-        if not created:
-            # update details if it already existed
-            student.name = name
-            student.level = level
-            student.department = department
-            student.randomization_complete = False
-            student.save()
-
-        # Optional: set a default password if newly created (be mindful of security)
-        if created:
-            default_password = matric_number
-            student.set_password(default_password)
-            student.save()
-
-        # Assign house — use a transaction and update student properly
+        # One transaction: allocate a seat, then a single insert or update of the student
         try:
-            with transaction.atomic():
-                house = HouseRandomizer.assign_house(student)  # should return a House instance
-                # mark as completed and save
-                student.house = house
-                student.randomization_complete = True
-                student.save()
-        except Exception as e:
-            # Log or surface the error — don't let a crash create a confusing UX
-            # import logging; logger.exception(...)
+            student, house = HouseRandomizer.register_student(name, level, department, matric_number)
+        except Exception:
+            logger.exception("House randomization failed for %s", matric_number)
             messages.error(request, "Could not assign a house right now. Try again or contact admin.")
             context = self.get_context_data()
             context['form'] = form
@@ -320,28 +291,20 @@ class ExportStudentsCSVView(View):
             messages.error(request, "Admin access required")
             return redirect('core:login')
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="student_house_assignments.csv"'
+        return csv_export_response('students')
 
-        writer = csv.writer(response)
-        writer.writerow(['Matric Number', 'Name', 'Level', 'Department', 'House', 'Randomized At'])
 
-        students = Student.objects.filter(
-            role='student',
-            randomization_complete=True
-        ).select_related('house').order_by('house__name', 'matric_number')
+class ExportCSVView(View):
+    """Streaming CSV export of students, scores, scans or gallery metadata"""
 
-        for student in students:
-            writer.writerow([
-                student.matric_number,
-                student.name,
-                student.level,
-                student.department,
-                student.house.name if student.house else 'Not Assigned',
-                student.randomized_at.strftime('%Y-%m-%d %H:%M') if student.randomized_at else ''
-            ])
+    def get(self, request, name):
+        if not request.user.is_authenticated or request.user.role != 'admin':
+            messages.error(request, "Admin access required")
+            return redirect('core:login')
 
-        return response
+        if name not in EXPORTS:
+            raise Http404("Unknown export")
+        return csv_export_response(name)
 
 
 @require_GET
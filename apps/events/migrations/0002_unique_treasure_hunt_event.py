@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def merge_treasure_hunt_events(apps, schema_editor):
+    """Fold duplicate Treasure Hunt events (from racing first scans) into the oldest one"""
+    Event = apps.get_model('events', 'Event')
+    Score = apps.get_model('events', 'Score')
+
+    events = list(Event.objects.filter(title="Treasure Hunt").order_by('pk').values_list('pk', flat=True))
+    if len(events) < 2:
+        return
+    keep, extras = events[0], events[1:]
+    for score in Score.objects.filter(event_id__in=extras):
+        kept, _ = Score.objects.get_or_create(event_id=keep, house_id=score.house_id, defaults={'points': 0})
+        Score.objects.filter(pk=kept.pk).update(points=F('points') + score.points)
+    Event.objects.filter(pk__in=extras).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_treasure_hunt_events, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(condition=models.Q(('title', 'Treasure Hunt')), fields=('title',), name='unique_treasure_hunt_event'),
+        ),
+    ]
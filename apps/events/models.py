@@ -2,6 +2,9 @@ from django.db import models
 
 
 class Event(models.Model):
+    # The event every treasure hunt scan scores under; see apps/treasure_hunt/scanning.py
+    TREASURE_HUNT_TITLE = "Treasure Hunt"
+
     EVENT_TYPES = [
         ('major', 'Major Event'),
         ('minor', 'Minor Event'),
@@ -19,6 +22,14 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['day', 'time']
+        constraints = [
+            # Lets concurrent first scans get_or_create it without making two
+            models.UniqueConstraint(
+                fields=['title'],
+                condition=models.Q(title="Treasure Hunt"),
+                name='unique_treasure_hunt_event',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.day.isoformat()}: {self.title}"
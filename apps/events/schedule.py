@@ -0,0 +1,164 @@
+# apps/events/schedule.py
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from apps.core.db_routing import use_primary
+from .models import Event, Score
+
+SCHEDULE_VERSION_KEY = 'events:schedule_version'
+SCHEDULE_CACHE_TIMEOUT = 60 * 60
+EVENT_DURATION = timedelta(hours=1)  # events only have a start time
+
+EVENT_FIELDS = ('id', 'title', 'description', 'day', 'time', 'type', 'venue')
+
+
+def get_schedule_version():
+    version = cache.get(SCHEDULE_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a reset key never collides with versions still in the cache
+        cache.add(SCHEDULE_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(SCHEDULE_VERSION_KEY)
+    return version
+
+
+def bump_schedule_version():
+    """Invalidate the cached schedule, its day fragments and feed ETags (called when events change)"""
+    try:
+        cache.incr(SCHEDULE_VERSION_KEY)
+    except ValueError:
+        get_schedule_version()
+
+
+def build_schedule():
+    """
+    Day groups, per-type counts and the total from one ordered query.
+    Events are plain dicts so the result caches and serialises cheaply.
+    """
+    days = []
+    type_counts = {event_type: 0 for event_type, _ in Event.EVENT_TYPES}
+    total = 0
+    for event in Event.objects.order_by('day', 'time', 'pk').values(*EVENT_FIELDS):
+        if not days or days[-1]['day'] != event['day']:
+            days.append({
+                'number': len(days) + 1,
+                'day': event['day'],
+                'label': f"Day {len(days) + 1} - {event['day'].strftime('%b %d')}",
+                'events': [],
+            })
+        days[-1]['events'].append(event)
+        type_counts[event['type']] = type_counts.get(event['type'], 0) + 1
+        total += 1
+    return {'days': days, 'type_counts': type_counts, 'total': total}
+
+
+def get_schedule():
+    version = get_schedule_version()
+    schedule = cache.get_or_set(f'events:schedule:{version}', use_primary()(build_schedule), SCHEDULE_CACHE_TIMEOUT)
+    return version, schedule
+
+
+def current_day_number(days, today=None):
+    """The schedule day containing today, the last one before it, or the first/last day at the ends"""
+    today = today or timezone.localdate()
+    current = 1
+    for day in days:
+        if day['day'] > today:
+            break
+        current = day['number']
+    return current if days else 1
+
+
+def event_start(event):
+    return timezone.make_aware(datetime.combine(event['day'], event['time']))
+
+
+def _ics_text(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _fold(line):
+    """RFC 5545 lines are at most 75 octets; continuation lines start with a space"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Don't split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts)
+
+
+def schedule_ics(schedule, host):
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Evoke//Event Schedule//EN',
+        'CALSCALE:GREGORIAN',
+        'X-WR-CALNAME:Evoke Events',
+    ]
+    for day in schedule['days']:
+        for event in day['events']:
+            start = event_start(event).astimezone(dt_timezone.utc)
+            lines += [
+                'BEGIN:VEVENT',
+                f"UID:event-{event['id']}@{host}",
+                f'DTSTAMP:{stamp}',
+                f"DTSTART:{start.strftime('%Y%m%dT%H%M%SZ')}",
+                f"DTEND:{(start + EVENT_DURATION).strftime('%Y%m%dT%H%M%SZ')}",
+                f"SUMMARY:{_ics_text(event['title'])}",
+                f"DESCRIPTION:{_ics_text(event['description'])}",
+                f"LOCATION:{_ics_text(event['venue'])}",
+                f"CATEGORIES:{event['type'].upper()}",
+                'END:VEVENT',
+            ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def schedule_json(schedule):
+    return {
+        'total': schedule['total'],
+        'type_counts': schedule['type_counts'],
+        'days': [
+            {
+                'number': day['number'],
+                'date': day['day'].isoformat(),
+                'label': day['label'],
+                'events': [
+                    {
+                        'id': event['id'],
+                        'title': event['title'],
+                        'description': event['description'],
+                        'type': event['type'],
+                        'venue': event['venue'],
+                        'start': event_start(event).isoformat(),
+                    }
+                    for event in day['events']
+                ],
+            }
+            for day in schedule['days']
+        ],
+    }
+
+
+def score_stats(event):
+    """Count, total, average and best score for an event from one aggregate"""
+    stats = Score.objects.filter(event=event).aggregate(
+        count=Count('pk'), total=Sum('points'), average=Avg('points'), max=Max('points'),
+    )
+    return {
+        'count': stats['count'],
+        'total_points': stats['total'] or 0,
+        'average_points': round(stats['average'] or 0, 1),
+        'max_points': stats['max'] or 0,
+    }
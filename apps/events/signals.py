@@ -0,0 +1,14 @@
+# apps/events/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Event
+from .schedule import bump_schedule_version
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def expire_schedule(sender, instance, **kwargs):
+    # After commit, so a read in between can't cache the old schedule under the new version
+    transaction.on_commit(bump_schedule_version)
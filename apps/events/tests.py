@@ -1,3 +1,124 @@
-from django.test import TestCase
+from datetime import date, time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from apps.houses.models import House
+from .models import Event, Score
+from .schedule import current_day_number, get_schedule, get_schedule_version, score_stats
+
+
+class EventScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Event.objects.create(title="Opening, Ceremony", description="Welcome; everyone", day=date(2026, 10, 20),
+                             time=time(9, 0), type='major', venue="Main Hall")
+        Event.objects.create(title="Relay", description="", day=date(2026, 10, 20), time=time(14, 0), type='minor')
+        Event.objects.create(title="Trivia Night", description="", day=date(2026, 10, 22), time=time(18, 0), type='trivia')
+
+    def test_schedule_groups_days_and_types_in_one_query(self):
+        get_schedule_version()
+        with self.assertNumQueries(1):
+            _, schedule = get_schedule()
+        self.assertEqual(schedule['total'], 3)
+        self.assertEqual([day['label'] for day in schedule['days']], ["Day 1 - Oct 20", "Day 2 - Oct 22"])
+        self.assertEqual(schedule['type_counts'], {'major': 1, 'minor': 1, 'treasure': 0, 'trivia': 1})
+        with self.assertNumQueries(0):
+            get_schedule()
+
+    def test_current_day(self):
+        _, schedule = get_schedule()
+        days = schedule['days']
+        self.assertEqual(current_day_number(days, date(2026, 10, 1)), 1)
+        self.assertEqual(current_day_number(days, date(2026, 10, 21)), 1)
+        self.assertEqual(current_day_number(days, date(2026, 10, 22)), 2)
+        self.assertEqual(current_day_number(days, date(2026, 11, 1)), 2)
+
+    def test_event_changes_expire_the_schedule(self):
+        version, _ = get_schedule()
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(title="Treasure Hunt", description="", day=date(2026, 10, 21), time=time(10, 0),
+                                 type='treasure')
+            self.assertEqual(get_schedule()[0], version)
+        new_version, schedule = get_schedule()
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(len(schedule['days']), 3)
+
+    def test_schedule_page_renders(self):
+        response = self.client.get(reverse('events:schedule'))
+        self.assertContains(response, "Trivia Night")
+        self.assertEqual(response.context['trivia_events'], 1)
+
+    def test_ics_feed(self):
+        response = self.client.get(reverse('events:schedule_ics'))
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 3)
+        self.assertIn('SUMMARY:Opening\\, Ceremony', body)
+        self.assertIn('DESCRIPTION:Welcome\\; everyone', body)
+        self.assertIn('DTSTART:20261020T090000Z', body)
+
+    def test_json_feed_revalidates_with_etag(self):
+        url = reverse('events:schedule_json')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['days'][1]['events'][0]['title'], "Trivia Night")
+        etag = response['ETag']
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.filter(title="Relay").first().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 2)
+
+
+class EventStatsTests(TestCase):
+    def test_score_stats_in_one_aggregate(self):
+        event = Event.objects.create(title="Tug of War", description="", day=date(2026, 10, 20), time=time(9, 0), type='major')
+        for name, points in (("Stark", 10), ("Lannister", 25), ("Tully", 4)):
+            Score.objects.create(event=event, house=House.objects.create(name=name), points=points)
+        with self.assertNumQueries(1):
+            stats = score_stats(event)
+        self.assertEqual(stats, {'count': 3, 'total_points': 39, 'average_points': 13.0, 'max_points': 25})
+
+
+class TreasureEventMigrationTests(TransactionTestCase):
+    before = [('events', '0001_initial')]
+    after = [('events', '0002_unique_treasure_hunt_event')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_treasure_events_are_merged(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        OldEvent, OldScore = old_apps.get_model('events', 'Event'), old_apps.get_model('events', 'Score')
+        OldHouse = old_apps.get_model('houses', 'House')
+        stark, tully = OldHouse.objects.create(name="Stark"), OldHouse.objects.create(name="Tully")
+        first, second = [
+            OldEvent.objects.create(title="Treasure Hunt", description="", day=date(2026, 10, 21),
+                                    time=time(10, 0), type='treasure')
+            for _ in range(2)
+        ]
+        OldScore.objects.create(event=first, house=stark, points=5)
+        OldScore.objects.create(event=second, house=stark, points=3)
+        OldScore.objects.create(event=second, house=tully, points=4)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        new_apps = executor.loader.project_state(self.after).apps
+        NewEvent, NewScore = new_apps.get_model('events', 'Event'), new_apps.get_model('events', 'Score')
+        self.assertEqual(list(NewEvent.objects.values_list('pk', flat=True)), [first.pk])
+        self.assertEqual(
+            dict(NewScore.objects.values_list('house__name', 'points')), {"Stark": 8, "Tully": 4}
+        )
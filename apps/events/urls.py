@@ -6,6 +6,8 @@ app_name = 'events'
 urlpatterns = [
     path('leaderboard/', views.leaderboard, name='leaderboard'),
     path('schedule/', views.event_schedule, name='schedule'),
+    path('schedule.ics', views.schedule_feed, {'fmt': 'ics'}, name='schedule_ics'),
+    path('schedule.json', views.schedule_feed, {'fmt': 'json'}, name='schedule_json'),
     path('<int:event_id>/', views.event_detail, name='detail'),  # This is the correct name
     path('<int:event_id>/scores/', views.event_scores, name='event_scores'),
 ]
\ No newline at end of file
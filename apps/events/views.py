@@ -8,10 +8,23 @@ from django.shortcuts import render, get_object_or_404
 from django.db.models import Sum, Count, Avg, Max
 from django.utils import timezone
 
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition
+
 from ..houses.models import House
+from apps.core.db_routing import use_replica
+from apps.core.page_cache import cache_public_page
+from .schedule import (
+    current_day_number, get_schedule, get_schedule_version, schedule_ics, schedule_json, score_stats,
+)
 
+FEED_MAX_AGE = 60 * 5
 
-def leaderboard(request):
+
+def _leaderboard_standings():
+    """Everything in the standings part of the leaderboard page"""
     houses = House.objects.annotate(
         total_points=Sum('score__points')
     ).order_by('-total_points')
@@ -100,79 +113,72 @@ def leaderboard(request):
             'house_points': house_points[:3]  # Top 3 houses per event type
         })
 
-    # Recent score updates
-    recent_updates = Score.objects.select_related('event', 'house').order_by('-created_at')[:10]
-
-    context = {
+    return {
         'ranked_houses': ranked_houses,
         'total_events': total_events,
         'total_points_awarded': total_points_awarded,
         'days_remaining': days_remaining,
         'event_type_breakdown': event_type_breakdown,
-        'recent_updates': recent_updates,
+    }
+
+
+@cache_public_page
+@use_replica
+def leaderboard(request):
+    # The standings are only built when their cached fragment is missing
+    standings = SimpleLazyObject(_leaderboard_standings)
+    context = {
+        'today': timezone.localdate(),
+        'ranked_houses': lambda: standings['ranked_houses'],
+        'total_events': lambda: standings['total_events'],
+        'total_points_awarded': lambda: standings['total_points_awarded'],
+        'days_remaining': lambda: standings['days_remaining'],
+        'event_type_breakdown': lambda: standings['event_type_breakdown'],
+        'recent_updates': Score.objects.select_related('event', 'house').order_by('-created_at')[:10],
     }
     return render(request, 'events/leaderboard.html', context)
 
 
+@cache_public_page
 def event_schedule(request):
-    events = Event.objects.all().order_by('day', 'time')
-
-    # Group events by day with proper date formatting
-    events_by_day = {}
-    for event in events:
-        # Format day as "Day X - Month Date" (e.g., "Day 1 - Oct 25")
-        day_display = f"Day {event.day} - {event.day.strftime('%b %d')}"
-        if day_display not in events_by_day:
-            events_by_day[day_display] = []
-        events_by_day[day_display].append(event)
-
-    # Calculate statistics
-    total_events = events.count()
-    major_events = events.filter(type='major').count()
-    minor_events = events.filter(type='minor').count()
-    treasure_events = events.filter(type='treasure').count()
-    trivia_events = events.filter(type='trivia').count()
-
-
-    # Improved current day calculation
-    today = timezone.localdate()
-    current_day_number = 1  # Default to day 1
-
-    # Find which day contains today's date
-    unique_days = sorted(set(event.day for event in events))
-    for i, day in enumerate(unique_days, 1):
-        if day == today:
-            current_day_number = i
-            break
-        elif day > today:
-            # If we've passed today, use the previous day or first day
-            current_day_number = max(1, i - 1)
-            break
-    else:
-        # If all events are in the past, use the last day
-        if unique_days:
-            current_day_number = len(unique_days)
+    version, schedule = get_schedule()
+    type_counts = schedule['type_counts']
 
     context = {
-        'events_by_day': events_by_day,
-        'current_day': current_day_number,
-        'total_events': total_events,
-        'major_events': major_events,
-        'minor_events': minor_events,
-        'treasure_events': treasure_events,
-        'trivia_events': trivia_events,
+        'schedule_version': version,
+        'days': schedule['days'],
+        'current_day': current_day_number(schedule['days']),
+        'total_events': schedule['total'],
+        'major_events': type_counts['major'],
+        'minor_events': type_counts['minor'],
+        'treasure_events': type_counts['treasure'],
+        'trivia_events': type_counts['trivia'],
     }
     return render(request, 'events/schedule.html', context)
 
 
+def _schedule_etag(request, fmt):
+    return f"schedule-{get_schedule_version()}-{fmt}"
+
+
+@condition(etag_func=_schedule_etag)
+def schedule_feed(request, fmt):
+    """The whole schedule as iCalendar or JSON; clients revalidate with If-None-Match"""
+    _, schedule = get_schedule()
+    if fmt == 'ics':
+        response = HttpResponse(schedule_ics(schedule, request.get_host()), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="evoke-events.ics"'
+    else:
+        response = JsonResponse(schedule_json(schedule))
+    patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+    return response
+
+
 def event_detail(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     scores = Score.objects.filter(event=event).select_related('house').order_by('-points')
 
-    # Calculate statistics
-    total_points = scores.aggregate(Sum('points'))['points__sum'] or 0
-    max_points = scores.aggregate(Max('points'))['points__max'] or 0
-    average_points = scores.aggregate(Avg('points'))['points__avg'] or 0
+    stats = score_stats(event)
 
     # Calculate if event is completed
     event_datetime = timezone.datetime.combine(event.day, event.time)
@@ -186,9 +192,9 @@ def event_detail(request, event_id):
         'event': event,
         'scores': scores,
         'is_completed': is_completed,
-        'max_points': max_points,
-        'total_points': total_points,
-        'average_points': round(average_points, 1),
+        'max_points': stats['max_points'],
+        'total_points': stats['total_points'],
+        'average_points': stats['average_points'],
         'related_events': related_events,
     }
     return render(request, 'events/event_detail.html', context)
@@ -198,10 +204,8 @@ def event_scores(request, event_id):
     event = get_object_or_404(Event, id=event_id)
     scores = Score.objects.filter(event=event).select_related('house').order_by('-points')
 
-    # Calculate statistics
-    total_points = scores.aggregate(Sum('points'))['points__sum'] or 0
-    average_points = scores.aggregate(Avg('points'))['points__avg'] or 0
-    max_points = scores.aggregate(Max('points'))['points__max'] or 0
+    stats = score_stats(event)
+    max_points = stats['max_points']
 
     # Add percentage for each score
     scored_scores = []
@@ -215,13 +219,13 @@ def event_scores(request, event_id):
         })
 
     # Get related events
-    related_events = Event.objects.exclude(id=event.id).order_by('day', 'time')[:6]
+    related_events = Event.objects.exclude(id=event.id).annotate(score_count=Count('score')).order_by('day', 'time')[:6]
 
     context = {
         'event': event,
         'scores': scored_scores,
-        'total_points': total_points,
-        'average_points': round(average_points, 1),
+        'total_points': stats['total_points'],
+        'average_points': stats['average_points'],
         'max_points': max_points,
         'related_events': related_events,
     }
@@ -10,20 +10,32 @@ import os
 
 from .models import Image, DailyHighlight
 from .forms import ImageUploadForm
+from apps.core.db_routing import use_replica
 from apps.houses.models import House
 from apps.notifications.models import Notification
 
 
+def selected_house(value):
+    """The pk of the house in ?house=, or None if it isn't one"""
+    try:
+        house_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return house_id if House.objects.filter(pk=house_id).exists() else None
+
+
 @login_required
+@use_replica
 def gallery_home(request):
     images = Image.objects.filter(approved=True).select_related('uploader', 'house')
-    daily_highlights = DailyHighlight.objects.filter(is_active=True)
+    # Lazy querysets: the highlight strip and house filter are cached fragments in the template
+    daily_highlights = DailyHighlight.objects.filter(is_active=True).select_related('image__uploader')
 
     # Get all houses for filter
     houses = House.objects.all()
 
     # Get filter parameters
-    house_filter = request.GET.get('house')
+    house_filter = selected_house(request.GET.get('house'))
     day_filter = request.GET.get('day')
 
     if house_filter:
@@ -42,6 +54,8 @@ def gallery_home(request):
         'daily_highlights': daily_highlights,
         'total_images': images.count(),
         'houses': houses,
+        # The house filter fragment is cached per value, so only known houses get their own copy
+        'house_filter_key': house_filter or 'all',
     }
     return render(request, 'gallery/home.html', context)
 
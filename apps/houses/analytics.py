@@ -0,0 +1,67 @@
+# apps/houses/analytics.py
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.events.models import Event, Score
+
+ANALYTICS_CACHE_TIMEOUT = 60 * 10  # also bounds how stale "last 7 days" can get
+RECENT_DAYS = 7
+
+EVENT_TYPES = [event_type for event_type, _ in Event.EVENT_TYPES]
+
+
+def _cache_key(house_id):
+    return f'houses:analytics:{house_id}'
+
+
+def compute_house_analytics(house_id):
+    """
+    Everything the house pages report about a house's scores, from one pass over
+    its score rows (a house has at most one score per event, so this is small).
+    """
+    recent_since = timezone.now() - timedelta(days=RECENT_DAYS)
+    rows = Score.objects.filter(house_id=house_id).values_list(
+        'points', 'created_at', 'event_id', 'event__title', 'event__type'
+    )
+
+    by_type = {event_type: {'points': 0, 'count': 0} for event_type in EVENT_TYPES}
+    total_points = events = event_wins = recent_points = 0
+    max_points = None
+    best_event = None
+    for points, created_at, event_id, title, event_type in rows:
+        total_points += points
+        events += 1
+        if points > 0:
+            event_wins += 1
+        if created_at >= recent_since:
+            recent_points += points
+        if max_points is None or points > max_points:
+            max_points = points
+            best_event = {'id': event_id, 'title': title}
+        if event_type in by_type:
+            by_type[event_type]['points'] += points
+            by_type[event_type]['count'] += 1
+
+    total_events = Event.objects.count()
+    return {
+        'total_points': total_points,
+        'events_participated': events,
+        'event_wins': event_wins,
+        'average_points': round(total_points / events, 1) if events else 0,
+        'max_points': max_points or 0,
+        'recent_points': recent_points,
+        'best_event': best_event,
+        'points_by_type': by_type,
+        'total_events': total_events,
+        'participation_rate': round(100 * events / total_events) if total_events else 0,
+    }
+
+
+def get_house_analytics(house_id):
+    return cache.get_or_set(_cache_key(house_id), lambda: compute_house_analytics(house_id), ANALYTICS_CACHE_TIMEOUT)
+
+
+def forget_house_analytics(house_ids):
+    cache.delete_many([_cache_key(house_id) for house_id in house_ids])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HousesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.houses'
+
+    def ready(self):
+        from . import signals  # noqa: F401
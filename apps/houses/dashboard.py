@@ -0,0 +1,69 @@
+# apps/houses/dashboard.py
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from apps.core.models import Student
+from apps.core.page_cache import get_page_version
+from apps.events.models import Score
+from .models import House
+
+MEMBERS_PER_FRAGMENT = 20
+RECENT_SCORES = 5
+MEMBERS_CACHE_TIMEOUT = 60
+# Ranks and recent scores are keyed on the public page version, which every
+# Score and House change bumps, so they can sit in the cache until then
+FRAGMENT_CACHE_TIMEOUT = 60 * 30
+
+
+def house_ranks():
+    """[(house_id, total_points), ...] for every house, best first, from one grouped query"""
+    def build():
+        return list(
+            House.objects.annotate(total=Coalesce(Sum('score__points'), 0))
+            .order_by('-total', 'pk').values_list('pk', 'total')
+        )
+    return cache.get_or_set(f'houses:ranks:{get_page_version()}', build, FRAGMENT_CACHE_TIMEOUT)
+
+
+def rank_summary(house):
+    ranks = house_ranks()
+    for index, (house_id, total) in enumerate(ranks):
+        if house_id == house.pk:
+            ahead = ranks[index - 1][1] if index else total
+            return {'house_rank': index + 1, 'total_points': total, 'points_to_next': max(0, ahead - total)}
+    return {'house_rank': None, 'total_points': 0, 'points_to_next': 0}
+
+
+def recent_scores(house):
+    """The house's latest scores as plain dicts"""
+    def build():
+        return list(
+            Score.objects.filter(house=house).order_by('-created_at').values(
+                'points', 'created_at', 'event__title', 'event__day', 'event__time'
+            )[:RECENT_SCORES]
+        )
+    return cache.get_or_set(f'houses:recent_scores:{house.pk}:{get_page_version()}', build, FRAGMENT_CACHE_TIMEOUT)
+
+
+def member_page(house, page_number):
+    """One page of the member list (id, name, role) with its paging info, cached briefly per house and page"""
+    try:
+        page_number = max(1, int(page_number))
+    except (TypeError, ValueError):
+        page_number = 1
+
+    def build():
+        paginator = Paginator(
+            Student.objects.filter(house=house).order_by('name', 'pk').values('id', 'name', 'role'),
+            MEMBERS_PER_FRAGMENT,
+        )
+        page = paginator.get_page(page_number)
+        return {
+            'members': list(page.object_list),
+            'number': page.number,
+            'num_pages': paginator.num_pages,
+            'count': paginator.count,
+        }
+    return cache.get_or_set(f'houses:members:{house.pk}:{page_number}', build, MEMBERS_CACHE_TIMEOUT)
@@ -0,0 +1,62 @@
+# apps/houses/directory.py
+from django.db.models import BooleanField, Count, ExpressionWrapper, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.models import Student, normalize_key
+from apps.gallery.models import Image
+from apps.treasure_hunt.models import QRScan
+
+MEMBERS_PAGE_SIZE = 48
+
+DIRECTORY_FIELDS = ('id', 'name', 'matric_number', 'role', 'house_id', 'registered_date')
+
+
+def _count_per_member(model, member_field):
+    """Correlated COUNT of `model` rows belonging to the outer student"""
+    counts = model.objects.filter(**{member_field: OuterRef('pk')}).order_by().values(member_field).annotate(
+        total=Count('pk')
+    ).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def with_activity(members):
+    """Annotate students with images_uploaded, qr_scans and active, all inside the same query"""
+    return members.annotate(
+        images_uploaded=_count_per_member(Image, 'uploader'),
+        qr_scans=_count_per_member(QRScan, 'student'),
+    ).annotate(
+        active=ExpressionWrapper(Q(images_uploaded__gt=0) | Q(qr_scans__gt=0), output_field=BooleanField()),
+    )
+
+
+def search_members(members, query):
+    """Filter by name (through the normalized lookup key) or matric number"""
+    query = (query or '').strip()
+    if not query:
+        return members
+    return members.filter(Q(name_key__contains=normalize_key(query)) | Q(matric_number__icontains=query))
+
+
+def member_directory(house, query=''):
+    """The house's members with their activity counts, ordered by name"""
+    members = Student.objects.filter(house=house).only(*DIRECTORY_FIELDS).order_by('name', 'pk')
+    return with_activity(search_members(members, query))
+
+
+def house_member_totals(house):
+    """Head counts and activity totals for the whole house from one aggregate query"""
+    start_of_today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    totals = with_activity(Student.objects.filter(house=house)).aggregate(
+        members=Count('pk'),
+        admins=Count('pk', filter=Q(role='admin')),
+        students=Count('pk', filter=Q(role='student')),
+        active=Count('pk', filter=Q(images_uploaded__gt=0) | Q(qr_scans__gt=0)),
+        photos=Sum('images_uploaded'),
+        scans=Sum('qr_scans'),
+        joined_today=Count('pk', filter=Q(registered_date__gte=start_of_today)),
+    )
+    totals['photos'] = totals['photos'] or 0
+    totals['scans'] = totals['scans'] or 0
+    totals['average_activity'] = round(100 * totals['active'] / totals['members']) if totals['members'] else 0
+    return totals
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_members(apps, schema_editor):
+    House = apps.get_model('houses', 'House')
+    HouseCounter = apps.get_model('houses', 'HouseCounter')
+    HouseCounter.objects.bulk_create([
+        HouseCounter(house_id=house.pk, members=house.member_total)
+        for house in House.objects.annotate(member_total=Count('students'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('houses', '0004_house_whatsapp_link'),
+        ('core', '0006_student_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HouseCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('members', models.PositiveIntegerField(default=0)),
+                ('house', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='counter', to='houses.house')),
+            ],
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+    ]
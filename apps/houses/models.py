@@ -24,4 +24,15 @@ class House(models.Model):
         return self.name
 
     def total_points(self):
-        return Score.objects.filter(house=self).aggregate(total=Sum('points'))['total'] or 0
\ No newline at end of file
+        return Score.objects.filter(house=self).aggregate(total=Sum('points'))['total'] or 0
+
+class HouseCounter(models.Model):
+    """
+    Running member count used by the house allocator (apps/core/allocation.py).
+    Kept apart from House so editing a house never writes back a stale count.
+    """
+    house = models.OneToOneField(House, on_delete=models.CASCADE, related_name='counter')
+    members = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.house.name}: {self.members}"
@@ -0,0 +1,23 @@
+# apps/houses/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.events.models import Event, Score
+from .analytics import forget_house_analytics
+from .models import House
+
+
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def refresh_house_analytics(sender, instance, **kwargs):
+    # After commit, or a read in between would cache the old totals again
+    house_id = instance.house_id
+    transaction.on_commit(lambda: forget_house_analytics([house_id]))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def refresh_all_house_analytics(sender, instance, **kwargs):
+    # Titles, types and the number of events feed every house's record
+    transaction.on_commit(lambda: forget_house_analytics(list(House.objects.values_list('pk', flat=True))))
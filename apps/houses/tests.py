@@ -1,3 +1,172 @@
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.models import Student
+from apps.events.models import Event, Score
+from apps.gallery.models import Image
+from apps.treasure_hunt.models import QRCode, QRScan
+from .analytics import get_house_analytics
+from .directory import house_member_totals, member_directory
+from .models import House
+
+
+class HouseMembersDirectoryTests(TestCase):
+    def setUp(self):
+        self.house = House.objects.create(name="House Greyjoy of Pyke")
+        self.members = [
+            Student.objects.create(matric_number=f"GJ{i:03d}", name=f"Ironborn {i:03d}", house=self.house)
+            for i in range(60)
+        ]
+        Student.objects.create(matric_number="GJCAPTAIN", name="Balon", house=self.house)
+        codes = [QRCode.objects.create(code=f"QR{i}", location_name=f"Spot {i}", points=5) for i in range(3)]
+        for code in codes:
+            QRScan.objects.create(student=self.members[0], qr_code=code)
+        Image.objects.create(file='gallery/a.jpg', uploader=self.members[1], house=self.house)
+        self.client.force_login(self.members[0])
+
+    def test_activity_is_annotated(self):
+        members = {member.matric_number: member for member in member_directory(self.house)}
+        self.assertEqual((members['GJ000'].qr_scans, members['GJ000'].images_uploaded), (3, 0))
+        self.assertEqual((members['GJ001'].qr_scans, members['GJ001'].images_uploaded), (0, 1))
+        self.assertTrue(members['GJ001'].active)
+        self.assertFalse(members['GJ002'].active)
+
+    def test_totals_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            totals = house_member_totals(self.house)
+        self.assertEqual(
+            (totals['members'], totals['admins'], totals['students'], totals['active'], totals['photos'], totals['scans']),
+            (61, 0, 61, 2, 1, 3),
+        )
+
+    def test_page_query_count_does_not_grow_with_members(self):
+        url = reverse('houses:members', args=[self.house.pk])
+        self.client.get(url)
+        with self.assertNumQueries(6) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['members']), 48)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url, {'page': 2})
+        self.assertEqual(len(response.context['members']), 13)
+
+    def test_search_by_name_or_matric_number(self):
+        url = reverse('houses:members', args=[self.house.pk])
+        response = self.client.get(url, {'q': '  IRONBORN 01'})
+        self.assertEqual(response.context['matching_members'], 10)
+        response = self.client.get(url, {'q': 'gjcaptain'})
+        self.assertEqual([member.name for member in response.context['members']], ['Balon'])
+        self.assertEqual(response.context['members_count'], 61)
+
+
+class HouseAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="House Lannister of Casterly Rock", crest='house_crests/lion.png')
+        self.other = House.objects.create(name="House Tyrell of Highgarden")
+        today = timezone.localdate()
+        self.events = [
+            Event.objects.create(title=f"Event {i}", description="", day=today, time='10:00', type=event_type)
+            for i, event_type in enumerate(['major', 'major', 'trivia', 'minor'])
+        ]
+        Score.objects.create(event=self.events[0], house=self.house, points=30)
+        Score.objects.create(event=self.events[1], house=self.house, points=10)
+        old = Score.objects.create(event=self.events[2], house=self.house, points=5)
+        Score.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        Score.objects.create(event=self.events[0], house=self.other, points=50)
+        cache.clear()
+        self.client.force_login(Student.objects.create(matric_number="LN1", name="Tyrion", house=self.house))
+
+    def test_record_covers_every_figure(self):
+        with self.assertNumQueries(2):
+            analytics = get_house_analytics(self.house.pk)
+        self.assertEqual(analytics['total_points'], 45)
+        self.assertEqual(analytics['events_participated'], 3)
+        self.assertEqual(analytics['average_points'], 15.0)
+        self.assertEqual(analytics['max_points'], 30)
+        self.assertEqual(analytics['recent_points'], 40)
+        self.assertEqual(analytics['best_event']['title'], "Event 0")
+        self.assertEqual(analytics['participation_rate'], 75)
+        self.assertEqual(analytics['points_by_type']['major'], {'points': 40, 'count': 2})
+        with self.assertNumQueries(0):
+            get_house_analytics(self.house.pk)
+
+    def test_score_changes_refresh_only_that_house(self):
+        get_house_analytics(self.house.pk)
+        get_house_analytics(self.other.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.create(event=self.events[3], house=self.house, points=7)
+            # Still the old record until the score commits
+            self.assertEqual(get_house_analytics(self.house.pk)['total_points'], 45)
+        self.assertEqual(get_house_analytics(self.house.pk)['total_points'], 52)
+        with self.assertNumQueries(0):
+            get_house_analytics(self.other.pk)
+
+    def test_views_read_the_record(self):
+        response = self.client.get(reverse('houses:scores', args=[self.house.pk]))
+        self.assertEqual(response.context['highest_score'], 30)
+        self.assertEqual(response.context['average_score'], 15.0)
+        self.assertEqual(response.context['best_event_type'], 'Major Events')
+
+        response = self.client.get(reverse('houses:detail', args=[self.house.pk]))
+        self.assertEqual(response.context['recent_points'], 40)
+        self.assertEqual(response.context['participation_rate'], 75)
+        self.assertContains(response, "Event 0")
+
+
+class HouseDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(name="House Baratheon of Storm's End")
+        self.rival = House.objects.create(name="House Targaryen of Dragonstone")
+        event = Event.objects.create(title="Tourney", description="", day=timezone.localdate(), time='10:00', type='major')
+        Score.objects.create(event=event, house=self.house, points=20)
+        Score.objects.create(event=event, house=self.rival, points=35)
+        self.students = [
+            Student.objects.create(matric_number=f"BR{i:03d}", name=f"Stormlander {i:03d}", house=self.house)
+            for i in range(45)
+        ]
+        # The house backend serves request.user (and its house) from the user cache
+        self.client.force_login(self.students[0], backend='apps.core.backends.HouseAuthenticationBackend')
+
+    def test_shell_is_cheap_and_leaves_members_out(self):
+        url = reverse('houses:dashboard')
+        self.client.get(url)
+        # Session and member count; the user, house and analytics record come from the cache
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertNotContains(response, "Stormlander 044")
+        self.assertContains(response, reverse('houses:dashboard_members'))
+
+    def test_members_fragment_pages(self):
+        response = self.client.get(reverse('houses:dashboard_members'), {'page': 3})
+        self.assertEqual(response.context['member_page']['number'], 3)
+        self.assertEqual(len(response.context['member_page']['members']), 5)
+        self.assertContains(response, "Stormlander 044")
+        with self.assertNumQueries(1):
+            self.client.get(reverse('houses:dashboard_members'), {'page': 3})
+
+    def test_rank_fragment(self):
+        response = self.client.get(reverse('houses:dashboard_rank'))
+        # Lazy, so a cached rank card never works them out
+        self.assertEqual((response.context['house_rank'](), response.context['points_to_next']()), (2, 15))
+        # Only the session: the user and house come from the user cache, the card from the fragment cache
+        with self.assertNumQueries(1):
+            cached = self.client.get(reverse('houses:dashboard_rank'))
+        self.assertEqual(cached.content, response.content)
+        self.assertContains(response, '<span class="text-white font-semibold">15</span>')
+
+    def test_activity_fragment_follows_new_scores(self):
+        self.assertContains(self.client.get(reverse('houses:dashboard_activity')), "Earned 20 points in Tourney")
+        with self.captureOnCommitCallbacks(execute=True):
+            event = Event.objects.create(title="Melee", description="", day=timezone.localdate(), time='12:00',
+                                         type='minor')
+            Score.objects.create(event=event, house=self.house, points=4)
+        self.assertContains(self.client.get(reverse('houses:dashboard_activity')), "Earned 4 points in Melee")
 
-# Create your tests here.
+    def test_fragments_need_a_house(self):
+        self.client.force_login(Student.objects.create(matric_number="NOHOUSE", name="Hedge Knight"))
+        self.assertEqual(self.client.get(reverse('houses:dashboard_rank')).status_code, 404)
@@ -5,6 +5,9 @@ app_name = 'houses'
 
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/members/', views.dashboard_members, name='dashboard_members'),
+    path('dashboard/activity/', views.dashboard_activity, name='dashboard_activity'),
+    path('dashboard/rank/', views.dashboard_rank, name='dashboard_rank'),
     path('<int:pk>/', views.HouseDetailView.as_view(), name='detail'),
     path('<int:pk>/members/', views.house_members, name='members'),
     path('<int:pk>/scores/', views.house_scores, name='scores'),
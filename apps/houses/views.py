@@ -1,16 +1,20 @@
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import DetailView
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import SimpleLazyObject
 
 from apps.core.models import Student
-from apps.events.models import Score, Event
+from apps.events.models import Score
 from apps.gallery.models import Image
 from apps.houses.models import House
 from apps.notifications.models import Notification
-from apps.treasure_hunt.models import QRScan
+from .analytics import get_house_analytics
+from .dashboard import member_page, rank_summary, recent_scores
+from .directory import MEMBERS_PAGE_SIZE, house_member_totals, member_directory
 
 
 @login_required
@@ -37,81 +41,77 @@ def dashboard(request):
         }
         return render(request, 'houses/no_house.html', context)
 
-    # Rest of your existing logic remains the same...
-    members = Student.objects.filter(house=house)
-    event_wins = Score.objects.filter(house=house, points__gt=0).count()
-
-    houses = House.objects.annotate(total_points_annotated=Sum('score__points')).order_by('-total_points_annotated')
-
-    house_rank = 1
-    for i, h in enumerate(houses, 1):
-        if getattr(h, 'pk', None) == house.pk:
-            house_rank = i
-            break
-
-    def _get_total_points(h_obj):
-        annotated = getattr(h_obj, 'total_points_annotated', None)
-        if annotated is not None:
-            try:
-                return int(annotated or 0)
-            except Exception:
-                try:
-                    return int(float(annotated))
-                except Exception:
-                    return 0
-
-        maybe_method = getattr(h_obj, 'total_points', None)
-        if callable(maybe_method):
-            try:
-                result = maybe_method()
-                return int(result or 0)
-            except Exception:
-                pass
-
-        agg = Score.objects.filter(house=h_obj).aggregate(total=Sum('points'))['total'] or 0
-        return int(agg)
-
-    points_to_next = 0
-    if house_rank > 1:
-        next_house = houses[house_rank - 2]
-        points_to_next = max(0, _get_total_points(next_house) - _get_total_points(house))
-
-    recent_activity = []
-    recent_scores = Score.objects.filter(house=house).select_related('event').order_by('-created_at')[:5]
-    for score in recent_scores:
-        recent_activity.append({
+    # The shell only carries cheap headline numbers; members, activity and rank
+    # are fetched by the page from the fragment views below
+    analytics = get_house_analytics(house.pk)
+    context = {
+        'house': house,
+        'members_count': Student.objects.filter(house=house).count(),
+        'total_points': analytics['total_points'],
+        'event_wins': analytics['event_wins'],
+        'user': request.user,
+    }
+    return render(request, 'houses/dashboard.html', context)
+
+
+def _own_house(request):
+    house = getattr(request.user, 'house', None)
+    if house is None:
+        raise Http404("No house assigned")
+    return house
+
+
+@login_required
+def dashboard_members(request):
+    house = _own_house(request)
+    return render(request, 'houses/fragments/members.html', {
+        'house': house,
+        'member_page': member_page(house, request.GET.get('page')),
+    })
+
+
+@login_required
+def dashboard_activity(request):
+    house = _own_house(request)
+    scores = recent_scores(house)
+
+    recent_activity = [
+        {
             'type': 'score',
-            'message': f"Earned {score.points} points in {score.event.title}",
-            'timestamp': score.created_at,
+            'message': f"Earned {score['points']} points in {score['event__title']}",
+            'timestamp': score['created_at'],
             'icon': 'fas fa-trophy',
             'color': 'green'
-        })
-
-    if members.exists():
-        recent_activity.append({
-            'type': 'member',
-            'message': f"Welcome to our newest member!",
-            'timestamp': timezone.now(),
-            'icon': 'fas fa-user-plus',
-            'color': 'blue'
-        })
+        }
+        for score in scores
+    ]
+    recent_activity.insert(0, {
+        'type': 'member',
+        'message': "Welcome to our newest member!",
+        'timestamp': timezone.now(),
+        'icon': 'fas fa-user-plus',
+        'color': 'blue'
+    })
+
+    return render(request, 'houses/fragments/activity.html', {
+        'house': house,
+        'recent_activity': recent_activity[:5],
+        'recent_scores': scores,
+    })
 
-    recent_activity.sort(key=lambda x: x['timestamp'], reverse=True)
-    recent_activity = recent_activity[:5]
 
-    context = {
+@login_required
+def dashboard_rank(request):
+    house = _own_house(request)
+    # Only worked out when the cached rank card is missing
+    summary = SimpleLazyObject(lambda: rank_summary(house))
+    return render(request, 'houses/fragments/rank.html', {
         'house': house,
-        'members': members,
-        'members_count': members.count(),
-        'total_points': _get_total_points(house),
-        'event_wins': event_wins,
-        'house_rank': house_rank,
-        'points_to_next': points_to_next,
-        'recent_activity': recent_activity,
-        'recent_scores': recent_scores,
-        'user': request.user,
-    }
-    return render(request, 'houses/dashboard.html', context)
+        'house_rank': lambda: summary['house_rank'],
+        'total_points': lambda: summary['total_points'],
+        'points_to_next': lambda: summary['points_to_next'],
+    })
+
 
 class HouseDetailView(DetailView):
     model = House
@@ -138,28 +138,15 @@ class HouseDetailView(DetailView):
                 break
         context['house_rank'] = house_rank
 
-        # Event wins count
-        context['event_wins'] = Score.objects.filter(
-            house=house,
-            points__gt=0
-        ).count()
+        analytics = get_house_analytics(house.pk)
+        context['event_wins'] = analytics['event_wins']
 
         # Points by event type
-        points_by_type = []
-        event_types = ['major', 'minor', 'treasure', 'trivia']
-        colors = ['yellow', 'blue', 'green', 'purple']
-
-        for event_type, color in zip(event_types, colors):
-            points = Score.objects.filter(
-                house=house,
-                event__type=event_type
-            ).aggregate(total=Sum('points'))['total'] or 0
-            points_by_type.append({
-                'name': event_type.title(),
-                'points': points,
-                'color': color
-            })
-        context['points_by_type'] = points_by_type
+        colors = {'major': 'yellow', 'minor': 'blue', 'treasure': 'green', 'trivia': 'purple'}
+        context['points_by_type'] = [
+            {'name': event_type.title(), 'points': totals['points'], 'color': colors.get(event_type, 'gray')}
+            for event_type, totals in analytics['points_by_type'].items()
+        ]
 
         # Recent scores
         context['recent_scores'] = Score.objects.filter(
@@ -173,24 +160,10 @@ class HouseDetailView(DetailView):
         ).order_by('-timestamp')[:4]
 
         # Recent performance (last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        recent_points = Score.objects.filter(
-            house=house,
-            created_at__gte=week_ago
-        ).aggregate(total=Sum('points'))['total'] or 0
-        context['recent_points'] = recent_points
-
-        # Simple trend calculation
-        context['trend'] = 'up' if recent_points > 0 else 'stable'
-
-        # Best event (most points in a single event)
-        best_score = Score.objects.filter(house=house).order_by('-points').first()
-        context['best_event'] = best_score.event if best_score else None
-
-        # Participation rate
-        total_events = Event.objects.count()
-        participated_events = Score.objects.filter(house=house).values('event').distinct().count()
-        context['participation_rate'] = round((participated_events / total_events) * 100) if total_events > 0 else 0
+        context['recent_points'] = analytics['recent_points']
+        context['trend'] = 'up' if analytics['recent_points'] > 0 else 'stable'
+        context['best_event'] = analytics['best_event']
+        context['participation_rate'] = analytics['participation_rate']
 
         return context
 
@@ -198,95 +171,59 @@ class HouseDetailView(DetailView):
 @login_required
 def house_members(request, pk):
     house = get_object_or_404(House, pk=pk)
-    members = Student.objects.filter(house=house).order_by('name')
-
-    # Calculate member statistics
-    admins_count = members.filter(role='admin').count()
-    students_count = members.filter(role='student').count()
-
-    # Calculate activity metrics for each member
-    active_members = 0
-    total_photos_uploaded = 0
-    total_qr_scans = 0
+    query = request.GET.get('q', '').strip()
 
-    for member in members:
-        # Count photos uploaded by member
-        photos_count = Image.objects.filter(uploader=member).count()
-        member.images_uploaded = photos_count
-        total_photos_uploaded += photos_count
-
-        # Count QR scans by member
-        qr_scans = QRScan.objects.filter(student=member).count()
-        member.qr_scans = qr_scans
-        total_qr_scans += qr_scans
-
-        # Consider member active if they have any activity
-        if photos_count > 0 or qr_scans > 0:
-            active_members += 1
-
-    # Calculate average activity percentage
-    average_activity = round((active_members / members.count()) * 100) if members.count() > 0 else 0
-
-    # New members today (simplified - you might want to use actual registration date)
-    new_members_today = 0  # This would typically come from registration date
+    paginator = Paginator(member_directory(house, query), MEMBERS_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+    totals = house_member_totals(house)
 
     context = {
         'house': house,
-        'members': members,
-        'admins_count': admins_count,
-        'students_count': students_count,
-        'active_members': active_members,
-        'total_photos_uploaded': total_photos_uploaded,
-        'total_qr_scans': total_qr_scans,
-        'average_activity': average_activity,
-        'new_members_today': new_members_today,
+        'members': page.object_list,
+        'page_obj': page,
+        'query': query,
+        'matching_members': paginator.count,
+        'members_count': totals['members'],
+        'admins_count': totals['admins'],
+        'students_count': totals['students'],
+        'active_members': totals['active'],
+        'total_photos_uploaded': totals['photos'],
+        'total_qr_scans': totals['scans'],
+        'average_activity': totals['average_activity'],
+        'new_members_today': totals['joined_today'],
     }
     return render(request, 'houses/members.html', context)
 
 
+SCORE_EVENT_TYPES = [
+    {'type': 'major', 'name': 'Major Events', 'icon': 'fas fa-star', 'color': 'yellow'},
+    {'type': 'minor', 'name': 'Minor Events', 'icon': 'fas fa-certificate', 'color': 'blue'},
+    {'type': 'treasure', 'name': 'Treasure Hunt', 'icon': 'fas fa-search', 'color': 'green'},
+    {'type': 'trivia', 'name': 'Trivia', 'icon': 'fas fa-brain', 'color': 'purple'},
+]
+
+
 @login_required
 def house_scores(request, pk):
     house = get_object_or_404(House, pk=pk)
     scores = Score.objects.filter(house=house).select_related('event').order_by('-created_at')
 
-    # Calculate basic statistics
-    total_points = house.total_points()
-    events_participated = scores.values('event').distinct().count()
+    analytics = get_house_analytics(house.pk)
+    total_points = analytics['total_points']
+    events_participated = analytics['events_participated']
     event_wins = 0  # This would need to be calculated based on event rankings
 
-    # Calculate average score
-    average_score = scores.aggregate(avg=Sum('points'))['avg'] or 0
-    if scores.count() > 0:
-        average_score = round(average_score / scores.count(), 1)
-
-    # Highest score
-    highest_score = scores.aggregate(max=Sum('points'))['max'] or 0
-
-    # Participation rate
-    total_events = Event.objects.count()
-    participation_rate = round((events_participated / total_events) * 100) if total_events > 0 else 0
-
     # Points by event type
     points_by_type = []
-    event_types_data = [
-        {'type': 'major', 'name': 'Major Events', 'icon': 'fas fa-star', 'color': 'yellow'},
-        {'type': 'minor', 'name': 'Minor Events', 'icon': 'fas fa-certificate', 'color': 'blue'},
-        {'type': 'treasure', 'name': 'Treasure Hunt', 'icon': 'fas fa-search', 'color': 'green'},
-        {'type': 'trivia', 'name': 'Trivia', 'icon': 'fas fa-brain', 'color': 'purple'},
-    ]
-
-    for event_type in event_types_data:
-        type_scores = scores.filter(event__type=event_type['type'])
-        type_points = type_scores.aggregate(total=Sum('points'))['total'] or 0
-        type_count = type_scores.count()
-        type_percentage = round((type_points / total_points) * 100) if total_points > 0 else 0
-
+    for event_type in SCORE_EVENT_TYPES:
+        totals = analytics['points_by_type'].get(event_type['type'], {'points': 0, 'count': 0})
         points_by_type.append({
             **event_type,
-            'points': type_points,
-            'count': type_count,
-            'percentage': type_percentage
+            'points': totals['points'],
+            'count': totals['count'],
+            'percentage': round((totals['points'] / total_points) * 100) if total_points > 0 else 0
         })
+    best_type = max(points_by_type, key=lambda type_data: type_data['points'])
 
     # Add position to each score (this is simplified)
     for score in scores:
@@ -296,7 +233,7 @@ def house_scores(request, pk):
     # Performance trends (simplified)
     current_streak = 1
     best_streak = 3
-    best_event_type = "Major Events"
+    best_event_type = best_type['name'] if best_type['points'] > 0 else "N/A"
     average_points_per_event = round(total_points / max(1, events_participated))
     recent_performance = "Excellent"
 
@@ -306,9 +243,9 @@ def house_scores(request, pk):
         'total_points': total_points,
         'events_participated': events_participated,
         'event_wins': event_wins,
-        'average_score': average_score,
-        'highest_score': highest_score,
-        'participation_rate': participation_rate,
+        'average_score': analytics['average_points'],
+        'highest_score': analytics['max_points'],
+        'participation_rate': analytics['participation_rate'],
         'points_by_type': points_by_type,
         'current_streak': current_streak,
         'best_streak': best_streak,
@@ -0,0 +1,46 @@
+# apps/notifications/management/commands/purge_notifications.py
+from django.core.management.base import BaseCommand
+
+from apps.notifications.retention import purge_notifications, notification_table_stats
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete read or expired notifications in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows deleted per transaction')
+        parser.add_argument('--archive-dir', type=str, help='Where to write the .jsonl.gz archive')
+        parser.add_argument('--no-archive', action='store_true', help='Delete without archiving')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+        parser.add_argument('--stats', action='store_true', help='Print table metrics and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_stats()
+            return
+
+        result = purge_notifications(
+            batch_size=options['batch_size'],
+            archive=not options['no_archive'],
+            archive_dir=options['archive_dir'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{result['matched']} notifications would be purged")
+            return
+
+        if result['archive_file']:
+            self.stdout.write(f"Archived {result['archived']} notifications to {result['archive_file']}")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {result['deleted']} notifications"))
+
+    def print_stats(self):
+        stats = notification_table_stats()
+        self.stdout.write(f"Total notifications: {stats['total']}")
+        self.stdout.write(f"Unread: {stats['unread']}")
+        self.stdout.write(f"Past retention: {stats['expired']}")
+        self.stdout.write(f"Oldest: {stats['oldest'] or '-'}")
+        size = stats['table_size_bytes']
+        self.stdout.write(f"Table size: {f'{size / 1024:.1f} KiB' if size is not None else 'unknown'}")
+        for notification_type, counts in sorted(stats['by_type'].items()):
+            self.stdout.write(f"  {notification_type}: {counts['total']} ({counts['unread']} unread)")
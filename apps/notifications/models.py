@@ -20,6 +20,13 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp']),
+            models.Index(fields=['user', '-timestamp']),
+            models.Index(fields=['user', 'is_read']),
+            # Used by the retention job to find expired rows per type
+            models.Index(fields=['type', 'timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.type}: {self.message}"
@@ -0,0 +1,149 @@
+# apps/notifications/retention.py
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import Notification
+
+DEFAULT_RETENTION = {
+    'READ_TTL_DAYS': 7,
+    'DEFAULT_TTL_DAYS': 30,
+    'TTL_DAYS': {},
+    'BATCH_SIZE': 1000,
+    'ARCHIVE_DIR': None,
+}
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'message', 'type', 'timestamp', 'is_read', 'url']
+
+
+def get_retention_settings():
+    """Merge NOTIFICATION_RETENTION from settings over the defaults"""
+    config = dict(DEFAULT_RETENTION)
+    config.update(getattr(settings, 'NOTIFICATION_RETENTION', {}))
+    return config
+
+
+def expired_filter(now=None, config=None):
+    """
+    Build a Q matching every notification that is past its retention window:
+      - read notifications older than READ_TTL_DAYS
+      - any notification older than the TTL for its type
+      - types without a configured TTL fall back to DEFAULT_TTL_DAYS
+    """
+    now = now or timezone.now()
+    config = config or get_retention_settings()
+    ttl_days = config['TTL_DAYS']
+
+    condition = Q(is_read=True, timestamp__lt=now - timedelta(days=config['READ_TTL_DAYS']))
+    for notification_type, days in ttl_days.items():
+        condition |= Q(type=notification_type, timestamp__lt=now - timedelta(days=days))
+
+    default_cutoff = now - timedelta(days=config['DEFAULT_TTL_DAYS'])
+    condition |= Q(timestamp__lt=default_cutoff) & ~Q(type__in=list(ttl_days))
+    return condition
+
+
+def archive_path(archive_dir, now=None):
+    now = now or timezone.now()
+    return os.path.join(str(archive_dir), f"notifications-{now.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+
+
+def purge_notifications(batch_size=None, archive=True, archive_dir=None, dry_run=False, now=None):
+    """
+    Delete expired notifications in batches of primary keys.
+
+    Each batch is written to a gzipped JSON-lines archive (one file per run)
+    before it is deleted, and every batch runs in its own short transaction
+    so the table is never locked for the whole purge.
+
+    Returns a dict with the number of rows matched, archived and deleted.
+    """
+    now = now or timezone.now()
+    config = get_retention_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    archive_dir = archive_dir or config['ARCHIVE_DIR']
+    expired = Notification.objects.filter(expired_filter(now, config)).order_by('id')
+
+    result = {'matched': expired.count(), 'archived': 0, 'deleted': 0, 'archive_file': None}
+    if dry_run or not result['matched']:
+        return result
+
+    archive_file = None
+    if archive and archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        result['archive_file'] = archive_path(archive_dir, now)
+        archive_file = gzip.open(result['archive_file'], 'wt', encoding='utf-8')
+
+    last_id = 0
+    try:
+        while True:
+            # Walk the primary key so each batch is an index range scan
+            ids = list(expired.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            with transaction.atomic():
+                batch = Notification.objects.filter(id__in=ids)
+                if archive_file:
+                    for row in batch.values(*ARCHIVE_FIELDS).order_by('id'):
+                        archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                        result['archived'] += 1
+                deleted, _ = batch.delete()
+                result['deleted'] += deleted
+    finally:
+        if archive_file:
+            archive_file.close()
+
+    return result
+
+
+def table_size_bytes():
+    """On-disk size of the notifications table, or None if the backend can't tell us"""
+    table = Notification._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+                return cursor.fetchone()[0]
+            except Exception:
+                return None
+    return None
+
+
+def notification_table_stats(now=None):
+    """Row counts per type and read state, oldest row and table size"""
+    now = now or timezone.now()
+    rows = Notification.objects.order_by().values('type', 'is_read').annotate(total=Count('id'))
+
+    by_type = {}
+    total = 0
+    unread = 0
+    for row in rows:
+        entry = by_type.setdefault(row['type'], {'total': 0, 'unread': 0})
+        entry['total'] += row['total']
+        total += row['total']
+        if not row['is_read']:
+            entry['unread'] += row['total']
+            unread += row['total']
+
+    oldest = Notification.objects.aggregate(oldest=Min('timestamp'))['oldest']
+
+    return {
+        'total': total,
+        'unread': unread,
+        'by_type': by_type,
+        'expired': Notification.objects.filter(expired_filter(now)).count(),
+        'oldest': oldest,
+        'table_size_bytes': table_size_bytes(),
+    }
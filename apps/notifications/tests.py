@@ -1,3 +1,88 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.core.models import Student
+from .models import Notification
+from .retention import notification_table_stats, purge_notifications
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        retention = override_settings(NOTIFICATION_RETENTION={
+            'READ_TTL_DAYS': 7,
+            'DEFAULT_TTL_DAYS': 30,
+            'TTL_DAYS': {'daily_reminder': 2},
+            'BATCH_SIZE': 2,
+            'ARCHIVE_DIR': self.archive_dir,
+        })
+        retention.enable()
+        self.addCleanup(retention.disable)
+
+        self.user = Student.objects.create(matric_number="BU1", name="Brienne")
+        self.expired = [
+            self.notify('read, 8 days old', days=8, is_read=True),
+            self.notify('reminder, 3 days old', days=3, type='daily_reminder'),
+            self.notify('unread, 31 days old', days=31),
+            self.notify('unread, 40 days old', days=40, type='score'),
+            self.notify('read, 60 days old', days=60, is_read=True, type='media'),
+        ]
+        self.kept = [
+            self.notify('read, 6 days old', days=6, is_read=True),
+            self.notify('reminder, 1 day old', days=1, type='daily_reminder'),
+            self.notify('unread, 29 days old', days=29),
+            self.notify('new', days=0),
+        ]
+
+    def notify(self, message, days, type='general', is_read=False):
+        notification = Notification.objects.create(user=self.user, message=message, type=type, is_read=is_read)
+        # timestamp is auto_now_add, so age the row afterwards
+        Notification.objects.filter(pk=notification.pk).update(timestamp=timezone.now() - timedelta(days=days))
+        return notification.pk
+
+    def remaining(self):
+        return sorted(Notification.objects.values_list('pk', flat=True))
+
+    def test_expired_rows_are_archived_then_deleted(self):
+        result = purge_notifications()
+
+        self.assertEqual((result['matched'], result['archived'], result['deleted']), (5, 5, 5))
+        self.assertEqual(self.remaining(), sorted(self.kept))
+        with gzip.open(result['archive_file'], 'rt', encoding='utf-8') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual([row['id'] for row in rows], sorted(self.expired))
+        self.assertEqual(rows[0]['message'], 'read, 8 days old')
+
+    def test_without_archive_rows_are_only_deleted(self):
+        result = purge_notifications(archive=False)
+        self.assertEqual((result['deleted'], result['archived'], result['archive_file']), (5, 0, None))
+        self.assertEqual(self.remaining(), sorted(self.kept))
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_dry_run_changes_nothing(self):
+        before = self.remaining()
+        result = purge_notifications(dry_run=True)
+
+        self.assertEqual((result['matched'], result['deleted']), (5, 0))
+        self.assertEqual(self.remaining(), before)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+        out = io.StringIO()
+        call_command('purge_notifications', '--dry-run', stdout=out)
+        self.assertIn("5 notifications would be purged", out.getvalue())
+        self.assertEqual(self.remaining(), before)
+
+    def test_stats_count_rows_past_retention(self):
+        stats = notification_table_stats()
+        self.assertEqual((stats['total'], stats['expired']), (9, 5))
+        self.assertEqual(stats['by_type']['daily_reminder'], {'total': 2, 'unread': 2})
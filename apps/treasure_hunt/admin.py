@@ -1,3 +1,26 @@
+import io
+
 from django.contrib import admin
+from django.http import HttpResponse
+
+from .models import QRCode
+from .qr_sheets import build_pages, render_tiles, write_pdf
+
+
+@admin.register(QRCode)
+class QRCodeAdmin(admin.ModelAdmin):
+    list_display = ['location_name', 'code', 'points', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['location_name', 'code']
+    actions = ['download_qr_sheets']
+
+    @admin.action(description='Download printable QR sheets (PDF)')
+    def download_qr_sheets(self, request, queryset):
+        # In-process: a web worker shouldn't fork a process pool per request
+        tiles, _ = render_tiles(list(queryset.order_by('location_name', 'id')), workers=1)
+        buffer = io.BytesIO()
+        write_pdf(build_pages(tiles, title='Evoke Treasure Hunt'), buffer)
 
-# Register your models here.
+        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+        response['Content-Disposition'] = 'attachment; filename="qr-sheets.pdf"'
+        return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TreasureHuntConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.treasure_hunt'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,127 @@
+# apps/treasure_hunt/leaderboard.py
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from apps.houses.models import House
+from .models import TreasureHuntProgress
+
+# Most points first; ties go to whoever joined the hunt first
+RANK_ORDERING = ('-total_points', 'id')
+
+LEADERBOARD_VERSION_KEY = 'treasure_hunt:leaderboard_version'
+LEADERBOARD_CACHE_TIMEOUT = 60 * 10
+
+ROW_FIELDS = (
+    'id', 'student_id', 'student__name', 'student__matric_number',
+    'student__house__name', 'student__house__crest', 'total_points', 'total_scans', 'last_scan',
+)
+
+
+def get_rank(progress):
+    """
+    1-based rank of a progress row, counting the rows strictly ahead of it.
+    Served from the (total_points, id) index, so it doesn't grow with the number of participants
+    the way walking the whole ordered table did.
+    """
+    ahead = TreasureHuntProgress.objects.filter(
+        Q(total_points__gt=progress.total_points) |
+        Q(total_points=progress.total_points, id__lt=progress.id)
+    ).count()
+    return ahead + 1
+
+
+def get_leaderboard_version():
+    version = cache.get(LEADERBOARD_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a reset key never collides with versions still in the cache
+        cache.add(LEADERBOARD_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(LEADERBOARD_VERSION_KEY)
+    return version
+
+
+def bump_leaderboard_version():
+    """Invalidate every cached leaderboard response (called after each scan)"""
+    try:
+        cache.incr(LEADERBOARD_VERSION_KEY)
+    except ValueError:
+        get_leaderboard_version()
+
+
+def _cached(name, builder):
+    key = f"treasure_hunt:leaderboard:{get_leaderboard_version()}:{name}"
+    return cache.get_or_set(key, builder, LEADERBOARD_CACHE_TIMEOUT)
+
+
+def _crest_url(name):
+    return House._meta.get_field('crest').storage.url(name) if name else ''
+
+
+def _rows(start, stop):
+    """Plain dicts for the ranked slice [start, stop) so they cache and serialise cheaply"""
+    rows = TreasureHuntProgress.objects.order_by(*RANK_ORDERING).values(*ROW_FIELDS)[start:stop]
+    return [
+        {
+            'rank': start + i,
+            'student_id': row['student_id'],
+            'name': row['student__name'],
+            'matric_number': row['student__matric_number'],
+            'house_name': row['student__house__name'] or '',
+            'house_crest': _crest_url(row['student__house__crest']),
+            'total_points': row['total_points'],
+            'total_scans': row['total_scans'],
+            'last_scan': row['last_scan'],
+        }
+        for i, row in enumerate(rows, 1)
+    ]
+
+
+def total_participants():
+    return _cached('count', TreasureHuntProgress.objects.count)
+
+
+def top_entries(limit):
+    return _cached(f'top:{limit}', lambda: _rows(0, limit))
+
+
+def page_entries(page, per_page):
+    start = (page - 1) * per_page
+    return _cached(f'page:{page}:{per_page}', lambda: _rows(start, start + per_page))
+
+
+def entries_around(progress, radius):
+    """The rows from `radius` places above the given progress row to `radius` places below it"""
+    def build():
+        rank = get_rank(progress)
+        return _rows(max(0, rank - 1 - radius), rank + radius)
+    return _cached(f'around:{progress.pk}:{radius}', build)
+
+
+def house_totals():
+    """Treasure hunt totals for every house, ranked, from a single grouped query"""
+    def build():
+        houses = House.objects.annotate(
+            total_points=Coalesce(Sum('students__treasurehuntprogress__total_points'), 0),
+            total_scans=Coalesce(Sum('students__treasurehuntprogress__total_scans'), 0),
+            participants=Count('students__treasurehuntprogress'),
+        ).order_by('-total_points', 'name').values('id', 'name', 'crest', 'total_points', 'total_scans', 'participants')
+
+        return [
+            {
+                'rank': i,
+                'id': house['id'],
+                'name': house['name'],
+                'crest_url': _crest_url(house['crest']),
+                'total_points': house['total_points'],
+                'total_scans': house['total_scans'],
+                'participants': house['participants'],
+            }
+            for i, house in enumerate(houses, 1)
+        ]
+    return _cached('houses', build)
+
+
+def mark_current_user(entries, user):
+    return [dict(entry, is_current_user=entry['student_id'] == user.pk) for entry in entries]
@@ -0,0 +1,99 @@
+# apps/treasure_hunt/management/commands/benchmark_scans.py
+import json
+import secrets
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.core.models import Student
+from apps.core.ratelimit import reset_rate_limits
+from apps.houses.models import House
+from apps.treasure_hunt.models import QRCode
+from apps.treasure_hunt.registry import registry
+from apps.treasure_hunt.views import scan_qr_code
+
+
+class Command(BaseCommand):
+    help = 'Benchmark legitimate QR scan throughput while one client floods the scan endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flood', type=int, default=2000, help='Requests sent by the flooding client')
+        parser.add_argument('--legit', type=int, default=200, help='Genuine scans from distinct students')
+
+    def handle(self, *args, **options):
+        self.factory = RequestFactory()
+        self.stdout.write(f"{options['flood']} flood requests interleaved with {options['legit']} genuine scans\n")
+        self.stdout.write(f"{'limiter':<10}{'elapsed':>10}{'scans/s':>10}{'ok':>6}{'429s':>7}{'flood queries':>15}")
+
+        for enabled in (False, True):
+            # Everything is created and rolled back inside one transaction
+            with transaction.atomic():
+                result = self.run_round(enabled, options['flood'], options['legit'])
+                transaction.set_rollback(True)
+            registry.invalidate()
+
+            self.stdout.write(
+                f"{'on' if enabled else 'off':<10}{result['elapsed']:>9.2f}s{result['throughput']:>10.1f}"
+                f"{result['legit_ok']:>6}{result['rejected']:>7}{result['flood_queries']:>15}"
+            )
+
+    def post(self, user, ip, code):
+        request = self.factory.post(
+            '/treasure-hunt/scan/', json.dumps({'qr_code': code}),
+            content_type='application/json', REMOTE_ADDR=ip,
+        )
+        request.user = user
+        return scan_qr_code(request)
+
+    def run_round(self, enabled, flood, legit):
+        house = House.objects.create(name=f"Benchmark House {secrets.token_hex(4)}")
+        codes = [
+            QRCode.objects.create(code=f"BENCH-{secrets.token_hex(8)}", clue="-", location_name=f"Spot {i}")
+            for i in range(10)
+        ]
+        students = [
+            Student.objects.create(matric_number=f"BENCH{secrets.token_hex(6)}", name=f"Hunter {i}", house=house)
+            for i in range(legit)
+        ]
+        attacker = Student.objects.create(matric_number=f"BENCH{secrets.token_hex(6)}", name="Flooder", house=house)
+
+        limits = {scope: dict(config) for scope, config in getattr(settings, 'RATE_LIMITS', {}).items()}
+        limits.setdefault('qr_scan', {})['ENABLED'] = enabled
+        limits['qr_scan']['BACKEND'] = 'memory'
+        reset_rate_limits()
+        registry.invalidate()
+
+        every = max(1, flood // max(1, legit))
+        legit_ok = rejected = flood_queries = 0
+        legit_iter = iter(enumerate(students))
+
+        with override_settings(RATE_LIMITS=limits):
+            started = time.perf_counter()
+            for i in range(flood):
+                # Half guessed codes, half replays of a real one, as a retry loop or brute force would send
+                code = secrets.token_hex(6) if i % 2 else codes[0].code
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.post(attacker, '203.0.113.9', code)
+                flood_queries += len(queries)
+                rejected += response.status_code == 429
+
+                if i % every == 0:
+                    student_index = next(legit_iter, None)
+                    if student_index is not None:
+                        n, student = student_index
+                        # Genuine hunters all come through the campus NAT
+                        response = self.post(student, '10.0.0.1', codes[n % len(codes)].code)
+                        legit_ok += json.loads(response.content).get('success', False)
+            elapsed = time.perf_counter() - started
+
+        return {
+            'elapsed': elapsed,
+            'throughput': legit_ok / elapsed if elapsed else 0,
+            'legit_ok': legit_ok,
+            'rejected': rejected,
+            'flood_queries': flood_queries,
+        }
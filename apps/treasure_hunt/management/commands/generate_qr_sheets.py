@@ -0,0 +1,44 @@
+# apps/treasure_hunt/management/commands/generate_qr_sheets.py
+import os
+
+from django.core.management.base import BaseCommand
+
+from apps.treasure_hunt.models import QRCode
+from apps.treasure_hunt.qr_sheets import build_pages, render_tiles, write_pdf, write_pngs
+
+
+class Command(BaseCommand):
+    help = 'Render active treasure hunt QR codes onto printable PDF or PNG sheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, default='qr_sheets', help='Output directory')
+        parser.add_argument('--format', choices=['pdf', 'png'], default='pdf', help='Sheet format')
+        parser.add_argument('--workers', type=int, help='Render processes (defaults to CPU count)')
+        parser.add_argument('--include-inactive', action='store_true', help='Also print inactive codes')
+
+    def handle(self, *args, **options):
+        qr_codes = QRCode.objects.order_by('location_name', 'id')
+        if not options['include_inactive']:
+            qr_codes = qr_codes.filter(is_active=True)
+        qr_codes = list(qr_codes)
+
+        if not qr_codes:
+            self.stdout.write(self.style.WARNING('No QR codes to print.'))
+            return
+
+        tiles, rendered = render_tiles(qr_codes, workers=options['workers'])
+        self.stdout.write(f"{len(qr_codes)} codes: rendered {rendered}, reused {len(qr_codes) - rendered} from cache")
+
+        pages = build_pages(tiles, title='Evoke Treasure Hunt')
+        output = options['output']
+        if options['format'] == 'pdf':
+            os.makedirs(output, exist_ok=True)
+            path = os.path.join(output, 'qr-sheets.pdf')
+            with open(path, 'wb') as stream:
+                write_pdf(pages, stream)
+            paths = [path]
+        else:
+            paths = write_pngs(pages, output)
+
+        for path in paths:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
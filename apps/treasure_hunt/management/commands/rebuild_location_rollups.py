@@ -0,0 +1,12 @@
+# apps/treasure_hunt/management/commands/rebuild_location_rollups.py
+from django.core.management.base import BaseCommand
+
+from apps.treasure_hunt.rollup import rebuild_location_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-location treasure hunt analytics from the scan history'
+
+    def handle(self, *args, **options):
+        locations = rebuild_location_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {locations} locations"))
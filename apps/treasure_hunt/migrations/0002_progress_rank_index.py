@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treasure_hunt', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treasurehuntprogress',
+            index=models.Index(fields=['-total_points', 'id'], name='treasure_hu_total_p_2cb32d_idx'),
+        ),
+    ]
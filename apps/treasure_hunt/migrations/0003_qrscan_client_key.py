@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:11
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treasure_hunt', '0002_progress_rank_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qrscan',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='qrscan',
+            name='scanned_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='qrscan',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_key__isnull', False)), fields=('student', 'client_key'), name='unique_scan_client_key'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('houses', '0004_house_whatsapp_link'),
+        ('treasure_hunt', '0003_qrscan_client_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_scans', models.IntegerField(default=0)),
+                ('first_found_at', models.DateTimeField(blank=True, null=True)),
+                ('last_scanned_at', models.DateTimeField(blank=True, null=True)),
+                ('first_finder', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='first_finds', to=settings.AUTH_USER_MODEL)),
+                ('qr_code', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='treasure_hunt.qrcode')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LocationHouseCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scans', models.IntegerField(default=0)),
+                ('house', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='houses.house')),
+                ('qr_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='house_counts', to='treasure_hunt.qrcode')),
+            ],
+            options={
+                'unique_together': {('qr_code', 'house')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LocationScanBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('scans', models.IntegerField(default=0)),
+                ('qr_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_buckets', to='treasure_hunt.qrcode')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'unique_together': {('qr_code', 'bucket_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:02
+
+from datetime import timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    QRScan = apps.get_model('treasure_hunt', 'QRScan')
+    LocationStats = apps.get_model('treasure_hunt', 'LocationStats')
+    LocationHouseCount = apps.get_model('treasure_hunt', 'LocationHouseCount')
+    LocationScanBucket = apps.get_model('treasure_hunt', 'LocationScanBucket')
+
+    # Same as rebuild_location_rollups(), against the models as of this migration
+    LocationStats.objects.all().delete()
+    LocationHouseCount.objects.all().delete()
+    LocationScanBucket.objects.all().delete()
+
+    stats = {
+        row['qr_code_id']: LocationStats(
+            qr_code_id=row['qr_code_id'], total_scans=row['total'],
+            first_found_at=row['first'], last_scanned_at=row['last'],
+        )
+        for row in QRScan.objects.values('qr_code_id').annotate(
+            total=Count('id'), first=Min('scanned_at'), last=Max('scanned_at')
+        )
+    }
+    for scan in QRScan.objects.order_by('qr_code_id', 'scanned_at', 'id').values(
+            'qr_code_id', 'student_id', 'scanned_at'):
+        entry = stats[scan['qr_code_id']]
+        if entry.first_finder_id is None and scan['scanned_at'] == entry.first_found_at:
+            entry.first_finder_id = scan['student_id']
+    LocationStats.objects.bulk_create(stats.values(), batch_size=500)
+
+    LocationHouseCount.objects.bulk_create([
+        LocationHouseCount(qr_code_id=row['qr_code_id'], house_id=row['student__house_id'], scans=row['total'])
+        for row in QRScan.objects.filter(student__house__isnull=False)
+        .values('qr_code_id', 'student__house_id').annotate(total=Count('id'))
+    ], batch_size=500)
+
+    LocationScanBucket.objects.bulk_create([
+        LocationScanBucket(qr_code_id=row['qr_code_id'], bucket_start=row['hour'], scans=row['total'])
+        for row in QRScan.objects.annotate(hour=TruncHour('scanned_at', tzinfo=dt_timezone.utc))
+        .values('qr_code_id', 'hour').annotate(total=Count('id'))
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treasure_hunt', '0004_location_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
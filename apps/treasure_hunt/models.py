@@ -1,7 +1,7 @@
-from datetime import timezone
-
 from django.db import models
 from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
 
 
 class QRCode(models.Model):
@@ -19,10 +19,20 @@ class QRCode(models.Model):
 class QRScan(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     qr_code = models.ForeignKey(QRCode, on_delete=models.CASCADE)
-    scanned_at = models.DateTimeField(auto_now_add=True)
+    # Defaults to now, but offline scans carry the time they were taken on the phone
+    scanned_at = models.DateTimeField(default=timezone.now)
+    # Idempotency key sent by the client with queued offline scans
+    client_key = models.CharField(max_length=64, blank=True, null=True)
 
     class Meta:
         unique_together = ['student', 'qr_code']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'client_key'],
+                condition=models.Q(client_key__isnull=False),
+                name='unique_scan_client_key',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.name} scanned {self.qr_code.location_name}"
@@ -34,8 +44,50 @@ class TreasureHuntProgress(models.Model):
     total_points = models.IntegerField(default=0)
     last_scan = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Backs leaderboard ordering and rank lookups
+            models.Index(fields=['-total_points', 'id']),
+        ]
+
     def update_progress(self, qr_code):
-        self.total_scans += 1
-        self.total_points += qr_code.points
+        # Increment in the database so concurrent scans don't overwrite each other
         self.last_scan = timezone.now()
-        self.save()
\ No newline at end of file
+        TreasureHuntProgress.objects.filter(pk=self.pk).update(
+            total_scans=F('total_scans') + 1,
+            total_points=F('total_points') + qr_code.points,
+            last_scan=self.last_scan,
+        )
+        self.refresh_from_db(fields=['total_scans', 'total_points'])
+
+# Per-location rollups, kept up to date by the scan path (see rollup.py)
+
+class LocationStats(models.Model):
+    qr_code = models.OneToOneField(QRCode, on_delete=models.CASCADE, related_name='stats')
+    total_scans = models.IntegerField(default=0)
+    first_finder = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='first_finds')
+    first_found_at = models.DateTimeField(null=True, blank=True)
+    last_scanned_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.qr_code.location_name}: {self.total_scans} scans"
+
+
+class LocationHouseCount(models.Model):
+    qr_code = models.ForeignKey(QRCode, on_delete=models.CASCADE, related_name='house_counts')
+    house = models.ForeignKey('houses.House', on_delete=models.CASCADE)
+    scans = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['qr_code', 'house']
+
+
+class LocationScanBucket(models.Model):
+    qr_code = models.ForeignKey(QRCode, on_delete=models.CASCADE, related_name='scan_buckets')
+    bucket_start = models.DateTimeField()
+    scans = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['qr_code', 'bucket_start']
+        ordering = ['bucket_start']
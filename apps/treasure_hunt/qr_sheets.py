@@ -0,0 +1,180 @@
+# apps/treasure_hunt/qr_sheets.py
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import qrcode
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+# Bump when the tile layout changes so cached renders are not reused
+RENDER_VERSION = 1
+
+TILE_SIZE = 360
+LABEL_HEIGHT = 60
+# A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 40
+COLUMNS = 3
+ROWS = 4
+
+
+TILE_MODE = 0o644
+
+
+def get_cache_dir():
+    default = os.path.join(tempfile.gettempdir(), 'evoke-qr-cache')
+    return str(getattr(settings, 'QR_SHEET_CACHE_DIR', None) or default)
+
+
+def _usable_dir(path):
+    """Create the cache directory if needed; False when it can't be written (read-only deploys)"""
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(path, os.W_OK)
+
+
+def cache_key(code, label):
+    content = f"{RENDER_VERSION}\0{code}\0{label}".encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow built without FreeType
+        return ImageFont.load_default()
+
+
+def _fit_label(draw, label, font, width):
+    while label and draw.textlength(label, font=font) > width:
+        label = label[:-2] + '…'
+    return label
+
+
+def render_tile(code, label):
+    """PNG bytes of one QR code with its location label underneath"""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=2)
+    qr.add_data(code)
+    qr.make(fit=True)
+    qr_image = qr.make_image(fill_color='black', back_color='white').convert('RGB')
+    qr_image = qr_image.resize((TILE_SIZE, TILE_SIZE), Image.NEAREST)
+
+    tile = Image.new('RGB', (TILE_SIZE, TILE_SIZE + LABEL_HEIGHT), 'white')
+    tile.paste(qr_image, (0, 0))
+
+    draw = ImageDraw.Draw(tile)
+    font = _font(24)
+    text = _fit_label(draw, label, font, TILE_SIZE - 20)
+    text_width = draw.textlength(text, font=font)
+    draw.text(((TILE_SIZE - text_width) / 2, TILE_SIZE + 12), text, fill='black', font=font)
+
+    buffer = io.BytesIO()
+    tile.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _render_to_file(args):
+    code, label, path = args
+    data = render_tile(code, label)
+    # Write then rename so a concurrent reader never sees half a file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(data)
+    os.replace(tmp_path, path)
+    # mkstemp creates files as 0600; tiles are shared with whoever serves or prints them
+    os.chmod(path, TILE_MODE)
+    return path
+
+
+def _render_in_memory(qr_codes):
+    """Tiles as in-memory PNGs for when there is no writable cache directory"""
+    rendered = {}
+    for qr_code in qr_codes:
+        key = cache_key(qr_code.code, qr_code.location_name)
+        if key not in rendered:
+            rendered[key] = render_tile(qr_code.code, qr_code.location_name)
+    tiles = [io.BytesIO(rendered[cache_key(qr_code.code, qr_code.location_name)]) for qr_code in qr_codes]
+    return tiles, len(rendered)
+
+
+def render_tiles(qr_codes, cache_dir=None, workers=None):
+    """
+    Render a tile per QR code, reusing cached renders keyed by code content and label.
+    Only cache misses are rendered, spread over a process pool when workers > 1.
+    Returns (tiles in the same order as qr_codes, number of tiles rendered); tiles
+    are file paths, or in-memory PNGs when the cache directory can't be written.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    if not _usable_dir(cache_dir):
+        return _render_in_memory(qr_codes)
+
+    paths = []
+    missing = []
+    for qr_code in qr_codes:
+        path = os.path.join(cache_dir, f"{cache_key(qr_code.code, qr_code.location_name)}.png")
+        paths.append(path)
+        if not os.path.exists(path):
+            missing.append((qr_code.code, qr_code.location_name, path))
+
+    # Drop repeats so two codes with the same content aren't rendered twice
+    missing = list({job[2]: job for job in missing}.values())
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(missing) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+                list(pool.map(_render_to_file, missing))
+        except (BrokenProcessPool, NotImplementedError, OSError):
+            # No process pool here (e.g. serverless without /dev/shm); render what's left in-process
+            pass
+    for job in missing:
+        if not os.path.exists(job[2]):
+            _render_to_file(job)
+
+    return paths, len(missing)
+
+
+def build_pages(tile_paths, title=''):
+    """Lay tiles (paths or PNG file objects) out on A4 pages, COLUMNS x ROWS per page"""
+    per_page = COLUMNS * ROWS
+    cell_width = (PAGE_SIZE[0] - 2 * PAGE_MARGIN) // COLUMNS
+    cell_height = (PAGE_SIZE[1] - 2 * PAGE_MARGIN - 40) // ROWS
+    font = _font(28)
+
+    pages = []
+    for start in range(0, len(tile_paths), per_page):
+        page = Image.new('RGB', PAGE_SIZE, 'white')
+        draw = ImageDraw.Draw(page)
+        if title:
+            draw.text((PAGE_MARGIN, PAGE_MARGIN - 10), title, fill='black', font=font)
+
+        for i, path in enumerate(tile_paths[start:start + per_page]):
+            with Image.open(path) as tile:
+                row, column = divmod(i, COLUMNS)
+                x = PAGE_MARGIN + column * cell_width + (cell_width - tile.width) // 2
+                y = PAGE_MARGIN + 40 + row * cell_height + (cell_height - tile.height) // 2
+                page.paste(tile, (x, y))
+        pages.append(page)
+    return pages
+
+
+def write_pdf(pages, stream):
+    if pages:
+        pages[0].save(stream, format='PDF', resolution=150, save_all=True, append_images=pages[1:])
+
+
+def write_pngs(pages, output_dir, prefix='qr-sheet'):
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for number, page in enumerate(pages, 1):
+        path = os.path.join(output_dir, f"{prefix}-{number:02d}.png")
+        page.save(path, format='PNG')
+        paths.append(path)
+    return paths
@@ -0,0 +1,68 @@
+# apps/treasure_hunt/registry.py
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import QRCode
+
+REGISTRY_VERSION_KEY = 'treasure_hunt:qr_registry_version'
+
+
+class QRCodeRegistry:
+    """
+    Process-local map of active QR codes keyed by code string.
+
+    The codes are loaded lazily on first use and kept in memory. Saving or
+    deleting a QRCode bumps a version key in the shared cache, and every worker
+    reloads its copy the next time it sees a version it didn't load.
+    Note: queryset.update() skips signals, so call invalidate() after bulk edits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = None
+        self._version = None
+
+    def current_version(self):
+        version = cache.get(REGISTRY_VERSION_KEY)
+        if version is None:
+            cache.add(REGISTRY_VERSION_KEY, int(time.time() * 1000), None)
+            version = cache.get(REGISTRY_VERSION_KEY)
+        return version
+
+    def _get_codes(self):
+        version = self.current_version()
+        codes = self._codes
+        if codes is not None and self._version == version:
+            return codes
+
+        with self._lock:
+            if self._codes is None or self._version != version:
+                self._codes = {
+                    qr_code.code: qr_code
+                    for qr_code in QRCode.objects.filter(is_active=True).order_by('id')
+                }
+                self._version = version
+            return self._codes
+
+    def get(self, code):
+        """The active QRCode for this code string, or None"""
+        return self._get_codes().get(code)
+
+    def all(self):
+        return list(self._get_codes().values())
+
+    def count(self):
+        return len(self._get_codes())
+
+    def invalidate(self):
+        try:
+            cache.incr(REGISTRY_VERSION_KEY)
+        except ValueError:
+            self.current_version()
+        with self._lock:
+            self._codes = None
+
+
+registry = QRCodeRegistry()
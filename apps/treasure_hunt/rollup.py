@@ -0,0 +1,160 @@
+# apps/treasure_hunt/rollup.py
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest, TruncHour
+
+from .models import LocationHouseCount, LocationScanBucket, LocationStats, QRCode, QRScan
+
+
+# Advisory lock key shared by the scan path (shared) and rebuilds (exclusive)
+ROLLUP_LOCK_ID = 0x45564B52  # 'EVKR'
+
+
+def lock_rollups(shared=False):
+    """
+    Hold the rollup lock until the current transaction ends. Scans take it shared,
+    so they never wait on each other; a rebuild takes it exclusively, so no scan can
+    slip in between the rebuild reading QRScan and writing the rollups back.
+    Only PostgreSQL needs it: SQLite already runs one write transaction at a time.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {function}(%s)', [ROLLUP_LOCK_ID])
+
+
+def bucket_start(scanned_at):
+    """Scans are counted per hour (UTC)"""
+    return scanned_at.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def record_location_scans(student, scans):
+    """
+    Fold new scans into the per-location rollups. `scans` is a list of
+    (qr_code_id, scanned_at) pairs for one student, each code at most once.
+
+    Like the rest of the scan path this is insert-ignore plus F() increments,
+    and must run inside the scan transaction.
+    """
+    if not scans:
+        return
+    lock_rollups(shared=True)
+
+    code_ids = [code_id for code_id, _ in scans]
+    by_bucket = defaultdict(list)
+    for code_id, scanned_at in scans:
+        by_bucket[bucket_start(scanned_at)].append(code_id)
+    latest = max(scanned_at for _, scanned_at in scans)
+
+    LocationStats.objects.bulk_create(
+        [LocationStats(qr_code_id=code_id) for code_id in code_ids], ignore_conflicts=True
+    )
+    LocationStats.objects.filter(qr_code_id__in=code_ids).update(
+        total_scans=F('total_scans') + 1,
+        last_scanned_at=Greatest(Coalesce('last_scanned_at', Value(latest)), Value(latest)),
+    )
+    # Only claims the spot if nobody (or a later offline scan) got there first
+    for code_id, scanned_at in scans:
+        LocationStats.objects.filter(qr_code_id=code_id).filter(
+            Q(first_found_at__isnull=True) | Q(first_found_at__gt=scanned_at)
+        ).update(first_finder_id=student.pk, first_found_at=scanned_at)
+
+    if student.house_id:
+        LocationHouseCount.objects.bulk_create(
+            [LocationHouseCount(qr_code_id=code_id, house_id=student.house_id) for code_id in code_ids],
+            ignore_conflicts=True
+        )
+        LocationHouseCount.objects.filter(qr_code_id__in=code_ids, house_id=student.house_id).update(
+            scans=F('scans') + 1
+        )
+
+    LocationScanBucket.objects.bulk_create(
+        [
+            LocationScanBucket(qr_code_id=code_id, bucket_start=start)
+            for start, ids in by_bucket.items() for code_id in ids
+        ],
+        ignore_conflicts=True
+    )
+    for start, ids in by_bucket.items():
+        LocationScanBucket.objects.filter(qr_code_id__in=ids, bucket_start=start).update(scans=F('scans') + 1)
+
+
+def rebuild_location_rollups():
+    """
+    Recompute every rollup from QRScan (backfill, or repair after manual edits).
+    Runs in one transaction under the exclusive rollup lock, so scans recorded
+    meanwhile are either counted by the rebuild or applied on top of it, never both.
+    """
+    with transaction.atomic():
+        lock_rollups()
+        LocationStats.objects.all().delete()
+        LocationHouseCount.objects.all().delete()
+        LocationScanBucket.objects.all().delete()
+
+        totals = QRScan.objects.values('qr_code_id').annotate(
+            total=Count('id'), first=Min('scanned_at'), last=Max('scanned_at')
+        )
+        stats = {
+            row['qr_code_id']: LocationStats(
+                qr_code_id=row['qr_code_id'], total_scans=row['total'],
+                first_found_at=row['first'], last_scanned_at=row['last'],
+            )
+            for row in totals
+        }
+        for scan in QRScan.objects.order_by('qr_code_id', 'scanned_at', 'id').values(
+                'qr_code_id', 'student_id', 'scanned_at'):
+            entry = stats[scan['qr_code_id']]
+            if entry.first_finder_id is None and scan['scanned_at'] == entry.first_found_at:
+                entry.first_finder_id = scan['student_id']
+        LocationStats.objects.bulk_create(stats.values(), batch_size=500)
+
+        LocationHouseCount.objects.bulk_create([
+            LocationHouseCount(qr_code_id=row['qr_code_id'], house_id=row['student__house_id'], scans=row['total'])
+            for row in QRScan.objects.filter(student__house__isnull=False)
+            .values('qr_code_id', 'student__house_id').annotate(total=Count('id'))
+        ], batch_size=500)
+
+        LocationScanBucket.objects.bulk_create([
+            LocationScanBucket(qr_code_id=row['qr_code_id'], bucket_start=row['hour'], scans=row['total'])
+            for row in QRScan.objects.annotate(hour=TruncHour('scanned_at', tzinfo=dt_timezone.utc))
+            .values('qr_code_id', 'hour').annotate(total=Count('id'))
+        ], batch_size=500)
+
+    return len(stats)
+
+
+def location_report():
+    """
+    One entry per QR code with its totals, first finder, per-house counts and
+    hourly buckets. Three queries regardless of how many scans there are.
+    """
+    codes = QRCode.objects.select_related(
+        'stats', 'stats__first_finder', 'stats__first_finder__house'
+    ).order_by('location_name')
+
+    house_counts = defaultdict(list)
+    for row in LocationHouseCount.objects.select_related('house').order_by('-scans', 'house__name'):
+        house_counts[row.qr_code_id].append({'house': row.house.name, 'scans': row.scans})
+
+    buckets = defaultdict(list)
+    for row in LocationScanBucket.objects.order_by('bucket_start').values('qr_code_id', 'bucket_start', 'scans'):
+        buckets[row['qr_code_id']].append({'start': row['bucket_start'], 'scans': row['scans']})
+
+    report = []
+    for qr_code in codes:
+        stats = getattr(qr_code, 'stats', None)
+        report.append({
+            'qr_code': qr_code,
+            'total_scans': stats.total_scans if stats else 0,
+            'first_finder': stats.first_finder if stats else None,
+            'first_found_at': stats.first_found_at if stats else None,
+            'last_scanned_at': stats.last_scanned_at if stats else None,
+            'houses': house_counts[qr_code.pk],
+            'buckets': buckets[qr_code.pk],
+            'peak_scans': max((b['scans'] for b in buckets[qr_code.pk]), default=0),
+        })
+    return report
@@ -0,0 +1,245 @@
+# apps/treasure_hunt/scanning.py
+import uuid
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.fragment_cache import bump_model_version
+from apps.core.page_cache import bump_page_version
+from apps.events.models import Event, Score
+from apps.houses.analytics import forget_house_analytics
+from .leaderboard import bump_leaderboard_version
+from .models import QRScan, TreasureHuntProgress
+from .registry import registry
+from .rollup import record_location_scans
+
+TREASURE_EVENT_TITLE = Event.TREASURE_HUNT_TITLE
+TREASURE_EVENT_CACHE_KEY = 'treasure_hunt:event_id'
+
+# Offline scans older than this are credited at the edge of the window
+OFFLINE_SCAN_MAX_AGE = timedelta(hours=12)
+MAX_BATCH_SIZE = 50
+
+
+def get_treasure_event_id():
+    """
+    Resolve the Treasure Hunt event once and keep its id in the cache.
+    Its title is unique, so first scans racing to create it all end up with the same row.
+    """
+    event_id = cache.get(TREASURE_EVENT_CACHE_KEY)
+    if event_id is None:
+        event, _ = Event.objects.get_or_create(
+            title=TREASURE_EVENT_TITLE,
+            defaults={
+                'description': 'QR Code Treasure Hunt',
+                'day': timezone.localdate(),
+                'time': timezone.localtime().time(),
+                'type': 'treasure',
+            },
+        )
+        event_id = event.pk
+        cache.set(TREASURE_EVENT_CACHE_KEY, event_id, None)
+    return event_id
+
+
+def clear_treasure_event_cache():
+    cache.delete(TREASURE_EVENT_CACHE_KEY)
+
+
+def _insert_scan(student_id, qr_code_id, scanned_at):
+    """
+    Insert a QRScan unless (student, qr_code) already exists.
+    Returns True if this call created the row.
+    """
+    if connection.vendor in ('postgresql', 'sqlite'):
+        table = connection.ops.quote_name(QRScan._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (student_id, qr_code_id, scanned_at) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (student_id, qr_code_id) DO NOTHING RETURNING id",
+                [student_id, qr_code_id, connection.ops.adapt_datetimefield_value(scanned_at)]
+            )
+            return cursor.fetchone() is not None
+
+    # Other backends: let the unique constraint decide inside a savepoint
+    try:
+        with transaction.atomic():
+            QRScan.objects.create(student_id=student_id, qr_code_id=qr_code_id)
+        return True
+    except IntegrityError:
+        return False
+
+
+def _insert_scans(scans):
+    """
+    Insert QRScans, skipping any that clash with a stored (student, code) or (student, key).
+    Returns the qr_code ids this statement inserted. They come from the insert itself, so
+    rows committed meanwhile by a concurrent resend of the same batch are never counted as ours.
+    """
+    if not scans:
+        return set()
+
+    if connection.vendor in ('postgresql', 'sqlite'):
+        table = connection.ops.quote_name(QRScan._meta.db_table)
+        params = []
+        for scan in scans:
+            params += [scan.student_id, scan.qr_code_id, scan.client_key,
+                       connection.ops.adapt_datetimefield_value(scan.scanned_at)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (student_id, qr_code_id, client_key, scanned_at) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(scans))} "
+                f"ON CONFLICT DO NOTHING RETURNING qr_code_id",
+                params
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    # Other backends: let the unique constraints decide row by row inside savepoints
+    inserted = set()
+    for scan in scans:
+        try:
+            with transaction.atomic():
+                scan.save(force_insert=True)
+            inserted.add(scan.qr_code_id)
+        except IntegrityError:
+            pass
+    return inserted
+
+
+def _credit(student, event_id, scans, points, last_scan):
+    """F() increments for the student's progress and their house's treasure score row"""
+    TreasureHuntProgress.objects.bulk_create(
+        [TreasureHuntProgress(student=student)], ignore_conflicts=True
+    )
+    TreasureHuntProgress.objects.filter(student=student).update(
+        total_scans=F('total_scans') + scans,
+        total_points=F('total_points') + points,
+        last_scan=Greatest(Coalesce('last_scan', Value(last_scan)), Value(last_scan)),
+    )
+
+    # Accumulate into the house's single treasure hunt score row
+    if event_id:
+        Score.objects.bulk_create(
+            [Score(event_id=event_id, house_id=student.house_id, points=0)], ignore_conflicts=True
+        )
+        Score.objects.filter(event_id=event_id, house_id=student.house_id).update(
+            points=F('points') + points
+        )
+        house_id = student.house_id
+        transaction.on_commit(lambda: forget_house_analytics([house_id]))
+        transaction.on_commit(lambda: bump_model_version('events.score'))
+
+    transaction.on_commit(bump_leaderboard_version)
+    # Score rows move with update(), which sends no signals
+    transaction.on_commit(bump_page_version)
+    return TreasureHuntProgress.objects.filter(
+        student=student
+    ).values_list('total_points', flat=True).get()
+
+
+def record_scan(student, qr_code):
+    """
+    Record a scan and credit the student and their house in one short transaction.
+
+    Every write is either an insert that ignores conflicts or an F() increment,
+    so simultaneous scans of the same code never duplicate work or lose updates.
+    Returns (created, total_points); created is False if the student had
+    already scanned this code.
+    """
+    now = timezone.now()
+    event_id = get_treasure_event_id() if student.house_id else None
+
+    with transaction.atomic():
+        if not _insert_scan(student.pk, qr_code.pk, now):
+            total_points = TreasureHuntProgress.objects.filter(
+                student=student
+            ).values_list('total_points', flat=True).first()
+            return False, total_points or 0
+
+        total_points = _credit(student, event_id, 1, qr_code.points, now)
+        record_location_scans(student, [(qr_code.pk, now)])
+
+    return True, total_points
+
+
+def _clamp_scan_time(value, now):
+    """Trust the phone's clock only within the offline window, never in the future"""
+    scanned_at = parse_datetime(value) if isinstance(value, str) else None
+    if scanned_at is None:
+        return now
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at, dt_timezone.utc)
+    return min(max(scanned_at, now - OFFLINE_SCAN_MAX_AGE), now)
+
+
+def record_scan_batch(student, items):
+    """
+    Record a batch of queued offline scans in one transaction.
+
+    `items` are dicts with 'qr_code', 'key' (client idempotency key) and
+    'scanned_at' (ISO timestamp taken on the phone). New scans are written
+    with a single INSERT .. ON CONFLICT DO NOTHING and credited with one set of F() increments.
+    Returns (results, total_points) where results has one entry per item with
+    status 'recorded', 'duplicate' or 'invalid'. Resending a batch is safe:
+    items whose key was already stored come back as 'recorded' again.
+    """
+    now = timezone.now()
+    results = []
+    pending = {}  # qr_code id -> (item index, QRScan)
+    seen_keys = set()
+
+    for index, item in enumerate(items):
+        code = str(item.get('qr_code') or '')
+        key = str(item.get('key') or '')[:64] or uuid.uuid4().hex
+        qr_code = registry.get(code)
+        results.append({'key': key, 'qr_code': code, 'status': 'invalid', 'points': 0})
+        if qr_code is None:
+            continue
+        # A key names one scan, so a second item with it (or a second scan of the code) is a duplicate
+        if qr_code.pk in pending or key in seen_keys:
+            results[index]['status'] = 'duplicate'
+            continue
+        seen_keys.add(key)
+        pending[qr_code.pk] = (index, QRScan(
+            student=student, qr_code=qr_code, client_key=key,
+            scanned_at=_clamp_scan_time(item.get('scanned_at'), now),
+        ))
+
+    event_id = get_treasure_event_id() if student.house_id and pending else None
+
+    with transaction.atomic():
+        inserted = _insert_scans([scan for _, scan in pending.values()])
+        # Anything not inserted is either a replay of this batch (same code and key) or a duplicate
+        stored = set(QRScan.objects.filter(
+            student=student, qr_code_id__in=[code_id for code_id in pending if code_id not in inserted]
+        ).values_list('qr_code_id', 'client_key')) if len(inserted) < len(pending) else set()
+
+        points = 0
+        last_scan = None
+        for code_id, (index, scan) in pending.items():
+            if code_id in inserted:
+                results[index].update(status='recorded', points=scan.qr_code.points)
+                points += scan.qr_code.points
+                last_scan = max(last_scan or scan.scanned_at, scan.scanned_at)
+            elif (code_id, scan.client_key) in stored:
+                # Replay of a batch we already processed
+                results[index]['status'] = 'recorded'
+            else:
+                results[index]['status'] = 'duplicate'
+
+        if inserted:
+            total_points = _credit(student, event_id, len(inserted), points, last_scan)
+            record_location_scans(student, [
+                (code_id, scan.scanned_at) for code_id, (_, scan) in pending.items() if code_id in inserted
+            ])
+        else:
+            total_points = TreasureHuntProgress.objects.filter(
+                student=student
+            ).values_list('total_points', flat=True).first() or 0
+
+    return results, total_points
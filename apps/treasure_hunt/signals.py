@@ -0,0 +1,22 @@
+# apps/treasure_hunt/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.events.models import Event
+from .models import QRCode
+from .registry import registry
+from .scanning import clear_treasure_event_cache
+
+
+@receiver(post_delete, sender=Event)
+def forget_treasure_event(sender, instance, **kwargs):
+    if instance.type == 'treasure':
+        clear_treasure_event_cache()
+
+
+@receiver(post_save, sender=QRCode)
+@receiver(post_delete, sender=QRCode)
+def refresh_qr_registry(sender, instance, **kwargs):
+    # After commit, or another worker could reload the old set of codes under the new version
+    transaction.on_commit(registry.invalidate)
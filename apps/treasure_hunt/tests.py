@@ -1,3 +1,527 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from apps.core.models import Student
+from apps.core.ratelimit import _memory_store, reset_rate_limits
+from apps.events.models import Event, Score
+from apps.houses.models import House
+from .models import LocationHouseCount, LocationScanBucket, LocationStats, QRCode, QRScan, TreasureHuntProgress
+from . import leaderboard, qr_sheets, rollup
+from .leaderboard import get_rank
+from .qr_sheets import build_pages, render_tiles, write_pdf
+from .registry import registry
+from .rollup import location_report, rebuild_location_rollups
+from .scanning import clear_treasure_event_cache, record_scan, record_scan_batch
+
+
+def run_concurrently(target, args_list):
+    """Start one thread per args tuple, release them together and collect results"""
+    barrier = threading.Barrier(len(args_list))
+    results = []
+    errors = []
+
+    def worker(*args):
+        try:
+            barrier.wait()
+            for attempt in range(50):
+                try:
+                    results.append(target(*args))
+                    break
+                except OperationalError:
+                    # SQLite serialises writers with "database is locked"; retry like a client would
+                    if attempt == 49:
+                        raise
+                    time.sleep(0.005 * (attempt + 1))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=args) for args in args_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class RecordScanTests(TestCase):
+    def setUp(self):
+        clear_treasure_event_cache()
+        self.house = House.objects.create(name="House Stark of Winterfell")
+        self.student = Student.objects.create(matric_number="BU1", name="Arya", house=self.house)
+        self.qr_code = QRCode.objects.create(code="GODSWOOD", clue="Under the weirwood", points=10,
+                                             location_name="Godswood")
+
+    def test_second_scan_is_ignored(self):
+        self.assertEqual(record_scan(self.student, self.qr_code), (True, 10))
+        self.assertEqual(record_scan(self.student, self.qr_code), (False, 10))
+
+        self.assertEqual(QRScan.objects.count(), 1)
+        progress = TreasureHuntProgress.objects.get(student=self.student)
+        self.assertEqual((progress.total_scans, progress.total_points), (1, 10))
+
+    def test_house_scores_accumulate_into_one_row(self):
+        other = QRCode.objects.create(code="CRYPT", clue="Below", points=5, location_name="Crypts")
+        teammate = Student.objects.create(matric_number="BU2", name="Bran", house=self.house)
+
+        record_scan(self.student, self.qr_code)
+        record_scan(self.student, other)
+        record_scan(teammate, self.qr_code)
+
+        score = Score.objects.get(house=self.house)
+        self.assertEqual(score.points, 25)
+        self.assertEqual(score.event.type, 'treasure')
+
+
+class RankTests(TestCase):
+    def test_rank_counts_rows_ahead_and_breaks_ties_by_join_order(self):
+        points = [30, 50, 30, 10]
+        progress = [
+            TreasureHuntProgress.objects.create(
+                student=Student.objects.create(matric_number=f"BU{i}", name=f"Hunter {i}"),
+                total_points=p,
+            )
+            for i, p in enumerate(points)
+        ]
+
+        self.assertEqual([get_rank(p) for p in progress], [2, 1, 3, 4])
+
+
+class ScanBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_treasure_event_cache()
+        registry.invalidate()
+        reset_rate_limits()
+        self.house = House.objects.create(name="House Targaryen of Dragonstone")
+        self.student = Student.objects.create(matric_number="BU1", name="Daenerys", house=self.house)
+        self.codes = [
+            QRCode.objects.create(code=f"EGG{i}", clue="Fire", points=10 * (i + 1), location_name=f"Egg {i}")
+            for i in range(3)
+        ]
+
+    def test_batch_is_recorded_once_and_replays_are_idempotent(self):
+        record_scan(self.student, self.codes[0])
+        items = [
+            {'qr_code': 'EGG0', 'key': 'a', 'scanned_at': '2020-01-01T10:00:00Z'},
+            {'qr_code': 'EGG1', 'key': 'b', 'scanned_at': '2999-01-01T10:00:00Z'},
+            {'qr_code': 'EGG2', 'key': 'c'},
+            {'qr_code': 'EGG2', 'key': 'd'},
+            {'qr_code': 'NOPE', 'key': 'e'},
+        ]
+
+        results, total = record_scan_batch(self.student, items)
+        self.assertEqual([r['status'] for r in results],
+                         ['duplicate', 'recorded', 'recorded', 'duplicate', 'invalid'])
+        self.assertEqual(total, 60)
+        self.assertEqual(Score.objects.get(house=self.house).points, 60)
+
+        # The phone never saw the response and sends the same batch again
+        results, total = record_scan_batch(self.student, items)
+        self.assertEqual([r['status'] for r in results],
+                         ['duplicate', 'recorded', 'recorded', 'duplicate', 'invalid'])
+        self.assertEqual(total, 60)
+        self.assertEqual(QRScan.objects.filter(student=self.student).count(), 3)
+        self.assertEqual(TreasureHuntProgress.objects.get(student=self.student).total_scans, 3)
+
+        # Client clocks are clamped to the offline window, never in the future
+        self.assertLessEqual(QRScan.objects.get(client_key='b').scanned_at, timezone.now())
+
+    def test_repeated_keys_are_never_credited_twice(self):
+        items = [{'qr_code': 'EGG0', 'key': 'k'}, {'qr_code': 'EGG1', 'key': 'k'}]
+        for _ in range(4):
+            results, total = record_scan_batch(self.student, items)
+            self.assertEqual([r['status'] for r in results], ['recorded', 'duplicate'])
+            self.assertEqual(total, 10)
+
+        # A later batch reusing the stored key for another code doesn't re-credit the first one
+        results, total = record_scan_batch(self.student, [
+            {'qr_code': 'EGG0', 'key': 'k'}, {'qr_code': 'EGG2', 'key': 'k'},
+        ])
+        self.assertEqual([r['status'] for r in results], ['recorded', 'duplicate'])
+        self.assertEqual(total, 10)
+        self.assertEqual(Score.objects.get(house=self.house).points, 10)
+        self.assertEqual(TreasureHuntProgress.objects.get(student=self.student).total_scans, 1)
+
+    def test_endpoint(self):
+        self.client.force_login(self.student, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.post(reverse('treasure_hunt:scan_batch'),
+                                    json.dumps({'scans': [{'qr_code': 'EGG1', 'key': 'x'}]}),
+                                    content_type='application/json')
+        self.assertEqual(response.json()['recorded'], 1)
+
+        response = self.client.post(reverse('treasure_hunt:scan_batch'), json.dumps({'scans': 'nope'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class LocationRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_treasure_event_cache()
+        registry.invalidate()
+        self.stark = House.objects.create(name="House Stark of Winterfell")
+        self.greyjoy = House.objects.create(name="House Greyjoy of Pyke")
+        self.codes = [
+            QRCode.objects.create(code=f"SPOT{i}", clue="-", points=10, location_name=f"Spot {i}") for i in range(3)
+        ]
+        self.jon = Student.objects.create(matric_number="BU1", name="Jon", house=self.stark)
+        self.theon = Student.objects.create(matric_number="BU2", name="Theon", house=self.greyjoy)
+
+    def snapshot(self):
+        return (
+            sorted(LocationStats.objects.values_list('qr_code_id', 'total_scans', 'first_finder_id')),
+            sorted(LocationHouseCount.objects.values_list('qr_code_id', 'house_id', 'scans')),
+            sorted(LocationScanBucket.objects.values_list('qr_code_id', 'bucket_start', 'scans')),
+        )
+
+    def test_scan_path_keeps_rollups_in_step_with_scans(self):
+        record_scan(self.jon, self.codes[0])
+        record_scan(self.theon, self.codes[0])
+        # Theon found Spot 1 earlier while offline, Jon's online scan came first
+        record_scan(self.jon, self.codes[1])
+        record_scan_batch(self.theon, [
+            {'qr_code': 'SPOT1', 'key': 'k1', 'scanned_at': (timezone.now() - timedelta(hours=1)).isoformat()},
+        ])
+
+        stats = LocationStats.objects.get(qr_code=self.codes[0])
+        self.assertEqual((stats.total_scans, stats.first_finder_id), (2, self.jon.pk))
+        self.assertEqual(LocationStats.objects.get(qr_code=self.codes[1]).first_finder_id, self.theon.pk)
+        self.assertEqual(LocationHouseCount.objects.get(qr_code=self.codes[0], house=self.greyjoy).scans, 1)
+
+        live = self.snapshot()
+        rebuild_location_rollups()
+        self.assertEqual(self.snapshot(), live)
+
+    def test_rebuild_excludes_scans_but_scans_share_the_lock(self):
+        with mock.patch.object(rollup, 'lock_rollups', wraps=rollup.lock_rollups) as lock:
+            record_scan(self.jon, self.codes[0])
+            record_scan(self.theon, self.codes[0])
+            self.assertEqual(lock.call_args_list, [mock.call(shared=True)] * 2)
+            lock.reset_mock()
+            rebuild_location_rollups()
+            lock.assert_called_once_with()
+
+    def test_report_reads_rollups_in_constant_queries(self):
+        for student in (self.jon, self.theon):
+            for qr_code in self.codes:
+                record_scan(student, qr_code)
+
+        with self.assertNumQueries(3):
+            report = location_report()
+        self.assertEqual([entry['total_scans'] for entry in report], [2, 2, 2])
+        self.assertEqual(len(report[0]['houses']), 2)
+
+
+class LocationRollupMigrationTests(TransactionTestCase):
+    before = [('treasure_hunt', '0004_location_rollups')]
+    after = [('treasure_hunt', '0005_backfill_location_rollups')]
+
+    def tearDown(self):
+        # Leave the schema fully migrated for the tests that follow
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def latest(self, executor, *app_labels):
+        return [node for node in executor.loader.graph.leaf_nodes() if node[0] in app_labels]
+
+    def test_existing_scans_are_rolled_up(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        # The rest of the schema stays fully migrated
+        old_apps = executor.loader.project_state(self.before + self.latest(executor, 'core', 'houses')).apps
+        house = old_apps.get_model('houses', 'House').objects.create(name="House Stark of Winterfell")
+        Student = old_apps.get_model('core', 'Student')
+        jon = Student.objects.create(matric_number="BU1", name="Jon", house=house)
+        arya = Student.objects.create(matric_number="BU2", name="Arya")
+        qr_code = old_apps.get_model('treasure_hunt', 'QRCode').objects.create(
+            code="GODSWOOD", clue="-", points=10, location_name="Godswood"
+        )
+        QRScan = old_apps.get_model('treasure_hunt', 'QRScan')
+        now = timezone.now()
+        QRScan.objects.create(student=arya, qr_code=qr_code, scanned_at=now)
+        QRScan.objects.create(student=jon, qr_code=qr_code, scanned_at=now - timedelta(hours=2))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        new_apps = executor.loader.project_state(self.after).apps
+        stats = new_apps.get_model('treasure_hunt', 'LocationStats').objects.get(qr_code_id=qr_code.pk)
+        self.assertEqual((stats.total_scans, stats.first_finder_id), (2, jon.pk))
+        self.assertEqual(
+            list(new_apps.get_model('treasure_hunt', 'LocationHouseCount').objects.values_list('house_id', 'scans')),
+            [(house.pk, 1)]
+        )
+        self.assertEqual(new_apps.get_model('treasure_hunt', 'LocationScanBucket').objects.count(), 2)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stark = House.objects.create(name="House Stark of Winterfell")
+        self.lannister = House.objects.create(name="House Lannister of Casterly Rock")
+        self.progress = []
+        for i in range(30):
+            house = self.stark if i % 2 else self.lannister
+            student = Student.objects.create(matric_number=f"BU{i:03d}", name=f"Hunter {i}", house=house)
+            self.progress.append(TreasureHuntProgress.objects.create(student=student, total_points=i, total_scans=1))
+
+    def test_top_and_around_windows(self):
+        top = leaderboard.top_entries(3)
+        self.assertEqual([(e['rank'], e['total_points']) for e in top], [(1, 29), (2, 28), (3, 27)])
+
+        around = leaderboard.entries_around(self.progress[10], 2)
+        self.assertEqual([e['total_points'] for e in around], [12, 11, 10, 9, 8])
+        self.assertEqual([e['rank'] for e in around], [18, 19, 20, 21, 22])
+
+    def test_house_totals(self):
+        totals = {h['name']: h for h in leaderboard.house_totals()}
+        self.assertEqual(totals[self.stark.name]['total_points'], sum(range(1, 30, 2)))
+        self.assertEqual(totals[self.lannister.name]['participants'], 15)
+        self.assertEqual(totals[self.stark.name]['rank'], 1)
+
+    def test_scan_bumps_version(self):
+        version = leaderboard.get_leaderboard_version()
+        qr_code = QRCode.objects.create(code="ROCK", clue="Gold", points=100, location_name="Casterly Rock")
+        with self.captureOnCommitCallbacks(execute=True):
+            record_scan(self.progress[0].student, qr_code)
+
+        self.assertNotEqual(leaderboard.get_leaderboard_version(), version)
+        self.assertEqual(leaderboard.top_entries(1)[0]['student_id'], self.progress[0].student_id)
+
+    def test_page_and_api(self):
+        self.client.force_login(self.progress[0].student, backend='django.contrib.auth.backends.ModelBackend')
+        url = reverse('treasure_hunt:leaderboard')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['ranked_progress']), 30)
+        self.assertEqual(response.context['around_me'], [])
+
+        response = self.client.get(reverse('treasure_hunt:leaderboard_api'), {'top': 5, 'around': 1})
+        data = response.json()
+        self.assertEqual(len(data['top']), 5)
+        self.assertEqual(data['rank'], 30)
+        self.assertEqual([e['rank'] for e in data['around_me']], [29, 30])
+        self.assertTrue(data['around_me'][-1]['is_current_user'])
+
+
+class QRCodeRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.invalidate()
+        self.qr_code = QRCode.objects.create(code="WALL", clue="Ice", points=5, location_name="The Wall")
+        QRCode.objects.create(code="OLD", clue="Gone", points=5, location_name="Old Town", is_active=False)
+
+    def test_lookups_are_served_from_memory(self):
+        self.assertEqual(registry.get("WALL"), self.qr_code)
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.get("WALL").points, 5)
+            self.assertIsNone(registry.get("OLD"))
+            self.assertEqual(registry.count(), 1)
+
+    def test_saving_a_code_reloads_the_registry(self):
+        registry.get("WALL")
+        self.qr_code.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.qr_code.save()
+            # Not invalidated until the save commits
+            self.assertIsNotNone(registry.get("WALL"))
+
+        self.assertIsNone(registry.get("WALL"))
+        QRCode.objects.filter(code="OLD").update(is_active=True)
+        registry.invalidate()
+        self.assertEqual([qr.code for qr in registry.all()], ["OLD"])
+
+
+@override_settings(RATE_LIMITS={'qr_scan': {'BURST': 3, 'RATE': 0.001}})
+class ScanRateLimitTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.student = Student.objects.create(matric_number="BU1", name="Sansa")
+        self.client.force_login(self.student, backend='django.contrib.auth.backends.ModelBackend')
+
+    def scan(self, code):
+        return self.client.post(reverse('treasure_hunt:scan'), json.dumps({'qr_code': code}),
+                                content_type='application/json')
+
+    def test_excess_scans_get_429_without_touching_the_database(self):
+        for _ in range(3):
+            self.assertEqual(self.scan("GUESS").status_code, 200)
+
+        # Only the session and user lookups done by the auth middleware
+        with self.assertNumQueries(2):
+            response = self.scan("GUESS")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(RATE_LIMITS={'qr_scan': {'BURST': 3, 'RATE': 0.001, 'IP_BURST': 100, 'IP_RATE': 0.001}})
+    def test_students_behind_one_address_keep_their_own_allowance(self):
+        def login(n):
+            self.client.force_login(Student.objects.create(matric_number=f"NAT{n}", name=f"Hunter {n}"),
+                                    backend='django.contrib.auth.backends.ModelBackend')
+
+        def ip_tokens():
+            return _memory_store._buckets["ratelimit:qr_scan:ip:127.0.0.1"][0]
+
+        # A flooder's rejected requests never touch the address's shared bucket
+        login('flood')
+        self.assertEqual([self.scan("GUESS").status_code for _ in range(3)], [200] * 3)
+        spent = ip_tokens()
+        self.assertEqual({self.scan("GUESS").status_code for _ in range(50)}, {429})
+        self.assertAlmostEqual(ip_tokens(), spent, delta=0.5)
+
+        # So 32 more students on that address each get their full burst
+        for n in range(32):
+            login(n)
+            self.assertEqual([self.scan("GUESS").status_code for _ in range(4)], [200, 200, 200, 429])
+
+        # The address as a whole is still capped: 99 of its 100 tokens are spent
+        statuses = []
+        for n in range(32, 35):
+            login(n)
+            statuses.append(self.scan("GUESS").status_code)
+        self.assertEqual(statuses, [200, 429, 429])
+
+    def test_page_views_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('treasure_hunt:scan')).status_code, 200)
+
+
+class QRSheetTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        self.codes = [
+            QRCode.objects.create(code=f"LOC{i}", clue="-", location_name=f"Spot {i}") for i in range(13)
+        ]
+
+    def test_tiles_are_laid_out_twelve_to_an_a4_page(self):
+        tiles, rendered = render_tiles(self.codes, cache_dir=self.cache_dir, workers=1)
+        self.assertEqual(rendered, 13)
+        with PILImage.open(tiles[0]) as tile:
+            self.assertEqual(tile.size, (qr_sheets.TILE_SIZE, qr_sheets.TILE_SIZE + qr_sheets.LABEL_HEIGHT))
+        self.assertEqual(oct(os.stat(tiles[0]).st_mode & 0o777), oct(qr_sheets.TILE_MODE))
+
+        pages = build_pages(tiles, title='Evoke')
+        self.assertEqual([page.size for page in pages], [qr_sheets.PAGE_SIZE] * 2)
+        # 12 tiles fill the first page; the 13th sits alone in the top-left cell of the second
+        cell_width = (qr_sheets.PAGE_SIZE[0] - 2 * qr_sheets.PAGE_MARGIN) // qr_sheets.COLUMNS
+        top = qr_sheets.PAGE_MARGIN + 40
+
+        def cell_has_ink(page, column):
+            left = qr_sheets.PAGE_MARGIN + column * cell_width
+            return page.crop((left, top, left + cell_width, top + 400)).convert('L').getextrema()[0] < 128
+        self.assertEqual([cell_has_ink(pages[0], c) for c in range(3)], [True, True, True])
+        self.assertEqual([cell_has_ink(pages[1], c) for c in range(3)], [True, False, False])
+
+        buffer = io.BytesIO()
+        write_pdf(pages, buffer)
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+    def test_cached_tiles_are_reused_until_a_code_changes(self):
+        first, _ = render_tiles(self.codes, cache_dir=self.cache_dir, workers=1)
+        tiles, rendered = render_tiles(self.codes, cache_dir=self.cache_dir, workers=1)
+        self.assertEqual((tiles, rendered), (first, 0))
+
+        self.codes[3].location_name = "Moved"
+        self.codes[5].code = "LOC5-REPRINT"
+        tiles, rendered = render_tiles(self.codes, cache_dir=self.cache_dir, workers=1)
+        self.assertEqual(rendered, 2)
+        self.assertEqual([a == b for a, b in zip(tiles, first)].count(False), 2)
+
+    def test_unwritable_cache_renders_in_memory(self):
+        blocker = os.path.join(self.cache_dir, 'not-a-dir')
+        open(blocker, 'w').close()
+        tiles, rendered = render_tiles(self.codes[:2], cache_dir=os.path.join(blocker, 'cache'))
+        self.assertEqual(rendered, 2)
+        self.assertEqual(len(build_pages(tiles)), 1)
+
+    def test_admin_action_returns_a_pdf(self):
+        self.client.force_login(Student.objects.create_superuser(matric_number="ROOT", name="Root"),
+                                backend='django.contrib.auth.backends.ModelBackend')
+        with override_settings(QR_SHEET_CACHE_DIR=self.cache_dir):
+            response = self.client.post(reverse('admin:treasure_hunt_qrcode_changelist'), {
+                'action': 'download_qr_sheets', '_selected_action': [code.pk for code in self.codes[:3]],
+            })
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+
+class ConcurrentScanTests(TransactionTestCase):
+    SCANNERS = 20
+
+    def setUp(self):
+        clear_treasure_event_cache()
+        self.house = House.objects.create(name="House Greyjoy of Pyke")
+        self.qr_code = QRCode.objects.create(code="PYKE", clue="Salt", points=7, location_name="Pyke")
+        self.students = [
+            Student.objects.create(matric_number=f"BU{i:03d}", name=f"Ironborn {i}", house=self.house)
+            for i in range(self.SCANNERS)
+        ]
+
+    def test_crowd_scanning_same_code(self):
+        results, errors = run_concurrently(
+            record_scan, [(student, self.qr_code) for student in self.students]
+        )
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(created for created, _ in results))
+        self.assertEqual(QRScan.objects.count(), self.SCANNERS)
+        self.assertEqual(Score.objects.filter(house=self.house).count(), 1)
+        self.assertEqual(Score.objects.get(house=self.house).points, 7 * self.SCANNERS)
+
+    def test_first_scans_share_one_treasure_event(self):
+        def first_scan(student):
+            clear_treasure_event_cache()
+            return record_scan(student, self.qr_code)
+
+        results, errors = run_concurrently(first_scan, [(student,) for student in self.students])
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Event.objects.filter(title=Event.TREASURE_HUNT_TITLE).count(), 1)
+        self.assertEqual(Score.objects.get(house=self.house).points, 7 * self.SCANNERS)
+
+    def test_batch_resent_while_the_first_is_running_is_credited_once(self):
+        other = QRCode.objects.create(code="HARLAW", clue="Books", points=5, location_name="Harlaw")
+        items = [{'qr_code': 'PYKE', 'key': 'p'}, {'qr_code': 'HARLAW', 'key': 'h'}]
+        student = self.students[0]
+
+        results, errors = run_concurrently(record_scan_batch, [(student, items)] * 4)
+
+        self.assertEqual(errors, [])
+        for statuses, _ in results:
+            self.assertEqual([r['status'] for r in statuses], ['recorded', 'recorded'])
+        progress = TreasureHuntProgress.objects.get(student=student)
+        self.assertEqual((progress.total_scans, progress.total_points), (2, 12))
+        self.assertEqual(Score.objects.get(house=self.house).points, 12)
+        self.assertEqual(LocationStats.objects.get(qr_code=other).total_scans, 1)
+
+    def test_one_student_scanning_repeatedly(self):
+        student = self.students[0]
+        results, errors = run_concurrently(
+            record_scan, [(student, self.qr_code)] * self.SCANNERS
+        )
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(created for created, _ in results), 1)
+        progress = TreasureHuntProgress.objects.get(student=student)
+        self.assertEqual((progress.total_scans, progress.total_points), (1, 7))
+        self.assertEqual(Score.objects.get(house=self.house).points, 7)
@@ -6,5 +6,7 @@ app_name = 'treasure_hunt'
 urlpatterns = [
     path('', views.treasure_hunt_home, name='home'),
     path('scan/', views.scan_qr_code, name='scan'),
+    path('scan/batch/', views.scan_qr_code_batch, name='scan_batch'),
     path('leaderboard/', views.treasure_hunt_leaderboard, name='leaderboard'),
+    path('leaderboard/api/', views.treasure_hunt_leaderboard_api, name='leaderboard_api'),
 ]
\ No newline at end of file
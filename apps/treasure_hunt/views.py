@@ -4,47 +4,50 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 import json
+from math import ceil
 from django.utils import timezone
 from django.db.models import Sum, Count
 
-from .models import QRCode, QRScan, TreasureHuntProgress
-from apps.events.models import Event, Score
+from .models import QRScan, TreasureHuntProgress
+from . import leaderboard
+from .leaderboard import get_rank
+from .registry import registry
+from .scanning import MAX_BATCH_SIZE, record_scan, record_scan_batch
+from apps.core.ratelimit import rate_limit
 from apps.houses.models import House
 
+LEADERBOARD_PAGE_SIZE = 50
+AROUND_ME_RADIUS = 5
+
 
 @login_required
 def treasure_hunt_home(request):
     progress, created = TreasureHuntProgress.objects.get_or_create(student=request.user)
     scans = QRScan.objects.filter(student=request.user).select_related('qr_code')
 
-    total_qr_codes = QRCode.objects.filter(is_active=True).count()
+    active_codes = registry.all()
+    total_qr_codes = len(active_codes)
 
     # Calculate progress percentage
     progress_percentage = round((progress.total_scans / total_qr_codes) * 100) if total_qr_codes > 0 else 0
 
     # Get user rank
-    all_progress = TreasureHuntProgress.objects.order_by('-total_points')
-    user_rank = 1
-    for i, p in enumerate(all_progress, 1):
-        if p.student == request.user:
-            user_rank = i
-            break
+    user_rank = get_rank(progress)
 
     # Get treasure locations with scan status
-    treasure_locations = []
-    all_qr_codes = QRCode.objects.filter(is_active=True)
-    user_scans = QRScan.objects.filter(student=request.user).values_list('qr_code_id', flat=True)
-    total_qr_codes = int(total_qr_codes or 0)
+    user_scans = {scan.qr_code_id for scan in scans}
     scans_done = int(getattr(progress, "total_scans", 0) or 0)
 
     remaining_treasures = max(0, total_qr_codes - scans_done)
 
-    for qr_code in all_qr_codes:
-        treasure_locations.append({
+    treasure_locations = [
+        {
             'name': qr_code.location_name,
             'points': qr_code.points,
             'scanned': qr_code.id in user_scans
-        })
+        }
+        for qr_code in active_codes
+    ]
 
     context = {
         'progress': progress,
@@ -52,13 +55,15 @@ def treasure_hunt_home(request):
         'total_qr_codes': total_qr_codes,
         'progress_percentage': progress_percentage,
         'user_rank': user_rank,
-        'total_participants': TreasureHuntProgress.objects.count(),
+        'total_participants': leaderboard.total_participants(),
         'treasure_locations': treasure_locations,
         'remaining_treasures': remaining_treasures,
     }
     return render(request, 'treasure_hunt/home.html', context)
 
 
+@login_required
+@rate_limit('qr_scan', message='Too many scans! Wait a moment and try again.')
 def scan_qr_code(request):
     if request.method == 'POST':
         try:
@@ -71,57 +76,31 @@ def scan_qr_code(request):
                     'message': 'No QR code provided!'
                 })
 
-            qr_code = QRCode.objects.get(code=qr_code_value, is_active=True)
+            qr_code = registry.get(qr_code_value)
+            if qr_code is None:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'Invalid QR code! This code is not recognized.'
+                })
 
-            # Check if already scanned
-            if QRScan.objects.filter(student=request.user, qr_code=qr_code).exists():
+            # Record the scan, progress and house score atomically
+            created, total_points = record_scan(request.user, qr_code)
+            if not created:
                 return JsonResponse({
                     'success': False,
                     'message': 'You have already scanned this QR code!',
                     'clue': qr_code.clue
                 })
 
-            # Record the scan
-            QRScan.objects.create(student=request.user, qr_code=qr_code)
-
-            # Update progress
-            progress, created = TreasureHuntProgress.objects.get_or_create(student=request.user)
-            progress.total_scans += 1
-            progress.total_points += qr_code.points
-            progress.last_scan = timezone.now()
-            progress.save()
-
-            # Add points to house
-            treasure_event, created = Event.objects.get_or_create(
-                title="Treasure Hunt",
-                defaults={
-                    'description': 'QR Code Treasure Hunt',
-                    'day': 1,
-                    'type': 'treasure',
-                    'time': timezone.now().time()
-                }
-            )
-
-            Score.objects.create(
-                event=treasure_event,
-                house=request.user.house,
-                points=qr_code.points
-            )
-
             return JsonResponse({
                 'success': True,
                 'message': f'QR Code scanned successfully! +{qr_code.points} points',
                 'clue': qr_code.clue,
                 'location': qr_code.location_name,
                 'points': qr_code.points,
-                'total_points': progress.total_points
+                'total_points': total_points
             })
 
-        except QRCode.DoesNotExist:
-            return JsonResponse({
-                'success': False,
-                'message': 'Invalid QR code! This code is not recognized.'
-            })
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -131,45 +110,97 @@ def scan_qr_code(request):
     return render(request, 'treasure_hunt/scan.html')
 
 
+@require_POST
+@login_required
+@rate_limit('qr_scan_batch', message='Too many sync attempts! Wait a moment and try again.')
+def scan_qr_code_batch(request):
+    """Accept scans queued on the phone while offline, sent together once it reconnects"""
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON body.'}, status=400)
+
+    items = data.get('scans') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return JsonResponse({'success': False, 'message': 'Expected a list of scans.'}, status=400)
+    if len(items) > MAX_BATCH_SIZE:
+        return JsonResponse({
+            'success': False,
+            'message': f'Send at most {MAX_BATCH_SIZE} scans per batch.'
+        }, status=400)
+
+    results, total_points = record_scan_batch(request.user, items)
+    return JsonResponse({
+        'success': True,
+        'results': results,
+        'recorded': sum(1 for result in results if result['status'] == 'recorded'),
+        'total_points': total_points,
+    })
+
+
 @login_required
 def treasure_hunt_leaderboard(request):
-    progress_list = TreasureHuntProgress.objects.select_related('student', 'student__house').order_by('-total_points')
-
-    # Add ranks
-    ranked_progress = []
-    for i, progress in enumerate(progress_list, 1):
-        ranked_progress.append({
-            'rank': i,
-            'progress': progress,
-            'is_current_user': progress.student == request.user
-        })
-
-    # Calculate house rankings
-    houses = House.objects.all()
-    house_rankings = []
-
-    for house in houses:
-        house_progress = TreasureHuntProgress.objects.filter(student__house=house)
-        total_points = house_progress.aggregate(total=Sum('total_points'))['total'] or 0
-        total_scans = house_progress.aggregate(total=Sum('total_scans'))['total'] or 0
-        participants = house_progress.count()
-
-        house_rankings.append({
-            'name': house.name,
-            'crest': house.crest,
-            'total_points': total_points,
-            'total_scans': total_scans,
-            'participants': participants,
-            'rank': 1  # Will be calculated below
-        })
-
-    # Sort and rank houses
-    house_rankings.sort(key=lambda x: x['total_points'], reverse=True)
-    for i, house in enumerate(house_rankings, 1):
-        house['rank'] = i
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    participants = leaderboard.total_participants()
+    num_pages = max(1, ceil(participants / LEADERBOARD_PAGE_SIZE))
+    page = min(page, num_pages)
+
+    ranked_progress = leaderboard.mark_current_user(
+        leaderboard.page_entries(page, LEADERBOARD_PAGE_SIZE), request.user
+    )
+
+    # Show the rows around the current user when they aren't on this page
+    around_me = []
+    progress = TreasureHuntProgress.objects.filter(student=request.user).first()
+    if progress and not any(entry['is_current_user'] for entry in ranked_progress):
+        around_me = leaderboard.mark_current_user(
+            leaderboard.entries_around(progress, AROUND_ME_RADIUS), request.user
+        )
 
     context = {
+        'podium': leaderboard.top_entries(3),
         'ranked_progress': ranked_progress,
-        'house_rankings': house_rankings,
+        'around_me': around_me,
+        'house_rankings': leaderboard.house_totals(),
+        'total_participants': participants,
+        'page_number': page,
+        'num_pages': num_pages,
+        'has_previous': page > 1,
+        'has_next': page < num_pages,
     }
-    return render(request, 'treasure_hunt/leaderboard.html', context)
\ No newline at end of file
+    return render(request, 'treasure_hunt/leaderboard.html', context)
+
+
+def _int_param(request, name, default, maximum):
+    try:
+        return max(0, min(int(request.GET.get(name, default)), maximum))
+    except ValueError:
+        return default
+
+
+@login_required
+def treasure_hunt_leaderboard_api(request):
+    """
+    JSON leaderboard: ?top=K leaders, ?around=N rows either side of the current user,
+    and per-house totals. All pieces are cached until the next scan.
+    """
+    top = _int_param(request, 'top', 10, 100)
+    around = _int_param(request, 'around', AROUND_ME_RADIUS, 25)
+
+    progress = TreasureHuntProgress.objects.filter(student=request.user).first()
+    around_me = []
+    if progress and around:
+        around_me = leaderboard.mark_current_user(leaderboard.entries_around(progress, around), request.user)
+
+    return JsonResponse({
+        'version': leaderboard.get_leaderboard_version(),
+        'total_participants': leaderboard.total_participants(),
+        'rank': leaderboard.get_rank(progress) if progress else None,
+        'top': leaderboard.mark_current_user(leaderboard.top_entries(top), request.user),
+        'around_me': around_me,
+        'houses': leaderboard.house_totals(),
+    })